@@ -6,6 +6,8 @@ from .code_output_agent import code_output_analyzer_agent
 from .final_report_agent import final_report_agent
 from .new_loop_agent import new_loop_agent
 from .code_fixer_agent import code_fixer_agent
+from .preflight_agent import preflight_agent
+from .candidates_agent import candidates_agent
 
 # Exporting all agents in a list for easy import and access
 all_agents = {
@@ -17,4 +19,6 @@ all_agents = {
     "final_report_agent": final_report_agent,
     "new_loop_agent": new_loop_agent,
     "code_fixer_agent": code_fixer_agent,
+    "preflight_agent": preflight_agent,
+    "candidates_agent": candidates_agent,
 }
@@ -0,0 +1,110 @@
+import asyncio
+from schemas import AgentState, Code
+from utils.candidates import candidate_workspace
+from utils.ranking import best_candidate, objective_direction
+from .code_output_agent import analyze_output_logic, ask_next_round
+from .common import cl
+from .docker_environment_agent import docker_environment_files_agent
+from .docker_execution_agent import start_docker_container_agent
+from .preflight_agent import preflight_agent
+
+
+async def evaluate_candidate(state: AgentState, code: Code, index: int):
+    """
+    Check, build, run and analyze one candidate in its own workspace.
+
+    Returns:
+    - (OutputOfCode, state of the candidate), None if the candidate failed.
+    """
+    workspace = candidate_workspace(state["workspace"], index)
+    workspace.write_file("generated.py", code.python_code)
+    workspace.write_file("requirements.txt", code.requirements)
+
+    # Shallow copy, the agents below only replace keys of the candidate's own state
+    candidate_state = {
+        **state,
+        "workspace": workspace,
+        "code": code,
+        "dockerFilesSignature": None,
+    }
+    candidate_state = await preflight_agent(candidate_state)
+    if candidate_state["proceed"] != "continue":
+        return None
+    candidate_state = await docker_environment_files_agent(candidate_state)
+    candidate_state = await start_docker_container_agent(candidate_state)
+    if candidate_state["proceed"] != "continue":
+        return None
+
+    try:
+        result = await analyze_output_logic(candidate_state)
+    except Exception as e:
+        print(f"Candidate {index + 1} analysis failed: {e}")
+        return None
+    return result, candidate_state
+
+
+# Candidates agent
+# When several solutions were generated for the round, all of them are evaluated at the same time
+# and the best one by objective value becomes the result of the round.
+# A single solution goes through the normal pre-flight, Docker and fix loop instead.
+@cl.step(name="Candidates Agent")
+async def candidates_agent(state: AgentState):
+    print("*** CANDIDATES AGENT ***")
+    current_step = cl.context.current_step
+    candidates = state.get("candidates") or []
+
+    if len(candidates) <= 1:
+        state["proceed"] = "run"
+        current_step.output = "One solution, running it normally."
+        return state
+
+    current_step.input = (
+        f"Evaluating {len(candidates)} candidate solutions in parallel."
+    )
+    outcomes = await asyncio.gather(
+        *(
+            evaluate_candidate(state, code, index)
+            for index, code in enumerate(candidates)
+        )
+    )
+    state["candidates"] = []
+    successful = [outcome for outcome in outcomes if outcome is not None]
+
+    if not successful:
+        # Nothing ran, the first candidate goes to the normal fix loop
+        state["code"] = candidates[0]
+        state["proceed"] = "run"
+        await cl.Message(
+            content=f"None of the {len(candidates)} candidates ran successfully, fixing the first one."
+        ).send()
+        return state
+
+    results = [result for result, _ in successful]
+    best_result, best_state = successful[
+        best_candidate(results, objective_direction(state))
+    ]
+
+    # Every candidate is kept for the final report, the best one continues
+    if "results" not in state:
+        state["results"] = []
+    state["results"].extend(results)
+    state["result"] = best_result
+    state["code"] = best_state["code"]
+    for key in ("docker_output", "execution_stats", "profile_report", "program_result"):
+        state[key] = best_state.get(key)
+
+    # Later rounds and fixes work on the best candidate in the session workspace
+    workspace = state["workspace"]
+    workspace.write_file("generated.py", best_state["code"].python_code)
+    workspace.write_file("requirements.txt", best_state["code"].requirements)
+
+    values = ", ".join(str(result.objective_value) for result in results)
+    current_step.output = (
+        f"{len(successful)} of {len(candidates)} candidates ran successfully.\n"
+        f"Objective values: {values}\nBest: {best_result.objective_value}"
+    )
+    await cl.Message(
+        content=f"Best of {len(successful)} candidates:\n{best_result.answer_description}"
+    ).send()
+
+    return await ask_next_round(state)
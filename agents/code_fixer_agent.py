@@ -1,28 +1,43 @@
 from .common import cl, PydanticOutputParser, llm_code
-from schemas import AgentState, Code, CodeFix
-from prompts.prompts import CODE_FIXER_PROMPT
+from utils.code_patch import CODE_FIX_MODE, patch_to_fix
+from utils.instrumentation import phase
+from schemas import AgentState, Code, CodeFix, CodePatch
+from prompts.prompts import CODE_FIXER_PROMPT, CODE_PATCH_PROMPT
 
 
 # Code is split into two functions to allow for easier testing
-async def fix_code_logic(code: Code, docker_output: str) -> Code:
+async def fix_code_logic(code: Code, docker_output: str, mode=None) -> CodeFix:
     """
     Core logic to fix code using the LLM.
 
     Parameters:
     - code: Code object containing the code to be fixed.
     - docker_output: The error message from the docker execution.
+    - mode: "patch" or "rewrite", defaults to CODE_FIX_MODE.
 
     Returns:
-    - A new Code object with the fixed code.
+    - CodeFix with the whole fixed code, also when the LLM returned only edits.
     """
-    prompt = CODE_FIXER_PROMPT.format(
+    if (mode or CODE_FIX_MODE) == "patch":
+        try:
+            patch = await ask_fix(code, docker_output, CODE_PATCH_PROMPT, CodePatch)
+            with phase("patch"):
+                return patch_to_fix(code, patch)
+        except ValueError as e:  # Unparseable response or PatchError
+            print(f"Patch not applied, asking for the whole code: {e}")
+
+    return await ask_fix(code, docker_output, CODE_FIXER_PROMPT, CodeFix)
+
+
+async def ask_fix(code: Code, docker_output: str, prompt_template, schema):
+    prompt = prompt_template.format(
         code=code.python_code,
         requirements=code.requirements,
         resources=code.resources,
         docker_output=docker_output,
     )
 
-    output_parser = PydanticOutputParser(pydantic_object=CodeFix)
+    output_parser = PydanticOutputParser(pydantic_object=schema)
     format_instructions = output_parser.get_format_instructions()
     prompt += f"\n\n{format_instructions}"
 
@@ -38,7 +53,8 @@ async def fix_code_logic(code: Code, docker_output: str) -> Code:
 
     # Parse the LLM's response
     try:
-        response = output_parser.parse(full_response)
+        with phase("parse"):
+            response = output_parser.parse(full_response)
     except Exception as e:
         raise ValueError(f"Error parsing code response: {e}")
 
@@ -84,12 +100,11 @@ async def code_fixer_agent(state: AgentState):
     def clean_text(text):
         return text.encode("utf-8", "replace").decode("utf-8")
 
-    with open("generated/generated.py", "w", encoding="utf-8") as f:
-        f.write(clean_text(updated_code.python_code))
+    workspace = state["workspace"]
+    workspace.write_file("generated.py", clean_text(updated_code.python_code))
 
     # If requirements have changed, save to requirements.txt
     if response.requirements_changed:
-        with open("generated/requirements.txt", "w", encoding="utf-8") as f:
-            f.write(response.requirements)
+        workspace.write_file("requirements.txt", response.requirements)
 
     return state
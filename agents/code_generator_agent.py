@@ -1,9 +1,10 @@
 from prompts.prompts import CODE_PROMPT_NO_DATA, CODE_PROMPT
 from schemas import AgentState, Code
+from utils.candidates import candidates_per_round, generate_candidates, variant_hint
 from .common import cl, llm_code
 
 #Splitted for two parts for easier testing
-async def generate_code_logic(state: AgentState) -> Code:
+async def generate_code_logic(state: AgentState, variant=0, variants=1) -> Code:
     #User summary: LLM generated summary what user wants
     #Problem type: Type of the problem user wants to solve (e.g. Cutting Stock Problem)
     #Optimization focus: What user wants to optimize (e.g. minimize material waste)
@@ -27,9 +28,12 @@ async def generate_code_logic(state: AgentState) -> Code:
             resource_requirements=inputs.resource_requirements,
         )
 
-    # Interact with the LLM
+    # Candidates of the same round are asked for different approaches
+    prompt += variant_hint(variant, variants)
+
+    # Interact with the LLM, async so that several candidates can be generated at once
     structured_llm = llm_code.with_structured_output(Code)
-    response = structured_llm.invoke(prompt)
+    response = await structured_llm.ainvoke(prompt)
 
     return response
 
@@ -52,28 +56,32 @@ async def code_generator_agent(state: AgentState) -> AgentState:
         f"Data: {state['promptFiles']}"
     )
 
+    count = candidates_per_round(state)
     try:
-        # Call the core logic function
-        response = await generate_code_logic(state)
+        # Call the core logic function, once per candidate solution
+        candidates = await generate_candidates(
+            lambda index: generate_code_logic(state, index, count), count
+        )
     except Exception as e:
         await cl.Message(content=str(e)).send()
         return state
+    response = candidates[0]
 
     # Update the Chainlit step output with the generated code
     current_step.output = (
         f"Generated Python code:\n```python\n{response.python_code}\n```",
         f"Requirements:\n```\n{response.requirements}\n```",
         f"Resources:\n```\n{response.resources}\n```",
+        f"Candidate solutions generated: {len(candidates)}",
     )
 
     # Update the state with the generated code
     state["code"] = response
+    state["candidates"] = candidates
 
     # Save the generated code and requirements to files
-    with open("generated/generated.py", "w", encoding="utf-8") as f:
-        f.write(response.python_code)
-
-    with open("generated/requirements.txt", "w", encoding="utf-8") as f:
-        f.write(response.requirements)
+    workspace = state["workspace"]
+    workspace.write_file("generated.py", response.python_code)
+    workspace.write_file("requirements.txt", response.requirements)
 
     return state
@@ -1,28 +1,46 @@
-from .common import cl, PydanticOutputParser, llm
+from .common import cl, PydanticOutputParser, llm, ask_action
+from utils.decisions import ROUND_DECISION
+from utils.instrumentation import phase
+from utils.ui_stream import TokenStreamer
 from prompts.prompts import CODE_OUTPUT_ANALYSIS_PROMPT
 from schemas import AgentState, OutputOfCode
-
-
-# Code output analyzer agent
-@cl.step(name="Code Output Analyzer Agent")
-async def code_output_analyzer_agent(state: AgentState):
-    print("*** CODE OUTPUT ANALYZER AGENT ***")
-    current_step = cl.context.current_step
+from utils.performance import build_metrics
+from utils.result_file import (
+    RESULT_LLM_ANALYSIS,
+    output_from_result,
+    summarize_for_analysis,
+)
+
+
+# Split from the agent so that candidate solutions can be analyzed the same way
+async def analyze_output_logic(state: AgentState, on_token=None) -> OutputOfCode:
+    """
+    Core logic to analyze the output of the executed code using the LLM.
+
+    Parameters:
+    - state: State with the purpose, code, docker output and execution stats.
+    - on_token: Optional async callback that receives the streamed response.
+
+    Returns:
+    - OutputOfCode with the executed code and measured metrics added.
+    """
     docker_output = state["docker_output"]
+    program_result = state.get("program_result")
+
+    # The result file has the numbers already, the LLM can be skipped completely
+    if program_result is not None and not RESULT_LLM_ANALYSIS:
+        response = output_from_result(program_result)
+        return with_measurements(state, response)
 
-    # Prepare the prompt
+    # Prepare the prompt, with the result file only a summary instead of the whole output
     prompt = CODE_OUTPUT_ANALYSIS_PROMPT.format(
         user_summary=state["purpose"].user_summary,
         original_goal=state["purpose"].goal,
-        code_output=docker_output,
-    )
-
-    # Display input in the Chainlit interface
-    current_step.input = (
-        f"Analyzing the code output based on the following inputs:\n\n"
-        f"User Summary: {state['purpose'].user_summary}\n"
-        f"Original Goal: {state['purpose'].goal}\n"
-        f"Code Output:\n```\n{docker_output}\n```"
+        code_output=(
+            summarize_for_analysis(program_result, docker_output)
+            if program_result is not None
+            else docker_output
+        ),
     )
 
     # Set up the output parser
@@ -39,45 +57,55 @@ async def code_output_analyzer_agent(state: AgentState):
     try:
         async for chunk in llm.astream(prompt):
             if hasattr(chunk, "content"):
-                await current_step.stream_token(chunk.content)
+                if on_token:
+                    await on_token(chunk.content)
                 full_response += chunk.content
     except Exception as e:
-        await cl.Message(content=f"Error during code output analysis: {e}").send()
-        return state
+        raise RuntimeError(f"Error during code output analysis: {e}")
 
     # Parse the full response
     try:
-        response = output_parser.parse(full_response)
-        response.code = state["code"].python_code
+        with phase("parse"):
+            response = output_parser.parse(full_response)
     except Exception as e:
-        await cl.Message(
-            content=f"Error parsing code output analysis response: {e}"
-        ).send()
-        return state
+        raise ValueError(f"Error parsing code output analysis response: {e}")
 
-    state["result"] = response
+    return with_measurements(state, response)
 
-    if "results" not in state:
-        state["results"] = []
 
-    state["results"].append(response)
+def with_measurements(state: AgentState, response: OutputOfCode) -> OutputOfCode:
+    # Values measured or reported by the program win over what the LLM read from the output
+    response.code = state["code"].python_code
+    response.metrics = build_metrics(
+        state.get("execution_stats"), state["docker_output"]
+    )
+    program_result = state.get("program_result")
+    if program_result is not None:
+        response.objective_value = program_result.objective_value
+        if program_result.status:
+            response.metrics.solver_status = program_result.status
+    return response
 
-    # Display the analysis result to the user
-    await cl.Message(content=f"Analysis Result:\n{response.answer_description}").send()
+
+async def ask_next_round(state: AgentState) -> AgentState:
+    # One optimization round is finished, the user decides whether to continue
+    state["iterations"] = state.get("iterations", 0) + 1
 
     # Ask the user if they want to start a new optimization round
-    res = await cl.AskActionMessage(
-        content="Let's begin a new optimization round?",
-        actions=[
+    value = await ask_action(
+        state,
+        ROUND_DECISION,
+        "Let's begin a new optimization round?",
+        [
             cl.Action(
                 name="continue", value="continue", label="✅ Yes, let's continue"
             ),
             cl.Action(name="done", value="done", label="❌ This is enough for now"),
         ],
-    ).send()
+    )
 
     # Handle the user's response
-    if res and res.get("value") == "continue":
+    if value == "continue":
         state["proceed"] = "continue"
         await cl.Message(content="Starting new optimization round!").send()
     else:
@@ -87,3 +115,38 @@ async def code_output_analyzer_agent(state: AgentState):
         ).send()
 
     return state
+
+
+# Code output analyzer agent
+@cl.step(name="Code Output Analyzer Agent")
+async def code_output_analyzer_agent(state: AgentState):
+    print("*** CODE OUTPUT ANALYZER AGENT ***")
+    current_step = cl.context.current_step
+    docker_output = state["docker_output"]
+
+    # Display input in the Chainlit interface
+    current_step.input = (
+        f"Analyzing the code output based on the following inputs:\n\n"
+        f"User Summary: {state['purpose'].user_summary}\n"
+        f"Original Goal: {state['purpose'].goal}\n"
+        f"Code Output:\n```\n{docker_output}\n```"
+    )
+
+    try:
+        async with TokenStreamer(current_step) as stream:
+            response = await analyze_output_logic(state, stream.send)
+    except Exception as e:
+        await cl.Message(content=str(e)).send()
+        return state
+
+    state["result"] = response
+
+    if "results" not in state:
+        state["results"] = []
+
+    state["results"].append(response)
+
+    # Display the analysis result to the user
+    await cl.Message(content=f"Analysis Result:\n{response.answer_description}").send()
+
+    return await ask_next_round(state)
@@ -6,14 +6,96 @@ import chainlit as cl
 from langchain.output_parsers import PydanticOutputParser
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
+from utils.instrumentation import TimedStructuredModel, phase, timed_stream
+from utils.llm_cache import cached
 
 # Load environment variables once
 load_dotenv()
 
-# Shared LLM instance
-api_key = os.getenv("OPENAI_API_KEY")
-llm = ChatOpenAI(api_key=api_key, model="gpt-4o-mini", disable_streaming=False)
-llm_code = ChatOpenAI(api_key=api_key, model="gpt-4o", disable_streaming=False)
+
+class SwappableModel:
+    # Agents import llm/llm_code by name, so the model behind them is replaced in place
+    # (e.g. with a scripted model for offline tests and benchmarks).
+    # Calls are timed and their token usage is recorded in the trace of the current run.
+    # The real model is created on first use, so offline runs need no OpenAI key.
+    def __init__(self, factory):
+        self.factory = factory
+        self._model = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = self.factory()
+        return self._model
+
+    @model.setter
+    def model(self, model):
+        self._model = model
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+    def astream(self, prompt, *args, **kwargs):
+        return timed_stream(self.model, prompt, *args, **kwargs)
+
+    def with_structured_output(self, schema, **kwargs):
+        return TimedStructuredModel(self.model.with_structured_output(schema, **kwargs))
+
+
+def openai_model(model: str):
+    # Shared LLM instance, wrapped with the response cache when LLM_CACHE is enabled
+    # stream_usage makes streamed responses report their token counts too
+    return cached(
+        ChatOpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            model=model,
+            disable_streaming=False,
+            stream_usage=True,
+        )
+    )
+
+
+llm = SwappableModel(lambda: openai_model("gpt-4o-mini"))
+llm_code = SwappableModel(lambda: openai_model("gpt-4o"))
+
+
+def set_models(model, code_model=None):
+    """
+    Replace the models behind llm and llm_code.
+
+    Returns:
+    - The previous (model, code_model) pair, so they can be restored.
+    """
+    previous = (llm._model, llm_code._model)
+    llm.model = model
+    llm_code.model = code_model or model
+    return previous
+
+
+async def ask_action(state, decision: str, content: str, actions) -> str:
+    """
+    Ask the user to pick one of the actions.
+
+    In headless runs the decision policy in state["policy"] answers instead of the user.
+
+    Returns:
+    - Value of the chosen action, None if the user did not answer.
+    """
+    policy = state.get("policy")
+    if policy is not None:
+        return policy.decide(decision, state)
+
+    with phase("ui_wait"):
+        res = await cl.AskActionMessage(content=content, actions=actions).send()
+    return res.get("value") if res else None
+
 
 # Export common objects or functions
-__all__ = ["cl", "PydanticOutputParser", "llm", "llm_code"]
+__all__ = [
+    "cl",
+    "PydanticOutputParser",
+    "llm",
+    "llm_code",
+    "set_models",
+    "ask_action",
+]
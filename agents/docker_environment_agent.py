@@ -1,8 +1,22 @@
+import os
 from prompts.prompts import (
     DOCKER_FILES_PROMPT,
 )
 from schemas import AgentState, DockerFiles
+from utils.base_image import (
+    BASE_IMAGE,
+    base_image_docker_files,
+    base_image_tag,
+    read_spec,
+)
+from utils.docker_templates import (
+    can_use_template,
+    docker_files_signature,
+    template_docker_files,
+)
 from .common import cl, PydanticOutputParser, llm
+from utils.instrumentation import phase
+from utils.ui_stream import TokenStreamer
 
 
 # Docker environment setup agent
@@ -12,6 +26,39 @@ async def docker_environment_files_agent(state: AgentState):
     print("*** DOCKER ENVIRONMENT AGENT ***")
     current_step = cl.context.current_step
     inputs = state["code"]
+    workspace = state["workspace"]
+    spec = read_spec()
+    signature = docker_files_signature(
+        inputs, base_image_tag(spec) if BASE_IMAGE else ""
+    )
+
+    # Requirements and resources are the same as in the previous round, keep the existing files
+    if state.get("dockerFilesSignature") == signature and all(
+        os.path.exists(workspace.file_path(name))
+        for name in ("Dockerfile", "compose.yaml")
+    ):
+        current_step.input = "Requirements and resources unchanged."
+        current_step.output = (
+            "Reusing the Docker environment files of the previous round."
+        )
+        return state
+
+    # Standard Python project, no need to ask the LLM
+    if can_use_template(inputs):
+        # Requirements already installed in the base image need no build at all
+        response = base_image_docker_files(inputs, spec)
+        template = "base image" if response else "standard Docker template"
+        response = response or template_docker_files(inputs)
+        current_step.input = (
+            f"Using the {template} for requirements:\n"
+            f"```\n{inputs.requirements}\n```"
+        )
+        current_step.output = (
+            f"Dockerfile:\n```\n{response.dockerfile}```\n"
+            f"compose.yaml:\n```yaml\n{response.compose_file}```"
+        )
+        save_docker_files(state, response, signature)
+        return state
 
     # Prepare the prompt
     prompt = DOCKER_FILES_PROMPT.format(
@@ -40,28 +87,33 @@ async def docker_environment_files_agent(state: AgentState):
 
     # Stream the response from the LLM
     try:
-        async for chunk in llm.astream(prompt):
-            if hasattr(chunk, "content"):
-                await current_step.stream_token(chunk.content)
-                full_response += chunk.content
+        async with TokenStreamer(current_step) as stream:
+            async for chunk in llm.astream(prompt):
+                if hasattr(chunk, "content"):
+                    await stream.send(chunk.content)
+                    full_response += chunk.content
     except Exception as e:
         await cl.Message(content=f"Error during Docker files generation: {e}").send()
         return state
 
     # Parse the full response
     try:
-        response = output_parser.parse(full_response)
+        with phase("parse"):
+            response = output_parser.parse(full_response)
     except Exception as e:
         await cl.Message(content=f"Error parsing Docker files response: {e}").send()
         return state
 
-    state["docker_files"] = response
+    save_docker_files(state, response, signature)
 
-    # Save the Dockerfile and Compose file
-    with open("generated/Dockerfile", "w", encoding="utf-8") as f:
-        f.write(response.dockerfile)
+    return state
 
-    with open("generated/compose.yaml", "w", encoding="utf-8") as f:
-        f.write(response.compose_file)
 
-    return state
+def save_docker_files(state: AgentState, response: DockerFiles, signature: str):
+    state["docker_files"] = response
+    state["dockerFilesSignature"] = signature
+
+    # Save the Dockerfile and Compose file
+    workspace = state["workspace"]
+    workspace.write_file("Dockerfile", response.dockerfile)
+    workspace.write_compose_file(response.compose_file)
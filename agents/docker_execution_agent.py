@@ -1,7 +1,25 @@
-from schemas import AgentState
-from .common import cl, os
+from schemas import AgentState, ExecutionStats
+from utils.executors import get_executor
+from utils.limits import (
+    EXECUTION_MEMORY,
+    EXECUTION_TIMEOUT,
+    parse_stats_line,
+    was_killed,
+)
+from utils.profiling import (
+    PROFILER_FILE,
+    PROFILING_MODE,
+    format_profile_report,
+    parse_profile_line,
+)
+from utils.instrumentation import record_phase
+from utils.log_capture import LogCapture, LogStream
+from utils.ui_stream import TokenStreamer
+from utils.result_file import clear_result_file, read_result_file
+from .common import cl
+import asyncio
 import re
-import subprocess
+import time
 
 
 # Start Docker container agent
@@ -12,78 +30,123 @@ async def start_docker_container_agent(state: AgentState):
     current_step = cl.context.current_step
     current_step.input = "Starting Docker container to execute the generated code."
 
-    os.chdir("generated")
-    full_output = ""
+    # Commands run in the session workspace, os.chdir would affect every session in the process
+    workspace = state["workspace"]
+    # Build and program output are kept within a byte budget, full logs go to the workspace
+    capture = LogCapture(workspace)
+    # Log lines reach the UI in batches, not one websocket message per line
+    stream = TokenStreamer(current_step)
     error_output = ""  # To capture the entire traceback if an error occurs
 
-    try:
-        # Build the Docker image
-        print("Building Docker image...")
-        build_command = ["docker-compose", "build"]
-        build_process = subprocess.Popen(
-            build_command,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-            encoding="utf-8",
+    error_capture = LogStream(spill_path=None)
+    traceback_started = False
+    usage = {}  # CPU time and peak memory reported by the runner script
+    run_started = None
+
+    async def show_line(line):
+        print(line, end="")
+        await stream.send(line)
+
+    async def build_line(line):
+        capture.build.add(line)
+        await show_line(line)
+
+    async def run_line(line):
+        nonlocal traceback_started
+        stats = parse_stats_line(line.strip())
+        if stats is not None:
+            usage.update(stats)
+            return
+        profile = parse_profile_line(line.strip())
+        if profile is not None:
+            state["profile_report"] = format_profile_report(profile)
+            return
+        capture.run.add(line)
+        await show_line(line)
+
+        # Check for the "File ..." pattern first
+        if re.match(r'\s*File\s+".+",\s+line\s+\d+', line):
+            traceback_started = True
+            error_capture.add(line)
+        elif traceback_started:
+            error_capture.add(line)
+        elif "Traceback" in line or "SyntaxError" in line:
+            traceback_started = True
+            error_capture.add(line)
+
+    def mark_started():
+        # Build time is not part of the measured run time
+        nonlocal run_started
+        run_started = time.monotonic()
+
+    def record_stats(exit_code=None, timed_out=False):
+        state["execution_stats"] = ExecutionStats(
+            wall_time=time.monotonic() - run_started if run_started else 0.0,
+            cpu_time=usage.get("cpu_time"),
+            peak_memory_mb=usage.get("peak_memory_mb"),
+            exit_code=usage.get("exit_code", exit_code),
+            timed_out=timed_out,
         )
 
-        for line in build_process.stdout:
-            print(line, end="")
-            full_output += line
-            await current_step.stream_token(line)
-
-        build_process.wait()
-        if build_process.returncode != 0:
-            raise Exception("Docker image build failed")
-
-        # Run the Docker container
-        print("Running Docker container...")
-        up_command = [
-            "docker-compose",
-            "up",
-            "--abort-on-container-exit",
-            "--no-log-prefix",
-        ]
-        up_process = subprocess.Popen(
-            up_command,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-            encoding="utf-8",
-        )
+    # A report from an earlier version of the code would point at the wrong bottleneck
+    state["profile_report"] = ""
+    state["program_result"] = None
+    clear_result_file(workspace)
 
-        error_capture = []
-        traceback_started = False
-
-        for line in up_process.stdout:
-            print(line, end="")
-            full_output += line
-            await current_step.stream_token(line)
-
-            # Check for the "File ..." pattern first
-            if re.match(r'\s*File\s+".+",\s+line\s+\d+', line):
-                traceback_started = True
-                error_capture.append(line)
-            elif traceback_started:
-                error_capture.append(line)
-            elif "Traceback" in line or "SyntaxError" in line:
-                traceback_started = True
-                error_capture.append(line)
-
-            if "exited with code" in line:
-                error_output = "".join(error_capture)
-                break
-
-        up_process.wait()
-        if up_process.returncode != 0:
+    execution_started = time.monotonic()
+    try:
+        # The executor backend builds the environment and runs the code, docker compose by default
+        # The executor writes the profiler wrapper when the image runs its command
+        script = PROFILER_FILE if PROFILING_MODE else "generated.py"
+        returncode = await get_executor().run(
+            workspace,
+            script,
+            on_output=build_line,
+            on_line=run_line,
+            on_start=mark_started,
+            timeout=EXECUTION_TIMEOUT,
+        )
+        error_output = error_capture.text()
+
+        record_stats(returncode)
+        if returncode != 0 or state["execution_stats"].exit_code not in (None, 0):
+            if was_killed(state["execution_stats"].exit_code):
+                error_capture.add(
+                    f"Process was killed, it probably exceeded the memory limit of {EXECUTION_MEMORY}.\n"
+                )
+                error_output = error_capture.text()
             raise Exception("Docker container execution failed")
 
-        state["docker_output"] = full_output
+        # Structured result written by the program, the output analysis prefers it
+        state["program_result"], result_error = read_result_file(workspace)
+        if result_error:
+            print(result_error)
+            await show_line(f"Ignoring the result file: {result_error}\n")
+
+        # Only the program output, build logs are not needed for the analysis
+        state["docker_output"] = capture.run.text()
         state["proceed"] = "continue"
 
+    except asyncio.TimeoutError:
+        # Distinct outcome, the fixer is asked for a faster approach instead of a bug fix
+        record_stats(timed_out=True)
+        message = (
+            f"Execution timed out after {EXECUTION_TIMEOUT:.0f} seconds. "
+            "The program is too slow for the data, use a faster algorithm, "
+            "a heuristic or a time limit for the solver."
+        )
+        print(message)
+        state["docker_output"] = (
+            f"{message}\nLast output:\n{capture.run.tail_text(2000)}"
+        )
+        state["proceed"] = "timeout"
+        await cl.Message(content=message).send()
+
     except Exception as e:
         print(f"An error occurred: {e}")
+        # Without a traceback the end of the failed build or run tells what went wrong
+        if not error_output.strip():
+            error_output = (capture.run if run_started else capture.build).text()
         # Combine exception message with captured traceback output
         state["docker_output"] = f"{str(e)}\n{error_output.strip()}"
         print(state["docker_output"])
@@ -93,9 +156,13 @@ async def start_docker_container_agent(state: AgentState):
         ).send()
 
     finally:
-        # Clean up Docker resources
-        subprocess.run(["docker-compose", "down"])
-        subprocess.run(["docker", "image", "prune", "-f"])
-        os.chdir("..")
+        await stream.flush()
+        capture.close()
+
+    # Image build (or cache lookup) and the program run are separate phases of the trace
+    finished = time.monotonic()
+    record_phase("build", (run_started or finished) - execution_started)
+    if run_started:
+        record_phase("run", finished - run_started)
 
     return state
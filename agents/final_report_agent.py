@@ -1,6 +1,15 @@
 from .common import cl, PydanticOutputParser, llm
+from utils.instrumentation import phase
+from utils.ui_stream import TokenStreamer
 from schemas import AgentState, FinalReport
 from prompts.prompts import FINAL_REPORT_PROMPT
+from utils.performance import format_metrics
+from utils.ranking import (
+    best_candidate,
+    is_ambiguous,
+    objective_direction,
+    ranking_reason,
+)
 
 
 # Final report, decide which optimization is best and why
@@ -16,16 +25,29 @@ async def final_report_agent(state: AgentState):
         "Generating the final report based on the optimization results."
     )
 
+    # Objective values can be compared directly, the LLM is only asked when none has a value
+    if not is_ambiguous(results):
+        direction = objective_direction(state)
+        best = best_candidate(results, direction)
+        response = FinalReport(
+            index_of_optimization=best + 1,
+            reason=ranking_reason(results, best, direction),
+        )
+        current_step.output = response.reason
+        return await send_final_report(state, response)
+
     # Let LLM choose which optimization is the best, so convert results to format that LLM can use for comparison
     # Main criteria for comparison: objective_value, answer, is_goal_achieved
+    # Measured runtime and memory are included, so speed can be compared too
     comparison_data = []
-    for result in results:
+    for index, result in enumerate(results, start=1):
         comparison_data.append(
             {
-                "index": results.index(result) + 1,
+                "index": index,
                 "objective_value": result.objective_value,
                 "answer": result.answer,
                 "is_goal_achieved": result.is_goal_achieved,
+                "performance": format_metrics(result.metrics),
             }
         )
 
@@ -46,24 +68,31 @@ async def final_report_agent(state: AgentState):
 
     # Stream the response from the LLM
     try:
-        async for chunk in llm.astream(prompt):
-            if hasattr(chunk, "content"):
-                await current_step.stream_token(chunk.content)
-                full_response += chunk.content
+        async with TokenStreamer(current_step) as stream:
+            async for chunk in llm.astream(prompt):
+                if hasattr(chunk, "content"):
+                    await stream.send(chunk.content)
+                    full_response += chunk.content
     except Exception as e:
         await cl.Message(content=f"Error during new optimization round: {e}").send()
         return state
 
         # Parse the full response
     try:
-        response = output_parser.parse(full_response)
+        with phase("parse"):
+            response = output_parser.parse(full_response)
     except Exception as e:
         await cl.Message(content=f"Error parsing new code response: {e}").send()
         return state
 
     print(response)
+    return await send_final_report(state, response)
+
+
+async def send_final_report(state: AgentState, response: FinalReport) -> AgentState:
+    state["finalReport"] = response
     index_of_best_optimization = response.index_of_optimization
-    best_optimization = results[index_of_best_optimization - 1]
+    best_optimization = state["results"][index_of_best_optimization - 1]
 
     # Send the final report to the user
     await cl.Message(content=response.reason).send()
@@ -1,9 +1,12 @@
 from .common import cl, PydanticOutputParser, llm
+from utils.instrumentation import phase
 from schemas import AgentState, Code
 from prompts.prompts import NEW_LOOP_CODE_PROMPT, NEW_LOOP_CODE_PROMPT_NO_DATA
+from utils.candidates import candidates_per_round, generate_candidates, variant_hint
+from utils.performance import performance_notes
 
 
-async def new_loop_logic(state: AgentState) -> Code:
+async def new_loop_logic(state: AgentState, variant=0, variants=1) -> Code:
     inputs = state["purpose"]
     last_code = state["code"]
     last_output = state["result"]
@@ -15,6 +18,9 @@ async def new_loop_logic(state: AgentState) -> Code:
             problem_type=inputs.problem_type,
             optimization_focus=inputs.optimization_focus,
             previous_results=last_output.answer_description,
+            performance=performance_notes(
+                last_output.metrics, state.get("profile_report")
+            ),
             previous_code=last_code.python_code,
             resource_requirements=inputs.resource_requirements,
         )
@@ -25,6 +31,9 @@ async def new_loop_logic(state: AgentState) -> Code:
             optimization_focus=inputs.optimization_focus,
             data=state["promptFiles"],
             previous_results=last_output.answer_description,
+            performance=performance_notes(
+                last_output.metrics, state.get("profile_report")
+            ),
             previous_code=last_code.python_code,
             resource_requirements=inputs.resource_requirements,
         )
@@ -33,6 +42,9 @@ async def new_loop_logic(state: AgentState) -> Code:
     output_parser = PydanticOutputParser(pydantic_object=Code)
     format_instructions = output_parser.get_format_instructions()
 
+    # Candidates of the same round are asked for different approaches
+    prompt += variant_hint(variant, variants)
+
     # Append format instructions to the prompt
     prompt += f"\n\n{format_instructions}"
 
@@ -52,7 +64,8 @@ async def new_loop_logic(state: AgentState) -> Code:
     cleaned_response = clean_text(full_response)
 
     try:
-        response = output_parser.parse(cleaned_response)
+        with phase("parse"):
+            response = output_parser.parse(cleaned_response)
     except Exception as e:
         raise ValueError(f"Error parsing new code response: {e}")
 
@@ -78,12 +91,16 @@ async def new_loop_agent(state: AgentState) -> AgentState:
         f"Previous Code:\n```python\n{last_code.python_code}\n```"
     )
 
-    # Call the core logic function
+    # Call the core logic function, once per candidate solution
+    count = candidates_per_round(state)
     try:
-        response = await new_loop_logic(state)
+        candidates = await generate_candidates(
+            lambda index: new_loop_logic(state, index, count), count
+        )
     except Exception as e:
         await cl.Message(content=f"Error during new optimization round: {e}").send()
         return state
+    response = candidates[0]
 
     # Display the new code and requirements in Chainlit
     await cl.Message(
@@ -94,11 +111,10 @@ async def new_loop_agent(state: AgentState) -> AgentState:
     ).send()
 
     # Save the new code and requirements to files
-    with open("generated/generated.py", "w", encoding="utf-8") as f:
-        f.write(response.python_code)
-
-    with open("generated/requirements.txt", "w", encoding="utf-8") as f:
-        f.write(response.requirements)
+    workspace = state["workspace"]
+    workspace.write_file("generated.py", response.python_code)
+    workspace.write_file("requirements.txt", response.requirements)
 
     state["code"] = response
+    state["candidates"] = candidates
     return state
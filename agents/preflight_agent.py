@@ -0,0 +1,59 @@
+import os
+from schemas import AgentState
+from utils.static_checks import preflight_report
+from .common import cl
+
+# Fixes asked by the pre-flight check in a row before the code is run anyway, the real
+# run then decides whether the reported problems are real
+PREFLIGHT_MAX_FIXES = int(os.getenv("PREFLIGHT_MAX_FIXES", "2"))
+
+
+# Pre-flight check agent
+# Runs fast local checks on the generated code before the Docker image is built,
+# so simple mistakes go straight to the code fixer instead of costing a container build
+@cl.step(name="Pre-flight Check Agent")
+async def preflight_agent(state: AgentState):
+    print("*** PRE-FLIGHT CHECK AGENT ***")
+    current_step = cl.context.current_step
+    code = state["code"]
+    workspace = state["workspace"]
+
+    current_step.input = "Checking syntax, names and imports of the generated code."
+
+    # Uploaded Python files next to generated.py can be imported by the code
+    local_modules = {
+        name[:-3]
+        for name in os.listdir(workspace.create().path)
+        if name.endswith(".py") and name != "generated.py"
+    }
+
+    errors, warnings = preflight_report(
+        code.python_code, code.requirements, local_modules
+    )
+    warning_output = "".join(f"\nWarning: {warning}" for warning in warnings)
+    error_output = "\n\n".join(errors)
+    fixes = state.get("preflightFixes", 0)
+
+    if errors and fixes < PREFLIGHT_MAX_FIXES:
+        state["docker_output"] = f"Pre-flight check failed\n{error_output}"
+        state["proceed"] = "fix"
+        state["preflightFixes"] = fixes + 1
+        current_step.output = (
+            f"Pre-flight check failed:\n```\n{error_output}\n```{warning_output}"
+        )
+        await cl.Message(
+            content=f"Pre-flight check found problems, fixing before the Docker build:\n{error_output}"
+        ).send()
+    elif errors:
+        state["proceed"] = "continue"
+        state["preflightFixes"] = 0
+        current_step.output = (
+            f"Pre-flight check still fails after {fixes} fixes, running the code anyway:"
+            f"\n```\n{error_output}\n```{warning_output}"
+        )
+    else:
+        state["proceed"] = "continue"
+        state["preflightFixes"] = 0
+        current_step.output = f"All pre-flight checks passed.{warning_output}"
+
+    return state
@@ -4,7 +4,10 @@ from prompts.prompts import (
     TASK_ANALYSIS_PROMPT,
 )
 from schemas import AgentState, Purpose
-from .common import cl, PydanticOutputParser, llm
+from .common import cl, PydanticOutputParser, llm, ask_action
+from utils.decisions import PLAN_DECISION
+from utils.instrumentation import phase
+from utils.ui_stream import TokenStreamer
 
 
 # This agent function analyzes the problem based on user input and provided files.
@@ -38,14 +41,16 @@ async def problem_analyzer_agent(state: AgentState):
     full_response = ""
 
     # Streams the LLM's response in real-time chunks to the Chainlit interface
-    async for chunk in llm.astream(prompt):
-        if hasattr(chunk, "content"):
-            await current_step.stream_token(chunk.content)  # Streams response to UI
-            full_response += chunk.content
+    async with TokenStreamer(current_step) as stream:
+        async for chunk in llm.astream(prompt):
+            if hasattr(chunk, "content"):
+                await stream.send(chunk.content)  # Streams response to UI in batches
+                full_response += chunk.content
 
     # Parses full response using the Pydantic parser into the Purpose model
     try:
-        response = output_parser.parse(full_response)
+        with phase("parse"):
+            response = output_parser.parse(full_response)
     except Exception as e:
         await cl.Message(content=f"Error parsing response: {e}").send()
         return state  # Returns the unmodified state on error
@@ -56,19 +61,21 @@ async def problem_analyzer_agent(state: AgentState):
     await cl.Message(content=f"{response.chatbot_response}").send()
 
     # Prompts the user to proceed or make a new plan
-    res = await cl.AskActionMessage(
-        content="Sounds good, proceed?!",
-        actions=[
+    value = await ask_action(
+        state,
+        PLAN_DECISION,
+        "Sounds good, proceed?!",
+        [
             cl.Action(name="continue", value="continue", label="✅ Continue"),
             cl.Action(name="new", value="new", label="❌ Create new plan"),
             cl.Action(name="cancel", value="cancel", label="❌ Cancel and start over"),
         ],
-    ).send()
+    )
 
     # Updates state based on user response
-    if res and res.get("value") == "continue":
+    if value == "continue":
         state["proceed"] = "continue"
-    elif res and res.get("value") == "cancel":
+    elif value == "cancel":
         state["proceed"] = "cancel"
         await cl.Message(content="Alright, let's cancel this and start over!").send()
     else:
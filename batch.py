@@ -0,0 +1,333 @@
+# batch.py
+# Headless runner for many optimization jobs, the same workflow as main.py without the Chainlit UI.
+# Every job is a directory with the user's prompt (prompt.txt or prompt.md) and optional
+# Excel/Python files. The action buttons are answered by an automatic decision policy.
+#
+# python batch.py jobs/ --output batch_results --workers 4 --rounds 3 --stop-when-goal-met
+# python batch.py jobs/ --candidates 3  # three candidate solutions per round
+# python batch.py jobs/ --direction maximize  # larger objective values are better
+# python batch.py jobs/ --checkpoint  # run again after a crash to resume unfinished jobs
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+
+import pandas as pd
+
+from main import app, format_prompt_files, workflow
+from schemas import AgentState
+from utils import Workspace, WORKSPACES_ROOT
+from utils.checkpoints import (
+    CHECKPOINT_DB,
+    clear_thread,
+    open_checkpointer,
+    thread_config,
+    unfinished_run,
+)
+from utils.decisions import AutoDecisionPolicy
+from utils.instrumentation import run_trace
+from utils.ranking import DIRECTIONS, best_candidate, objective_direction
+from utils.scripted import init_headless_context
+
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "4"))
+PROMPT_FILES = ("prompt.txt", "prompt.md")
+
+
+def find_jobs(jobs_dir: str) -> list:
+    # Every subdirectory with a prompt file is a job
+    jobs = []
+    for name in sorted(os.listdir(jobs_dir)):
+        path = os.path.join(jobs_dir, name)
+        if os.path.isdir(path) and any(
+            os.path.exists(os.path.join(path, prompt)) for prompt in PROMPT_FILES
+        ):
+            jobs.append(path)
+    return jobs
+
+
+def load_job(job_dir: str, workspace: Workspace):
+    """
+    Read the prompt and input files of a job and copy the files into the workspace.
+
+    Returns:
+    - The prompt and file data in the same form main.py builds from uploaded files.
+    """
+    prompt = None
+    file_data = {}
+    for name in sorted(os.listdir(job_dir)):
+        path = os.path.join(job_dir, name)
+        if not os.path.isfile(path):
+            continue
+        if name in PROMPT_FILES:
+            with open(path, "r", encoding="utf-8") as f:
+                prompt = f.read().strip()
+            continue
+
+        if name.endswith((".xlsx", ".xls")):
+            file_data[name] = pd.read_excel(path, sheet_name=None)
+        elif name.endswith(".py"):
+            with open(path, "r", encoding="utf-8") as f:
+                file_data[name] = f.read()
+        else:
+            print(f"Skipping unknown file type: {name}")
+            continue
+        workspace.copy_file(path, name)
+
+    if not prompt:
+        raise ValueError(f"No prompt in {job_dir}")
+    return prompt, file_data
+
+
+def best_result_index(state) -> int:
+    # Chosen by the final report, ranked here if the run stopped before the report
+    results = state.get("results") or []
+    report = state.get("finalReport")
+    if report and 1 <= report.index_of_optimization <= len(results):
+        return report.index_of_optimization - 1
+    return best_candidate(results, objective_direction(state))
+
+
+def write_job_output(job_output: str, summary: dict, state):
+    os.makedirs(job_output, exist_ok=True)
+    if state is not None:
+        results = state.get("results") or []
+        summary["results"] = [result.model_dump() for result in results]
+        best = best_result_index(state)
+        if best is not None:
+            summary["best_index"] = best + 1
+            summary["best_objective_value"] = results[best].objective_value
+            if state.get("finalReport"):
+                summary["best_reason"] = state["finalReport"].reason
+            with open(os.path.join(job_output, "best.py"), "w", encoding="utf-8") as f:
+                f.write(results[best].code or "")
+
+    with open(os.path.join(job_output, "result.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+
+
+async def run_job(
+    job_dir: str,
+    output_dir: str,
+    policy,
+    recursion_limit=100,
+    job_timeout=None,
+    root=WORKSPACES_ROOT,
+    candidates=None,
+    run_app=app,
+    direction=None,
+) -> dict:
+    """
+    Run the whole workflow for one job and write result.json and best.py for it.
+    With a checkpointed run_app, an interrupted earlier run of the job is continued.
+    A failed job still writes the results of the rounds it finished.
+
+    Returns:
+    - Summary of the job: status, number of results, best objective value and timings.
+    """
+    name = os.path.basename(os.path.normpath(job_dir))
+    # Checkpoints are keyed by the job name, so a restarted batch finds its earlier runs
+    config = thread_config(f"batch-{name}", recursion_limit=recursion_limit)
+    snapshot = await unfinished_run(run_app, config)
+    if snapshot is not None:
+        workspace = snapshot.values["workspace"]
+    else:
+        workspace = Workspace(
+            session_id=f"batch-{name}-{uuid.uuid4().hex[:8]}", root=root
+        ).create()
+        if run_app.checkpointer is not None:
+            await clear_thread(run_app.checkpointer, f"batch-{name}")
+    # Each job runs in its own task, so the Chainlit context is per job
+    init_headless_context(workspace.session_id)
+
+    summary = {
+        "job": name,
+        "workspace": workspace.path,
+        "resumed": snapshot is not None,
+    }
+    state = None
+    # Latest state of the graph, its results are kept if the run fails
+    last_state = None
+    started = time.monotonic()
+
+    async def run_graph(state):
+        nonlocal last_state
+        async for values in run_app.astream(state, config=config, stream_mode="values"):
+            last_state = values
+        return last_state
+
+    with run_trace(workspace.session_id) as trace:
+        try:
+            if snapshot is None:
+                prompt, file_data = load_job(job_dir, workspace)
+                state = AgentState(
+                    userInput=prompt,
+                    messages=[prompt],
+                    iterations=0,
+                    promptFiles=format_prompt_files(file_data),
+                    workspace=workspace,
+                    policy=policy,
+                    candidatesPerRound=candidates,
+                    objectiveDirection=direction,
+                )
+            # None continues the interrupted run from its last checkpoint
+            state = await asyncio.wait_for(run_graph(state), job_timeout)
+            if state.get("proceed") == "cancel":
+                summary["status"] = "cancelled"
+            elif state.get("results"):
+                summary["status"] = "done"
+            else:
+                summary["status"] = "failed"
+                summary["error"] = "The workflow ended without results"
+        except asyncio.TimeoutError:
+            summary["status"] = "failed"
+            summary["error"] = f"Job timed out after {job_timeout} seconds"
+            state = last_state
+        except Exception as e:
+            # E.g. GraphRecursionError when --recursion-limit stops a fix loop
+            summary["status"] = "failed"
+            summary["error"] = f"{type(e).__name__}: {e}"
+            state = last_state
+
+    summary["seconds"] = round(time.monotonic() - started, 3)
+    summary["trace"] = trace.summary()["nodes"]
+    write_job_output(os.path.join(output_dir, name), summary, state)
+    return summary
+
+
+async def run_batch(
+    jobs_dir: str,
+    output_dir: str,
+    policy,
+    workers=BATCH_WORKERS,
+    recursion_limit=100,
+    job_timeout=None,
+    root=WORKSPACES_ROOT,
+    candidates=None,
+    checkpoint_db=None,
+    direction=None,
+) -> list:
+    """
+    Run all jobs of jobs_dir, at most `workers` at the same time.
+    With checkpoint_db the progress of every job is saved and unfinished jobs are resumed.
+    """
+    jobs = find_jobs(jobs_dir)
+    os.makedirs(output_dir, exist_ok=True)
+    run_app = app
+    if checkpoint_db:
+        run_app = workflow.compile(checkpointer=await open_checkpointer(checkpoint_db))
+    slots = asyncio.Semaphore(workers)
+
+    async def worker(job_dir):
+        async with slots:
+            print(f"*** BATCH: starting {job_dir} ***")
+            summary = await run_job(
+                job_dir,
+                output_dir,
+                policy,
+                recursion_limit,
+                job_timeout,
+                root,
+                candidates,
+                run_app,
+                direction,
+            )
+            print(f"*** BATCH: {summary['job']} {summary['status']} ***")
+            return summary
+
+    try:
+        summaries = await asyncio.gather(*(worker(job_dir) for job_dir in jobs))
+    finally:
+        # The connection thread would keep the process alive
+        if run_app.checkpointer is not None:
+            await run_app.checkpointer.conn.close()
+
+    overview = [
+        {
+            key: summary.get(key)
+            for key in (
+                "job",
+                "status",
+                "resumed",
+                "best_objective_value",
+                "seconds",
+                "error",
+            )
+        }
+        for summary in summaries
+    ]
+    with open(os.path.join(output_dir, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump(overview, f, indent=2, ensure_ascii=False)
+    return summaries
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run optimization jobs without the UI."
+    )
+    parser.add_argument("jobs_dir", help="Directory with one subdirectory per job")
+    parser.add_argument("--output", default="batch_results", help="Results directory")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS)
+    parser.add_argument(
+        "--workspaces", default=WORKSPACES_ROOT, help="Root of the job workspaces"
+    )
+    parser.add_argument(
+        "--rounds", type=int, default=3, help="Maximum optimization rounds per job"
+    )
+    parser.add_argument(
+        "--stop-when-goal-met",
+        action="store_true",
+        help="Stop optimizing as soon as a result achieves the goal",
+    )
+    parser.add_argument(
+        "--recursion-limit",
+        type=int,
+        default=100,
+        help="Maximum graph steps per job, stops endless fix loops",
+    )
+    parser.add_argument(
+        "--job-timeout", type=float, default=None, help="Seconds per job"
+    )
+    parser.add_argument(
+        "--candidates",
+        type=int,
+        default=None,
+        help="Candidate solutions per round (default CANDIDATES_PER_ROUND)",
+    )
+    parser.add_argument(
+        "--direction",
+        choices=DIRECTIONS,
+        default=None,
+        help="Whether a smaller or larger objective value is better for every job "
+        "(default: read from each job's goal)",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        action="store_true",
+        help="Save the progress of every job and resume jobs a previous batch did not finish",
+    )
+    parser.add_argument(
+        "--checkpoint-db", default=CHECKPOINT_DB, help="SQLite file for the checkpoints"
+    )
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    asyncio.run(
+        run_batch(
+            args.jobs_dir,
+            args.output,
+            AutoDecisionPolicy(
+                max_rounds=args.rounds, stop_when_goal_met=args.stop_when_goal_met
+            ),
+            workers=args.workers,
+            recursion_limit=args.recursion_limit,
+            job_timeout=args.job_timeout,
+            root=args.workspaces,
+            candidates=args.candidates,
+            checkpoint_db=args.checkpoint_db if args.checkpoint else None,
+            direction=args.direction,
+        )
+    )
@@ -12,11 +12,21 @@ from langgraph.graph import StateGraph, END
     final_report_agent,
 ) """
 from agents import all_agents
+from agents.common import ask_action
 from schemas import AgentState
+from utils import Workspace, WORKSPACES_ROOT
+from utils.data_summary import summarize_sheet
+from utils.checkpoints import (
+    clear_thread,
+    open_checkpointer,
+    thread_config,
+    unfinished_run,
+)
+from utils.decisions import RESUME_DECISION
+from utils.instrumentation import instrumented, run_trace
 
-# Ensure the 'generated' directory exists
-generated_dir = "generated"
-os.makedirs(generated_dir, exist_ok=True)
+# Ensure the root directory for session workspaces exists
+os.makedirs(WORKSPACES_ROOT, exist_ok=True)
 
 
 # Starting message
@@ -31,19 +41,28 @@ async def on_chat_start():
 def decide_next_step(state: AgentState):
     return state[
         "proceed"
-    ]  # This should return either 'continue', 'new', 'done', 'fix' or 'cancel'
+    ]  # This should return either 'continue', 'new', 'done', 'fix', 'timeout', 'run' or 'cancel'
 
 
 # Create the graph.
 workflow = StateGraph(AgentState)
-workflow.add_node("problem_analyzer", all_agents["problem_analyzer_agent"])
-workflow.add_node("code_generator", all_agents["code_generator_agent"])
-workflow.add_node("docker_files", all_agents["docker_environment_files_agent"])
-workflow.add_node("start_docker", all_agents["start_docker_container_agent"])
-workflow.add_node("output_analyzer", all_agents["code_output_analyzer_agent"])
-workflow.add_node("new_loop", all_agents["new_loop_agent"])
-workflow.add_node("final_report", all_agents["final_report_agent"])
-workflow.add_node("code_fixer", all_agents["code_fixer_agent"])
+
+
+def add_node(name: str, agent: str):
+    # Every node is timed into the trace of the current run, see utils/instrumentation.py
+    workflow.add_node(name, instrumented(name, all_agents[agent]))
+
+
+add_node("problem_analyzer", "problem_analyzer_agent")
+add_node("code_generator", "code_generator_agent")
+add_node("docker_files", "docker_environment_files_agent")
+add_node("start_docker", "start_docker_container_agent")
+add_node("output_analyzer", "code_output_analyzer_agent")
+add_node("new_loop", "new_loop_agent")
+add_node("final_report", "final_report_agent")
+add_node("code_fixer", "code_fixer_agent")
+add_node("preflight", "preflight_agent")
+add_node("candidate_evaluator", "candidates_agent")
 # Use add_conditional_edges for cleaner transitions based on the proceed value
 workflow.add_conditional_edges(
     source="problem_analyzer",
@@ -54,7 +73,26 @@ workflow.add_conditional_edges(
         "cancel": END,  # End the workflow
     },
 )
-workflow.add_edge("code_generator", "docker_files")
+workflow.add_edge("code_generator", "candidate_evaluator")
+# Several candidates are evaluated in parallel, a single one goes through the normal path
+workflow.add_conditional_edges(
+    source="candidate_evaluator",
+    path=decide_next_step,  # The function that determines the next step
+    path_map={
+        "run": "preflight",  # Check and run the code normally
+        "continue": "new_loop",  # Best candidate chosen, start new optimization round
+        "done": "final_report",  # Best candidate chosen, write final report
+    },
+)
+# Cheap local checks before the Docker build, problems go straight to code_fixer
+workflow.add_conditional_edges(
+    source="preflight",
+    path=decide_next_step,  # The function that determines the next step
+    path_map={
+        "fix": "code_fixer",  # Fix the code
+        "continue": "docker_files",  # Proceed to the next node
+    },
+)
 workflow.add_edge("docker_files", "start_docker")
 # if error occurs during code execution in the Docker container, use code_fixer_agent
 workflow.add_conditional_edges(
@@ -62,10 +100,13 @@ workflow.add_conditional_edges(
     path=decide_next_step,  # The function that determines the next step
     path_map={
         "fix": "code_fixer",  # Fix the code
+        "timeout": "code_fixer",  # Too slow, ask the fixer for a faster approach
         "continue": "output_analyzer",  # Proceed to the next node
     },
 )
-workflow.add_edge("code_fixer", "start_docker")  # Try to execute the fixed code again
+workflow.add_edge(
+    "code_fixer", "preflight"
+)  # Check the fixed code again, docker_files is refreshed if requirements changed
 # workflow.add_edge("start_docker", "output_analyzer")
 workflow.add_conditional_edges(
     source="output_analyzer",
@@ -76,18 +117,83 @@ workflow.add_conditional_edges(
     },
 )
 workflow.add_edge(
-    "new_loop", "docker_files"
-)  # Loop back to docker_files for a new optimization round
+    "new_loop", "candidate_evaluator"
+)  # Loop back to candidates, preflight and docker_files for a new optimization round
 workflow.add_edge("final_report", END)  # After final report, end the workflow
 workflow.set_entry_point("problem_analyzer")
-app = workflow.compile()
+app = workflow.compile()  # Without checkpoints, used by batch runs and benchmarks
+checkpointed_app = None  # Compiled on the first message, see get_checkpointed_app
+
+
+async def get_checkpointed_app():
+    # The SQLite connection belongs to the running event loop, so it can't be opened at import
+    global checkpointed_app
+    if checkpointed_app is None:
+        checkpointer = await open_checkpointer()
+        checkpointed_app = workflow.compile(checkpointer=checkpointer)
+    return checkpointed_app
+
+
+async def resume_interrupted_run(run_app, config: dict) -> bool:
+    """Offer to continue the interrupted run of the thread, returns True if it was resumed."""
+    snapshot = await unfinished_run(run_app, config)
+    if snapshot is None:
+        return False
+
+    value = await ask_action(
+        {},
+        RESUME_DECISION,
+        f"The previous run of this chat was interrupted before {', '.join(snapshot.next)}. "
+        "Continue it from the last completed step?",
+        [
+            cl.Action(name="resume", value="resume", label="✅ Continue the run"),
+            cl.Action(name="new", value="new", label="🆕 Start a new run"),
+        ],
+    )
+    if value != "resume":
+        return False
+
+    # None as input continues from the last checkpoint of the thread
+    thread_id = config["configurable"]["thread_id"]
+    with run_trace(thread_id):
+        await run_app.ainvoke(None, config)
+    return True
+
+
+def format_prompt_files(file_data: dict) -> str:
+    # Excel files are dicts of sheets, Python files are their source code
+    prompt_files = []
+    for filename, content in file_data.items():
+        if isinstance(content, dict):
+            # It's an Excel file with sheets
+            for sheet_name, df in content.items():
+                # Large sheets are summarized, the code reads the full file in the container
+                prompt_files.append(summarize_sheet(filename, sheet_name, df))
+        else:
+            # It's code (e.g., Python code)
+            # Wrap the code in triple backticks to preserve formatting
+            prompt_files.append(f"File: {filename}\nCode:\n```python\n{content}\n```")
+
+    return "\n\n".join(prompt_files)
 
 
 @cl.on_message
 async def main(message: cl.Message):
+    # The state is saved after every node, an interrupted run of the thread can be continued
+    thread_id = cl.context.session.thread_id
+    run_app = await get_checkpointed_app()
+    config = thread_config(thread_id)
+    if await resume_interrupted_run(run_app, config):
+        return
+    if run_app.checkpointer is not None:
+        await clear_thread(run_app.checkpointer, thread_id)
+
     # Initialize a dictionary to store file data
     file_data = {}
 
+    # Every chat thread gets its own directory, so parallel sessions don't overwrite each other
+    workspace = Workspace(session_id=thread_id).create()
+
     # Check if there are any elements in the message
     # Check if there are any elements in the message
     if message.elements:
@@ -97,9 +203,6 @@ async def main(message: cl.Message):
                 file_name = element.name  # Original filename
                 file_path = element.path  # Path to stored file
 
-                # Define the new file path in the generated directory
-                new_file_path = os.path.join(generated_dir, file_name)
-
                 # Check file extension first to decide handling
                 if file_name.endswith((".xlsx", ".xls")):
                     # Process Excel file as binary
@@ -133,35 +236,19 @@ async def main(message: cl.Message):
                         content=f"Tuntematon tiedostotyyppi: {file_name}"
                     ).send()
 
-                # Now save the file to the 'generated' directory after processing
+                # Now save the file to the session workspace after processing
                 try:
-                    with open(file_path, "rb") as f_in, open(
-                        new_file_path, "wb"
-                    ) as f_out:
-                        f_out.write(f_in.read())
-                    print(f"Tiedosto {file_name} tallennettu /generated-hakemistoon.")
+                    saved_name = workspace.copy_file(file_path, file_name)
+                    print(
+                        f"Tiedosto {saved_name} tallennettu hakemistoon {workspace.path}."
+                    )
                 except Exception as e:
                     await cl.Message(
                         content=f"Virhe tiedoston {file_name} tallentamisessa: {str(e)}"
                     ).send()
 
     # Construct promptFiles
-    prompt_files = []
-    for filename, content in file_data.items():
-        if isinstance(content, dict):
-            # It's an Excel file with sheets
-            for sheet_name, df in content.items():
-                # Convert DataFrame to JSON string
-                json_string = df.to_json(orient="records", force_ascii=False, indent=2)
-                prompt_files.append(
-                    f"File: {filename}, Sheet: {sheet_name}\nData:\n{json_string}"
-                )
-        else:
-            # It's code (e.g., Python code)
-            # Wrap the code in triple backticks to preserve formatting
-            prompt_files.append(f"File: {filename}\nCode:\n```python\n{content}\n```")
-
-    formatted_data = "\n\n".join(prompt_files)
+    formatted_data = format_prompt_files(file_data)
 
     # Create the AgentState
     state = AgentState(
@@ -169,7 +256,9 @@ async def main(message: cl.Message):
         messages=[message.content],
         iterations=0,
         promptFiles=formatted_data,
+        workspace=workspace,
     )
 
-    # Invoke the agent with the state
-    await app.ainvoke(state)
+    # Invoke the agent with the state, timings and token usage are collected per run
+    with run_trace(thread_id):
+        await run_app.ainvoke(state, config)
@@ -6,7 +6,7 @@ TASK_ANALYSIS_PROMPT = ChatPromptTemplate.from_template(
 
     First, identify the core purpose of the task and what the user ultimately wants to achieve. Summarize the user's real objective in your own words, based on the task description and any available data (Python code, Excel files, or no data at all). If no data is provided, think about what might be missing to solve the task.
 
-    Once the goal is clear, consider how the provided data can be used to optimize the solution, focusing on improving how well the problem is solved. Do not prioritize runtime or performance metrics, but instead aim to enhance the quality and effectiveness of the solution.
+    Once the goal is clear, consider how the provided data can be used to optimize the solution, focusing on improving how well the problem is solved. Aim to enhance the quality and effectiveness of the solution. Runtime and memory use are measured when the code runs and handled in later optimization rounds, so leave them out of the optimization focus.
 
     User task description:
     {user_input}
@@ -86,6 +86,7 @@ CODE_PROMPT = ChatPromptTemplate.from_template(
     Choose the approach that best fits the user's needs: version-free for flexibility or version-pinned for stability and reproducibility.
 
     - **Make sure the code outputs the final result clearly (e.g., using print statements or by returning the result in a structured format like a table or numerical answer).**
+    - **Also write the result as a JSON object to the file `result.json` in the working directory, with the keys `objective_value` (number or null), `status` (solver status, e.g. "Optimal", "Feasible" or "Infeasible"), `solution` (the solution itself, e.g. the cutting patterns) and `solver_stats` (e.g. solve time, iterations). Write it at the end of the program, also when no solution was found.**
     """
 )
 
@@ -147,6 +148,7 @@ CODE_PROMPT_NO_DATA = ChatPromptTemplate.from_template(
     ```
 
     - **Make sure the code outputs the final result clearly (e.g., using print statements or by returning the result in a structured format like a table or numerical answer).**
+    - **Also write the result as a JSON object to the file `result.json` in the working directory, with the keys `objective_value` (number or null), `status` (solver status, e.g. "Optimal", "Feasible" or "Infeasible"), `solution` (the solution itself, e.g. the cutting patterns) and `solver_stats` (e.g. solve time, iterations). Write it at the end of the program, also when no solution was found.**
     """
 )
 
@@ -159,14 +161,13 @@ DOCKER_FILES_PROMPT = ChatPromptTemplate.from_template(
 
     Then, create a compose.yaml file that sets up the Docker container for the Python code. The compose.yaml should define the services and configurations needed to build and run the code.
 
-    The generated Python code will always be saved as **generated.py**, so your Dockerfile and compose.yaml should be set up accordingly.
+    The generated Python code will always be saved as **generated.py**, so your Dockerfile and compose.yaml should be set up accordingly. Do not set a fixed `container_name`, several sessions may run their containers at the same time.
 
     For example:
     ```yaml
     services:
       app:
         build: .
-        container_name: my-python-app
         command: python /app/generated.py  # Modify the command as per your project
     ```
 
@@ -255,6 +256,9 @@ NEW_LOOP_CODE_PROMPT = ChatPromptTemplate.from_template(
 
     **Results from prior optimizations:**
     {previous_results}
+
+    **Measured performance of the last used code:**
+    {performance}
     
     **Last used code:**
     {previous_code}
@@ -296,6 +300,7 @@ NEW_LOOP_CODE_PROMPT = ChatPromptTemplate.from_template(
     - Define parameters for testing, based on user input, the provided files, and the results of previous optimizations, to validate the new solution.
     - What packages or libraries are required for requirements.txt to run the generated Python code, including any necessary for file handling (e.g., pandas, openpyxl) if provided data includes Excel or other files? Ensure to handle potential encoding issues in file reading to avoid errors.
     - **Make sure the code outputs the final result clearly (e.g., using print statements or by returning the result in a structured format like a table or numerical answer), with improvements from the previous iteration and no duplication.**
+    - **Also write the result as a JSON object to the file `result.json` in the working directory, with the keys `objective_value` (number or null), `status` (solver status, e.g. "Optimal", "Feasible" or "Infeasible"), `solution` (the solution itself, e.g. the cutting patterns) and `solver_stats` (e.g. solve time, iterations). Write it at the end of the program, also when no solution was found.**
     - Ensure the generated Python code is **free from syntax errors**. All functions should be properly defined, and indentation should follow Python's strict indentation rules. Ensure all variables, function definitions, and imports are correctly structured.
     """
 )
@@ -328,6 +333,9 @@ NEW_LOOP_CODE_PROMPT_NO_DATA = ChatPromptTemplate.from_template(
 
     **Results from prior optimizations:**
     {previous_results}
+
+    **Measured performance of the last used code:**
+    {performance}
     
     **Last used code:**
     {previous_code}
@@ -367,6 +375,7 @@ NEW_LOOP_CODE_PROMPT_NO_DATA = ChatPromptTemplate.from_template(
     - Define parameters for testing, based on user input and the results of previous optimizations, to validate the new solution.
     - What packages or libraries are required for requirements.txt to run the generated Python code?
     - **Make sure the code outputs the final result clearly (e.g., using print statements or by returning the result in a structured format like a table or numerical answer), with improvements from the previous iteration and no duplication.**
+    - **Also write the result as a JSON object to the file `result.json` in the working directory, with the keys `objective_value` (number or null), `status` (solver status, e.g. "Optimal", "Feasible" or "Infeasible"), `solution` (the solution itself, e.g. the cutting patterns) and `solver_stats` (e.g. solve time, iterations). Write it at the end of the program, also when no solution was found.**
     - Ensure the generated Python code is **free from syntax errors**. All functions should be properly defined, and indentation should follow Python's strict indentation rules. Ensure all variables, function definitions, and imports are correctly structured.
     """
 )
@@ -418,3 +427,36 @@ CODE_FIXER_PROMPT = ChatPromptTemplate.from_template(
     Provide a corrected version of the code along with any necessary version adjustments for packages that should execute successfully in the Docker container.
     """
 )
+
+CODE_PATCH_PROMPT = ChatPromptTemplate.from_template(
+    """
+    You are a highly skilled programmer with years of experience in debugging and fixing code. Your main task is to focus on resolving the specific error provided in the container logs.
+    
+    The following code failed to execute in a Docker container. Review the error details in the logs, which point to a specific part of the code that needs fixing.
+
+    **Container Logs (error details, make sure that this will be fixed)**:
+    {docker_output}
+    
+    **Original Code**:
+    {code}
+    
+    **Original Requirements**:
+    {requirements}
+    
+    **Original Resources (keep same if these are provided)**:
+    {resources}
+
+    Task:
+    - Identify the specific error based on the Docker container logs.
+    - If the error message indicates potential compatibility issues among the packages, check and suggest compatible versions, making adjustments as needed.
+    - Make only the minimal necessary code adjustments to resolve the issue.
+    - Maintain the same package/library versions if possible, unless compatibility issues require specific version changes.
+    - Do not alter external resources (e.g., Excel files) or change their access paths.
+
+    Do not return the whole program. Return the fix as search/replace edits:
+    - The search text is copied exactly from the original code, including indentation, and appears only once in it.
+    - Keep each search text short, only the lines that change and enough surrounding lines to make it unique.
+    - The replace text is what those lines become.
+    - Return requirements only when they change, then the complete adjusted list.
+    """
+)
@@ -1,6 +1,7 @@
 from enum import Enum
-from typing import List, TypedDict, Optional
-from pydantic import BaseModel, Field, Extra, validator
+from typing import Any, Dict, List, TypedDict, Optional
+from pydantic import BaseModel, Field, Extra, field_validator, validator
+from utils.workspace import Workspace
 
 
 # Define an Enum for the proceed field
@@ -10,6 +11,21 @@ class ProceedOption(str, Enum):
     NEW = "new"
     DONE = "done"
     FIX = "fix"
+    TIMEOUT = "timeout"
+    RUN = "run"
+
+
+# Wordings of Purpose.objective_direction the LLM may use
+OBJECTIVE_DIRECTION_ALIASES = {
+    "minimize": "minimize",
+    "minimise": "minimize",
+    "minimum": "minimize",
+    "min": "minimize",
+    "maximize": "maximize",
+    "maximise": "maximize",
+    "maximum": "maximize",
+    "max": "maximize",
+}
 
 
 # Schema for whole code project
@@ -21,7 +37,7 @@ class Purpose(BaseModel):
         description="The type of problem that is being solved, e.g., logistics optimization, resource allocation, etc."
     )
     optimization_focus: str = Field(
-        description="A description of how the solution should be optimized, focusing on improving how effectively the problem is solved. The emphasis is on achieving better alignment with the problem's core objectives, enhancing solution quality, and refining the approach to meet the user's goals without prioritizing performance metrics such as runtime."
+        description="A description of how the solution should be optimized, focusing on improving how effectively the problem is solved. The emphasis is on achieving better alignment with the problem's core objectives, enhancing solution quality, and refining the approach to meet the user's goals. Runtime and memory use are measured by the workflow and targeted separately when needed, leave them out of this description."
     )
     chatbot_response: str = Field(
         description="The chatbot's response to the user, explaining what is the problem, what will be done to solve the problem and why this approach is being taken."
@@ -32,6 +48,18 @@ class Purpose(BaseModel):
     resource_requirements: str = Field(
         description="Specific requirements or allocations for the resource, such as how much is required for each task, order, or destination. This should include all the important details needed to solve the problem effectively."
     )
+    objective_direction: Optional[str] = Field(
+        default=None,
+        description="Whether a smaller or a larger objective value is better for the user's goal: 'minimize' (e.g. cost, waste, time) or 'maximize' (e.g. profit, utilization).",
+    )
+
+    @field_validator("objective_direction", mode="before")
+    @classmethod
+    def normalize_objective_direction(cls, value):
+        # Only a hint, other wordings fall back to OBJECTIVE_DIRECTION instead of failing the parse
+        if not isinstance(value, str):
+            return None
+        return OBJECTIVE_DIRECTION_ALIASES.get(value.strip().lower())
 
 
 class Code(BaseModel):
@@ -68,6 +96,35 @@ class CodeFix(BaseModel):
     )
 
 
+class CodeEdit(BaseModel):
+    search: str = Field(
+        description="Exact lines of the current code to replace, copied character for character including indentation. Must appear exactly once in the code, include surrounding lines if needed to make it unique."
+    )
+    replace: str = Field(
+        description="The lines that replace the searched lines, with the same indentation."
+    )
+
+
+class CodePatch(BaseModel):
+    edits: List[CodeEdit] = Field(
+        description="Search/replace edits that fix the code, applied in order. Only the changed parts of the code, never the whole program."
+    )
+    requirements: Optional[str] = Field(
+        default=None,
+        description="The full adjusted list of requirements, only when requirements were changed to resolve the issue.",
+    )
+    requirements_changed: bool = Field(
+        default=False,
+        description="Indicates if requirements were changed to resolve the issue.",
+    )
+    fix_description: str = Field(
+        description="Description of what was fixed, providing context for the changes made to the code."
+    )
+    original_error: str = Field(
+        description="Summary of docker logs (provided error) what needed to be fixed and why."
+    )
+
+
 class DockerFiles(BaseModel):
     dockerfile: str = Field(
         description="The Dockerfile that defines the Docker environment for running the generated Python code."
@@ -77,6 +134,22 @@ class DockerFiles(BaseModel):
     )
 
 
+class PerformanceMetrics(BaseModel):
+    runtime_seconds: Optional[float] = Field(
+        default=None, description="Wall-clock runtime of the program in seconds."
+    )
+    cpu_time_seconds: Optional[float] = Field(
+        default=None, description="CPU time used by the program in seconds."
+    )
+    peak_memory_mb: Optional[float] = Field(
+        default=None, description="Peak memory use of the program in megabytes."
+    )
+    solver_status: Optional[str] = Field(
+        default=None,
+        description="Status reported by the solver, e.g. Optimal, Feasible or Infeasible.",
+    )
+
+
 class OutputOfCode(BaseModel):
     answer: str = Field(
         description="The numerical answer, detailing the quantities or results of the calculation (e.g., how much material to cut)."
@@ -101,6 +174,49 @@ class OutputOfCode(BaseModel):
         default=None,  # Empty value by default
         description="Earlier generated python code, this will be added later.",
     )
+    metrics: Optional[PerformanceMetrics] = Field(
+        default=None,  # Measured by the system, not by the LLM
+        description="Runtime and memory measurements, this will be added later.",
+    )
+
+
+# Written by the generated program to result.json, read by the system (utils/result_file.py)
+class ProgramResult(BaseModel):
+    objective_value: Optional[float] = Field(
+        default=None, description="Objective value of the best solution found."
+    )
+    status: Optional[str] = Field(
+        default=None,
+        description="Solver status, e.g. Optimal, Feasible, Infeasible or Not Solved.",
+    )
+    solution: Any = Field(
+        default=None, description="The solution itself, e.g. the cutting patterns."
+    )
+    solver_stats: Dict[str, Any] = Field(
+        default_factory=dict,
+        description="Solver statistics, e.g. solve time, iterations or gap.",
+    )
+
+
+class ExecutionStats(BaseModel):
+    wall_time: float = Field(
+        description="Wall-clock time of running the generated code in seconds, without the image build."
+    )
+    cpu_time: Optional[float] = Field(
+        default=None,
+        description="User and system CPU time used by the generated code in seconds.",
+    )
+    peak_memory_mb: Optional[float] = Field(
+        default=None,
+        description="Peak resident memory (RSS) of the generated code in megabytes.",
+    )
+    exit_code: Optional[int] = Field(
+        default=None, description="Exit code of the generated code."
+    )
+    timed_out: bool = Field(
+        default=False,
+        description="Whether the run was stopped because it hit the wall-clock timeout.",
+    )
 
 
 class FinalReport(BaseModel):
@@ -112,13 +228,24 @@ class FinalReport(BaseModel):
 
 class AgentState(TypedDict):
     userInput: str  # Original user input
-    iterations: int  # Number of iterations (Not used yet)
+    iterations: int  # Number of finished optimization rounds
     promptFiles: List[str]  # Given files whats been uploaded
     messages: List[str]
     purpose: Purpose  # What user want to achieve
     proceed: ProceedOption  # Enum
     code: Code  # Python code and requirements
+    candidates: List[Code]  # All solutions generated for the current round
+    candidatesPerRound: int  # How many solutions to generate per round (default CANDIDATES_PER_ROUND)
     dockerFiles: DockerFiles  # DockerFile and compose.yaml
+    dockerFilesSignature: str  # Hash of requirements and resources the Docker files were made for
     docker_output: str  # What running code in docker container outputs
+    preflightFixes: int  # Fixes asked by the pre-flight check in a row, see PREFLIGHT_MAX_FIXES
+    program_result: ProgramResult  # Validated result.json of the last run, None if not written
+    execution_stats: ExecutionStats  # Run time, CPU time and peak memory of the last execution
+    profile_report: str  # Hot spots of the last execution when profiling mode is enabled
     result: OutputOfCode  # Results of the code execution - answer, explanation, etc.
     results: List[OutputOfCode]
+    finalReport: FinalReport  # Which result was chosen as the best and why
+    workspace: Workspace  # Session specific directory for generated files
+    objectiveDirection: str  # "minimize" or "maximize", overrides purpose.objective_direction
+    policy: Any  # Answers the action buttons in headless runs (utils/decisions.py)
@@ -0,0 +1,42 @@
+# pytest -s tests/agents/test_docker_execution_agent.py
+import pytest
+
+from agents.docker_execution_agent import start_docker_container_agent
+from schemas import AgentState
+from utils import Workspace
+from utils.executors import set_executor
+from utils.limits import EXECUTION_MEMORY, STATS_MARKER
+from utils.scripted import ScriptedExecutor, init_scripted_context
+
+## THIS PURPOSE IS TO CHECK HOW THE OUTCOME OF A RUN IS PASSED ON TO THE FIXER
+## THE RUN IS REPLAYED BY THE SCRIPTED EXECUTOR, NO OPENAI KEY OR DOCKER NEEDED
+
+
+async def run_agent(tmp_path, run):
+    init_scripted_context([])
+    workspace = Workspace(session_id="session", root=str(tmp_path)).create()
+    workspace.write_file("generated.py", "data = bytearray(10**12)\n")
+    previous_executor = set_executor(ScriptedExecutor([run]))
+    try:
+        return await start_docker_container_agent(
+            AgentState(workspace=workspace, messages=[])
+        )
+    finally:
+        set_executor(previous_executor)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "run",
+    [
+        # Runner inside a container, the stats line reports the normalized exit code
+        (f'{STATS_MARKER}{{"cpu_time": 1.0, "exit_code": 137}}\n', 137),
+        # Local process without the stats line, killed by SIGKILL
+        ("", -9),
+    ],
+)
+async def test_killed_run_points_at_the_memory_limit(run, tmp_path):
+    state = await run_agent(tmp_path, run)
+
+    assert state["proceed"] == "fix"
+    assert f"exceeded the memory limit of {EXECUTION_MEMORY}" in state["docker_output"]
@@ -0,0 +1,116 @@
+# pytest -s tests/benchmarks/test_workflow_benchmark.py
+import json
+import os
+
+import pytest
+
+from tests.benchmarks.workflow import (
+    candidates_scenario,
+    fix_loop_scenario,
+    format_report,
+    optimization_scenario,
+    preflight_cap_scenario,
+    result_file_scenario,
+    run_scenario,
+    unranked_scenario,
+)
+
+## THIS PURPOSE IS TO MEASURE THE ORCHESTRATION OVERHEAD OF THE WHOLE WORKFLOW OFFLINE
+## NO OPENAI KEY OR DOCKER NEEDED, SET BENCHMARK_REPORT=path.json TO SAVE THE NUMBERS FOR CI
+
+# Generous upper bound, the scripted runs take milliseconds, this only catches big regressions
+MAX_SECONDS_PER_RUN = float(os.getenv("BENCHMARK_MAX_SECONDS", "10"))
+
+reports = []
+
+
+@pytest.fixture(scope="module", autouse=True)
+def save_reports():
+    yield
+    path = os.getenv("BENCHMARK_REPORT")
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(reports, f, indent=2)
+
+
+async def benchmark(scenario, tmp_path):
+    report = await run_scenario(scenario, str(tmp_path))
+    reports.append(report)
+    print(format_report(report))
+    assert report["total_seconds"] < MAX_SECONDS_PER_RUN
+    assert (
+        report["unused_responses"] == 0
+    ), "Workflow made fewer LLM calls than scripted"
+    return report
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("rounds", [1, 3, 5])
+async def test_optimization_rounds(rounds, tmp_path):
+    report = await benchmark(optimization_scenario(rounds), tmp_path)
+
+    assert report["executions"] == rounds
+    assert report["results"] == rounds
+    assert report["nodes"].get("new_loop", {"calls": 0})["calls"] == rounds - 1
+    assert report["nodes"]["final_report"]["calls"] == 1
+    # Problem analysis, code generation, new rounds and output analyses, none for the report
+    assert report["llm_calls"] == 2 * rounds + 1
+    assert "llm_structured" in report["trace"]["code_generator"]["phases"]
+    assert "llm_first_token" in report["trace"]["output_analyzer"]["phases"]
+    assert report["trace"]["output_analyzer"]["phases"]["ui_wait"]["count"] == rounds
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("patch_fails", [False, True])
+async def test_fix_loop(patch_fails, tmp_path):
+    report = await benchmark(fix_loop_scenario(patch_fails), tmp_path)
+
+    assert report["nodes"]["preflight"]["calls"] == 3
+    assert report["nodes"]["code_fixer"]["calls"] == 2
+    assert report["trace"]["code_fixer"]["retries"] == 1
+    assert report["trace"]["start_docker"]["phases"]["run"]["count"] == 2
+    assert report["executions"] == 2
+    assert report["results"] == 1
+    # One more fixer call when the patch didn't apply
+    assert report["llm_calls"] == (6 if patch_fails else 5)
+
+
+@pytest.mark.asyncio
+async def test_preflight_fixes_are_capped(tmp_path):
+    report = await benchmark(preflight_cap_scenario(), tmp_path)
+
+    assert report["nodes"]["preflight"]["calls"] == 3
+    assert report["nodes"]["code_fixer"]["calls"] == 2
+    assert report["executions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_candidates_per_round(tmp_path):
+    report = await benchmark(candidates_scenario(3), tmp_path)
+
+    assert report["executions"] == 3
+    assert report["results"] == 3
+    assert sorted(report["objective_values"]) == [900, 1000, 1100]
+    assert report["best_objective_value"] == 900
+    assert report["nodes"]["candidate_evaluator"]["calls"] == 1
+    # Candidates are run by the candidates agent, not by the normal path
+    assert "preflight" not in report["nodes"]
+    assert report["trace"]["code_generator"]["phases"]["llm_structured"]["count"] == 3
+
+
+@pytest.mark.asyncio
+async def test_final_report_asks_llm_without_objective_values(tmp_path):
+    report = await benchmark(unranked_scenario(), tmp_path)
+
+    assert report["results"] == 2
+    assert "llm_first_token" in report["trace"]["final_report"]["phases"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("llm_analysis", [True, False])
+async def test_result_file(llm_analysis, tmp_path, monkeypatch):
+    monkeypatch.setattr("agents.code_output_agent.RESULT_LLM_ANALYSIS", llm_analysis)
+    report = await benchmark(result_file_scenario(llm_analysis), tmp_path)
+
+    assert report["objective_values"] == [1150]
+    assert report["llm_calls"] == (3 if llm_analysis else 2)
@@ -0,0 +1,299 @@
+# Offline benchmark harness for the LangGraph workflow in main.py
+# The scripted LLM, executor and Chainlit emitter from utils/scripted.py replace OpenAI,
+# Docker and the browser, so a full run only measures the orchestration itself.
+import time
+import tracemalloc
+import uuid
+from collections import defaultdict
+
+from langchain_core.callbacks import AsyncCallbackHandler
+
+from agents.common import set_models
+from schemas import (
+    AgentState,
+    Code,
+    CodeEdit,
+    CodeFix,
+    CodePatch,
+    FinalReport,
+    OutputOfCode,
+    Purpose,
+)
+from utils import Workspace
+from utils.executors import set_executor
+from utils.instrumentation import run_trace
+from utils.scripted import ScriptedChatModel, ScriptedExecutor, init_scripted_context
+
+PURPOSE = Purpose(
+    user_summary="Cut the ordered pieces from the available materials with minimal waste.",
+    problem_type="Cutting Stock Problem",
+    optimization_focus="Minimize the total waste of material.",
+    chatbot_response="I will model this as a cutting stock problem and solve it.",
+    goal="Fulfill all orders while minimizing waste.",
+    resource_requirements="Materials of 6000 mm and 8000 mm, orders of 2000-4000 mm.",
+)
+
+WORKING_CODE = 'waste = 1200\nprint(f"Status: Optimal\\nTotal waste: {waste}")\n'
+BROKEN_CODE = "waste = 1200\nprint(totl_waste)\n"
+RUNTIME_ERROR_CODE = 'orders = {}\nprint(orders["Order 1"])\n'
+
+RUN_OUTPUT = "Status: Optimal\nTotal waste: 1200\n"
+RUN_TRACEBACK = (
+    "Traceback (most recent call last):\n"
+    '  File "/app/generated.py", line 2, in <module>\n'
+    '    print(orders["Order 1"])\n'
+    "KeyError: 'Order 1'\n"
+)
+
+
+def output_of_code(objective_value: float) -> OutputOfCode:
+    return OutputOfCode(
+        answer=f"Total waste {objective_value} mm",
+        answer_description="All orders are cut from the available materials.",
+        improvement="Try a column generation approach.",
+        objective_value=objective_value,
+        explanation="The solver minimized waste over all cutting patterns.",
+        is_goal_achieved="True, all orders are fulfilled.",
+    )
+
+
+def code_fix(code: str) -> CodeFix:
+    return CodeFix(
+        fixed_python_code=code,
+        requirements="pulp",
+        requirements_changed=False,
+        fix_description="Fixed the failing line.",
+        original_error="The program failed.",
+    )
+
+
+def code_patch(search: str, replace: str) -> CodePatch:
+    return CodePatch(
+        edits=[CodeEdit(search=search, replace=replace)],
+        requirements="pulp",
+        requirements_changed=False,
+        fix_description="Fixed the failing line.",
+        original_error="The program failed.",
+    )
+
+
+class Scenario:
+    """Canned LLM responses, program runs and button clicks for one full workflow run."""
+
+    def __init__(self, name, responses, runs, answers, candidates=1):
+        self.name = name
+        self.responses = responses
+        self.runs = runs
+        self.answers = answers
+        self.candidates = candidates
+
+
+def optimization_scenario(rounds: int = 1) -> Scenario:
+    # Generate, run and analyze, then `rounds - 1` optimization rounds and the final report
+    responses = [PURPOSE, Code(python_code=WORKING_CODE, requirements="pulp")]
+    runs = [(RUN_OUTPUT, 0)]
+    answers = ["continue"]
+    for round_number in range(1, rounds):
+        responses += [
+            output_of_code(1200 - round_number),
+            Code(python_code=WORKING_CODE, requirements="pulp"),
+        ]
+        runs.append((RUN_OUTPUT, 0))
+        answers.append("continue")
+    # The final report ranks the objective values without the LLM
+    responses.append(output_of_code(1200 - rounds))
+    answers.append("done")
+    return Scenario(f"optimization_{rounds}_rounds", responses, runs, answers)
+
+
+def fix_loop_scenario(patch_fails: bool = False) -> Scenario:
+    # Pre-flight catches an undefined name, then the program fails at runtime once
+    # The fixer returns search/replace edits. With patch_fails the first patch doesn't
+    # apply and the fixer asks for the whole code instead.
+    responses = [
+        PURPOSE,
+        Code(python_code=BROKEN_CODE, requirements="pulp"),
+        code_patch(BROKEN_CODE, RUNTIME_ERROR_CODE),
+        code_patch('print(orders["Order 1"])\n', WORKING_CODE),
+        output_of_code(1200),
+    ]
+    if patch_fails:
+        responses[2:3] = [
+            code_patch("print(total_waste)\n", "print(waste)\n"),
+            code_fix(RUNTIME_ERROR_CODE),
+        ]
+    runs = [(RUN_TRACEBACK, 1), (RUN_OUTPUT, 0)]
+    name = "fix_loop_patch_fallback" if patch_fails else "fix_loop"
+    return Scenario(name, responses, runs, ["continue", "done"])
+
+
+def preflight_cap_scenario() -> Scenario:
+    # The fixer can't satisfy the pre-flight check, after PREFLIGHT_MAX_FIXES the code runs
+    responses = [
+        PURPOSE,
+        Code(python_code=BROKEN_CODE, requirements="pulp"),
+        code_patch("print(totl_waste)", "print(totl_waste, 0)"),
+        code_patch("print(totl_waste, 0)", "print(totl_waste, 1)"),
+        output_of_code(1200),
+    ]
+    runs = [(RUN_OUTPUT, 0)]
+    return Scenario("preflight_cap", responses, runs, ["continue", "done"])
+
+
+RESULT_FILE_DATA = {
+    "objective_value": 1150,
+    "status": "Optimal",
+    "solution": {"patterns": [[2000, 4000], [3000, 3000]]},
+    "solver_stats": {"seconds": 0.2},
+}
+
+
+def result_file_scenario(llm_analysis: bool = True) -> Scenario:
+    # The program writes result.json, its objective value wins over what the LLM reads
+    responses = [PURPOSE, Code(python_code=WORKING_CODE, requirements="pulp")]
+    if llm_analysis:
+        responses.append(output_of_code(1200))
+    runs = [(RUN_OUTPUT, 0, RESULT_FILE_DATA)]
+    name = "result_file" if llm_analysis else "result_file_without_llm"
+    return Scenario(name, responses, runs, ["continue", "done"])
+
+
+def unranked_scenario() -> Scenario:
+    # Two rounds without objective values, the final report has to ask the LLM
+    responses = [
+        PURPOSE,
+        Code(python_code=WORKING_CODE, requirements="pulp"),
+        output_of_code(None),
+        Code(python_code=WORKING_CODE, requirements="pulp"),
+        output_of_code(None),
+        FinalReport(index_of_optimization=2, reason="Clearer cutting plan."),
+    ]
+    runs = [(RUN_OUTPUT, 0)] * 2
+    return Scenario("unranked", responses, runs, ["continue", "continue", "done"])
+
+
+def candidates_scenario(count: int = 3) -> Scenario:
+    # One round with `count` candidates evaluated in parallel, then the final report
+    values = [900 + 100 * index for index in range(count)]
+    responses = [PURPOSE]
+    responses += [Code(python_code=WORKING_CODE, requirements="pulp")] * count
+    # The analyses run concurrently, the order of the values does not matter
+    responses += [output_of_code(value) for value in values]
+    runs = [(RUN_OUTPUT, 0)] * count
+    return Scenario(f"candidates_{count}", responses, runs, ["continue", "done"], count)
+
+
+class NodeTimer(AsyncCallbackHandler):
+    """Records wall time and allocated memory of every graph node run."""
+
+    def __init__(self):
+        self.started = {}
+        self.nodes = defaultdict(
+            lambda: {"calls": 0, "seconds": 0.0, "allocated_kb": 0.0}
+        )
+
+    async def on_chain_start(
+        self, serialized, inputs, *, run_id, metadata=None, **kwargs
+    ):
+        node = (metadata or {}).get("langgraph_node")
+        # Only the node itself, not the runnables it is made of or the graph entry
+        if node and kwargs.get("name") == node and not node.startswith("__"):
+            self.started[run_id] = (
+                node,
+                time.perf_counter(),
+                tracemalloc.get_traced_memory()[0],
+            )
+
+    async def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self.finish(run_id)
+
+    async def on_chain_error(self, error, *, run_id, **kwargs):
+        self.finish(run_id)
+
+    def finish(self, run_id):
+        if run_id not in self.started:
+            return
+        node, started, memory = self.started.pop(run_id)
+        stats = self.nodes[node]
+        stats["calls"] += 1
+        stats["seconds"] += time.perf_counter() - started
+        stats["allocated_kb"] += max(
+            0.0, (tracemalloc.get_traced_memory()[0] - memory) / 1024
+        )
+
+
+async def run_scenario(scenario: Scenario, root: str) -> dict:
+    """
+    Run main.app once with the scripted backends.
+
+    Returns:
+    - Report with total wall time, peak traced memory, per node timings and the phase trace.
+    """
+    from main import app
+
+    model = ScriptedChatModel(scenario.responses)
+    executor = ScriptedExecutor(scenario.runs)
+    previous_models = set_models(model)
+    previous_executor = set_executor(executor)
+    init_scripted_context(scenario.answers)
+
+    workspace = Workspace(session_id=str(uuid.uuid4()), root=root).create()
+    state = AgentState(
+        userInput="Optimize the cutting of the materials.",
+        messages=[],
+        iterations=0,
+        promptFiles="",
+        workspace=workspace,
+        candidatesPerRound=scenario.candidates,
+    )
+    timer = NodeTimer()
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        # Trace is kept in memory only, the benchmark writes its own report
+        with run_trace(trace_path="", metrics_path="") as trace:
+            final_state = await app.ainvoke(
+                state, config={"callbacks": [timer], "recursion_limit": 100}
+            )
+        total = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        set_models(*previous_models)
+        set_executor(previous_executor)
+
+    return {
+        "scenario": scenario.name,
+        "total_seconds": round(total, 4),
+        "peak_memory_kb": round(peak / 1024, 1),
+        "llm_calls": len(model.prompts),
+        "executions": len(executor.codes),
+        "results": len(final_state.get("results", [])),
+        "objective_values": [
+            result.objective_value for result in final_state.get("results", [])
+        ],
+        "best_objective_value": getattr(
+            final_state.get("result"), "objective_value", None
+        ),
+        "unused_responses": len(model.responses),
+        "nodes": {
+            node: {key: round(value, 4) for key, value in stats.items()}
+            for node, stats in timer.nodes.items()
+        },
+        "trace": trace.summary()["nodes"],
+    }
+
+
+def format_report(report: dict) -> str:
+    lines = [
+        f"{report['scenario']}: {report['total_seconds'] * 1000:.1f} ms total, "
+        f"peak {report['peak_memory_kb']:.0f} KB, {report['llm_calls']} LLM calls, "
+        f"{report['executions']} executions"
+    ]
+    for node, stats in report["nodes"].items():
+        lines.append(
+            f"  {node:<16} {stats['calls']:>3} calls "
+            f"{stats['seconds'] * 1000:>9.2f} ms {stats['allocated_kb']:>9.1f} KB"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,185 @@
+# pytest -s tests/test_batch.py
+import json
+
+import pytest
+from chainlit.context import context
+from agents.common import set_models
+from batch import run_batch
+from schemas import Code
+from tests.benchmarks.workflow import PURPOSE, RUN_OUTPUT, WORKING_CODE, output_of_code
+from utils.decisions import AutoDecisionPolicy
+from utils.executors import set_executor
+from utils.scripted import ScriptedChatModel, ScriptedExecutor
+
+## THIS PURPOSE IS TO RUN JOB DIRECTORIES HEADLESS WITH THE AUTOMATIC DECISION POLICY
+## THE SCRIPTED LLM AND EXECUTOR REPLACE OPENAI AND DOCKER
+
+
+def job_script(objective_values):
+    # Responses of one job with a round per objective value
+    responses = [PURPOSE, Code(python_code=WORKING_CODE, requirements="pulp")]
+    for index, value in enumerate(objective_values):
+        responses.append(output_of_code(value))
+        if index < len(objective_values) - 1:
+            responses.append(Code(python_code=WORKING_CODE, requirements="pulp"))
+    return responses
+
+
+class JobScriptedModel:
+    # One scripted model per job, picked by the thread id run_job gives each job's context,
+    # so jobs running at the same time get their own responses in order
+    def __init__(self, scripts):
+        self.models = {
+            job: ScriptedChatModel(responses) for job, responses in scripts.items()
+        }
+
+    def current(self):
+        # Thread id is "batch-<job>-<random hex>"
+        return self.models[context.session.thread_id[len("batch-") :].rsplit("-", 1)[0]]
+
+    def __getattr__(self, name):
+        return getattr(self.current(), name)
+
+
+@pytest.fixture
+def scripted_backends():
+    def install(responses, runs):
+        model = responses if isinstance(responses, JobScriptedModel) else None
+        previous_models = set_models(model or ScriptedChatModel(responses))
+        previous_executor = set_executor(ScriptedExecutor(runs))
+        return previous_models, previous_executor
+
+    installed = []
+    yield lambda responses, runs: installed.append(install(responses, runs))
+    for previous_models, previous_executor in installed:
+        set_models(*previous_models)
+        set_executor(previous_executor)
+
+
+@pytest.mark.asyncio
+async def test_jobs_run_with_round_limit(tmp_path, scripted_backends):
+    jobs = tmp_path / "jobs"
+    for name in ("job_a", "job_b"):
+        (jobs / name).mkdir(parents=True)
+        (jobs / name / "prompt.txt").write_text("Minimize the waste.")
+    (jobs / "not_a_job").mkdir()
+
+    # One worker keeps the order of the scripted responses deterministic
+    scripted_backends(
+        job_script([1200, 1100]) + job_script([900, 950]), [(RUN_OUTPUT, 0)] * 4
+    )
+    output = tmp_path / "results"
+    summaries = await run_batch(
+        str(jobs),
+        str(output),
+        AutoDecisionPolicy(max_rounds=2),
+        workers=1,
+        root=str(tmp_path / "workspaces"),
+    )
+
+    assert [s["status"] for s in summaries] == ["done", "done"]
+    result = json.loads((output / "job_b" / "result.json").read_text())
+    assert result["best_index"] == 1
+    assert result["best_objective_value"] == 900
+    assert len(result["results"]) == 2
+    assert result["trace"]["new_loop"]["calls"] == 1
+    assert (output / "job_b" / "best.py").read_text() == WORKING_CODE
+    overview = json.loads((output / "summary.json").read_text())
+    assert [job["job"] for job in overview] == ["job_a", "job_b"]
+
+
+@pytest.mark.asyncio
+async def test_jobs_run_in_parallel(tmp_path, scripted_backends):
+    jobs = tmp_path / "jobs"
+    values = {"job_a": [1200, 1100], "job_b": [900, 950], "job_c": [700, 800]}
+    for name in values:
+        (jobs / name).mkdir(parents=True)
+        (jobs / name / "prompt.txt").write_text("Minimize the waste.")
+
+    scripted_backends(
+        JobScriptedModel({name: job_script(v) for name, v in values.items()}),
+        [(RUN_OUTPUT, 0)] * 6,
+    )
+    output = tmp_path / "results"
+    summaries = await run_batch(
+        str(jobs),
+        str(output),
+        AutoDecisionPolicy(max_rounds=2),
+        workers=3,
+        root=str(tmp_path / "workspaces"),
+    )
+
+    assert sorted(s["status"] for s in summaries) == ["done"] * 3
+    best = {
+        name: json.loads((output / name / "result.json").read_text())[
+            "best_objective_value"
+        ]
+        for name in values
+    }
+    assert best == {"job_a": 1100, "job_b": 900, "job_c": 700}
+
+
+@pytest.mark.asyncio
+async def test_failed_job_keeps_finished_rounds(tmp_path, scripted_backends):
+    jobs = tmp_path / "jobs"
+    (jobs / "job_a").mkdir(parents=True)
+    (jobs / "job_a" / "prompt.txt").write_text("Minimize the waste.")
+
+    # The second round has no scripted run, the fixer loops until the recursion limit
+    scripted_backends(
+        job_script([1200]) + [Code(python_code=WORKING_CODE, requirements="pulp")],
+        [(RUN_OUTPUT, 0)],
+    )
+    output = tmp_path / "results"
+    summaries = await run_batch(
+        str(jobs),
+        str(output),
+        AutoDecisionPolicy(max_rounds=2),
+        recursion_limit=25,
+        root=str(tmp_path / "workspaces"),
+    )
+
+    assert summaries[0]["status"] == "failed"
+    assert "GraphRecursionError" in summaries[0]["error"]
+    result = json.loads((output / "job_a" / "result.json").read_text())
+    assert result["best_objective_value"] == 1200
+    assert (output / "job_a" / "best.py").read_text() == WORKING_CODE
+
+
+@pytest.mark.asyncio
+async def test_failed_job_is_reported(tmp_path, scripted_backends):
+    jobs = tmp_path / "jobs"
+    (jobs / "empty_prompt").mkdir(parents=True)
+    (jobs / "empty_prompt" / "prompt.md").write_text("")
+
+    scripted_backends([], [])
+    summaries = await run_batch(
+        str(jobs),
+        str(tmp_path / "results"),
+        AutoDecisionPolicy(),
+        root=str(tmp_path / "workspaces"),
+    )
+
+    assert summaries[0]["status"] == "failed"
+    assert "No prompt" in summaries[0]["error"]
+
+
+@pytest.mark.asyncio
+async def test_jobs_with_checkpoints(tmp_path, scripted_backends):
+    jobs = tmp_path / "jobs"
+    (jobs / "job_a").mkdir(parents=True)
+    (jobs / "job_a" / "prompt.txt").write_text("Minimize the waste.")
+
+    # The whole state, decision policy included, is stored after every node
+    scripted_backends(job_script([1200]), [(RUN_OUTPUT, 0)])
+    summaries = await run_batch(
+        str(jobs),
+        str(tmp_path / "results"),
+        AutoDecisionPolicy(max_rounds=1),
+        root=str(tmp_path / "workspaces"),
+        checkpoint_db=str(tmp_path / "checkpoints.sqlite"),
+    )
+
+    assert summaries[0]["status"] == "done"
+    assert summaries[0]["resumed"] is False
+    assert (tmp_path / "checkpoints.sqlite").exists()
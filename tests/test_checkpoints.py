@@ -0,0 +1,69 @@
+# pytest -s tests/test_checkpoints.py
+import pytest
+
+from agents.common import set_models
+from main import workflow
+from schemas import AgentState
+from tests.benchmarks.workflow import optimization_scenario
+from utils import Workspace
+from utils.checkpoints import (
+    clear_thread,
+    open_checkpointer,
+    thread_config,
+    unfinished_run,
+)
+from utils.executors import set_executor
+from utils.scripted import ScriptedChatModel, ScriptedExecutor, init_scripted_context
+
+## THIS PURPOSE IS TO CHECK THAT AN INTERRUPTED RUN CONTINUES FROM ITS LAST CHECKPOINT
+## WITHOUT REPEATING THE LLM CALLS AND EXECUTIONS THAT WERE ALREADY DONE
+
+
+@pytest.fixture
+def scripted_run():
+    scenario = optimization_scenario(2)
+    model = ScriptedChatModel(scenario.responses)
+    executor = ScriptedExecutor(scenario.runs)
+    previous_models = set_models(model)
+    previous_executor = set_executor(executor)
+    yield scenario, model, executor
+    set_models(*previous_models)
+    set_executor(previous_executor)
+
+
+@pytest.mark.asyncio
+async def test_resume_from_last_completed_node(tmp_path, scripted_run):
+    scenario, model, executor = scripted_run
+    init_scripted_context(scenario.answers)
+    checkpointer = await open_checkpointer(str(tmp_path / "checkpoints.sqlite"))
+    config = thread_config("thread-1", recursion_limit=100)
+    state = AgentState(
+        userInput="Optimize the cutting of the materials.",
+        messages=[],
+        iterations=0,
+        promptFiles="",
+        workspace=Workspace(session_id="thread-1", root=str(tmp_path)).create(),
+    )
+
+    # Stop right before the final report, like a server restart would
+    interrupted = workflow.compile(
+        checkpointer=checkpointer, interrupt_before=["final_report"]
+    )
+    await interrupted.ainvoke(state, config)
+    llm_calls, executions = len(model.prompts), len(executor.codes)
+
+    app = workflow.compile(checkpointer=checkpointer)
+    snapshot = await unfinished_run(app, config)
+    assert snapshot.next == ("final_report",)
+    assert len(snapshot.values["results"]) == 2
+
+    final_state = await app.ainvoke(None, config)
+
+    assert final_state["finalReport"].index_of_optimization == 2
+    assert len(model.prompts) == llm_calls
+    assert len(executor.codes) == executions
+    assert await unfinished_run(app, config) is None
+
+    await clear_thread(checkpointer, "thread-1")
+    assert (await app.aget_state(config)).values == {}
+    await checkpointer.conn.close()
@@ -0,0 +1,44 @@
+# pytest -s tests/utils/test_base_image.py
+from schemas import Code
+from utils.base_image import (
+    base_image_docker_files,
+    base_image_of,
+    base_image_tag,
+    covered_by_base_image,
+)
+from utils.docker_templates import template_docker_files
+
+## THIS PURPOSE IS TO CHECK WHEN CODE CAN RUN IN THE PREBUILT BASE IMAGE WITHOUT A BUILD
+
+SPEC = "# solver stack\nnumpy==1.26.4\npandas==2.2.3\nPuLP==2.9.0\nortools==9.11.4210\n"
+
+
+def test_requirements_in_the_spec_are_covered():
+    assert covered_by_base_image("pandas\npulp>=2.7\nortools", SPEC)
+    assert covered_by_base_image("PuLP==2.9.0  # solver\nnumpy<2", SPEC)
+    assert covered_by_base_image("No requirements provided", SPEC)
+
+
+def test_other_packages_versions_and_extras_need_a_build():
+    assert not covered_by_base_image("pandas\nscipy", SPEC)
+    assert not covered_by_base_image("pandas>=2.3", SPEC)
+    assert not covered_by_base_image("pandas[excel]", SPEC)
+    assert not covered_by_base_image("pandas", "")
+
+
+def test_base_image_docker_files_skip_pip_install():
+    code = Code(python_code="print('hello')", requirements="pandas\nPuLP")
+    files = base_image_docker_files(code, SPEC)
+
+    assert files.dockerfile.startswith(f"FROM {base_image_tag(SPEC)}\n")
+    assert "RUN" not in files.dockerfile
+    assert base_image_of(files.dockerfile, SPEC) == base_image_tag(SPEC)
+
+    other = Code(python_code="print('hello')", requirements="scipy")
+    assert base_image_docker_files(other, SPEC) is None
+    assert base_image_of(template_docker_files(other).dockerfile, SPEC) is None
+
+
+def test_tag_changes_with_the_spec():
+    assert base_image_tag(SPEC) == base_image_tag("# comment\n" + SPEC)
+    assert base_image_tag(SPEC) != base_image_tag(SPEC + "scipy==1.14.1\n")
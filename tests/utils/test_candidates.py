@@ -0,0 +1,54 @@
+# pytest -s tests/utils/test_candidates.py
+import asyncio
+import os
+
+import pytest
+
+from utils import Workspace
+from utils.candidates import (
+    candidate_workspace,
+    candidates_per_round,
+    generate_candidates,
+    variant_hint,
+)
+
+## THIS PURPOSE IS TO TEST CHOOSING, GENERATING AND ISOLATING CANDIDATE SOLUTIONS
+
+
+def test_candidates_per_round_and_hint():
+    assert candidates_per_round({"candidatesPerRound": 3}) == 3
+    assert candidates_per_round({"candidatesPerRound": 0}) >= 1
+    assert variant_hint(0, 3) == ""
+    assert "candidate solution 2 of 3" in variant_hint(1, 3)
+
+
+def test_candidate_workspace_copies_input_files(tmp_path):
+    workspace = Workspace(session_id="session", root=str(tmp_path)).create()
+    workspace.write_file("orders.xlsx", "data")
+    workspace.write_file("generated.py", "print(1)")
+    workspace.write_file("Dockerfile", "FROM python")
+
+    candidate = candidate_workspace(workspace, 1)
+
+    assert candidate.session_id == "session-candidate-2"
+    with open(candidate.file_path("orders.xlsx"), encoding="utf-8") as f:
+        assert f.read() == "data"
+    assert not os.path.exists(candidate.file_path("generated.py"))
+    assert not os.path.exists(candidate.file_path("Dockerfile"))
+
+
+def test_generate_candidates_skips_failures():
+    async def generate(index):
+        if index == 1:
+            raise RuntimeError("LLM failed")
+        return index
+
+    assert asyncio.run(generate_candidates(generate, 3)) == [0, 2]
+
+
+def test_generate_candidates_all_failed():
+    async def generate(index):
+        raise RuntimeError(f"LLM failed {index}")
+
+    with pytest.raises(RuntimeError, match="LLM failed 0"):
+        asyncio.run(generate_candidates(generate, 2))
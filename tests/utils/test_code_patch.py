@@ -0,0 +1,82 @@
+# pytest -s tests/utils/test_code_patch.py
+import pytest
+
+from schemas import Code, CodeEdit, CodePatch
+from utils.code_patch import PatchError, apply_edits, patch_to_fix
+
+## THIS PURPOSE IS TO CHECK THAT SEARCH/REPLACE EDITS OF THE CODE FIXER ARE APPLIED SAFELY
+
+CODE = (
+    "import pulp\n"
+    "\n"
+    "def solve(orders):\n"
+    "    total = sum(orders)\n"
+    "    print(totl)\n"
+    "    return total\n"
+)
+
+
+def test_edits_are_applied_in_order():
+    edits = [
+        CodeEdit(search="    print(totl)\n", replace="    print(total)\n"),
+        CodeEdit(search="return total", replace="return total, 0"),
+    ]
+
+    fixed = apply_edits(CODE, edits)
+
+    assert "print(total)" in fixed and "return total, 0" in fixed
+    assert fixed.startswith("import pulp\n")
+
+
+def test_trailing_whitespace_differences_still_apply():
+    edits = [CodeEdit(search="    print(totl)   \n", replace="    print(total)\n")]
+
+    code = CODE.replace("sum(orders)", "sum(orders)  ") + "   \n"
+
+    fixed = apply_edits(code, edits)
+
+    # Only the matched lines are replaced, whitespace elsewhere is kept
+    assert fixed == code.replace("    print(totl)\n", "    print(total)\n")
+
+
+@pytest.mark.parametrize(
+    "edits, message",
+    [
+        ([], "no edits"),
+        ([CodeEdit(search="print(waste)", replace="print(0)")], "not found"),
+        ([CodeEdit(search="total", replace="t")], "found 2 times"),
+        ([CodeEdit(search="return total", replace="return (total")], "compile"),
+    ],
+)
+def test_invalid_patches_are_rejected(edits, message):
+    with pytest.raises(PatchError, match=message):
+        apply_edits(CODE, edits)
+
+
+def test_patch_becomes_a_full_fix():
+    patch = CodePatch(
+        edits=[CodeEdit(search="print(totl)", replace="print(total)")],
+        requirements="pulp",
+        fix_description="Fixed the misspelled name.",
+        original_error="NameError: name 'totl' is not defined",
+    )
+
+    fix = patch_to_fix(Code(python_code=CODE, requirements="pulp"), patch)
+
+    assert fix.fixed_python_code == CODE.replace("totl)", "total)")
+    assert fix.fix_description == "Fixed the misspelled name."
+
+
+def test_unchanged_requirements_are_kept():
+    code = Code(python_code=CODE, requirements="pulp==2.9.0\npandas")
+    patch = CodePatch(
+        edits=[CodeEdit(search="print(totl)", replace="print(total)")],
+        fix_description="Fixed the misspelled name.",
+        original_error="NameError: name 'totl' is not defined",
+    )
+
+    assert patch_to_fix(code, patch).requirements == "pulp==2.9.0\npandas"
+
+    patch.requirements_changed, patch.requirements = True, "pulp==2.8.0\npandas"
+    fix = patch_to_fix(code, patch)
+    assert fix.requirements == "pulp==2.8.0\npandas" and fix.requirements_changed
@@ -0,0 +1,150 @@
+# pytest -s tests/utils/test_container_pool.py
+import asyncio
+import io
+import json
+import tarfile
+
+import pytest
+import utils.container_pool as container_pool_module
+from utils import Workspace
+from utils.result_file import read_result_file
+from utils.container_pool import ContainerPool
+
+## THIS PURPOSE IS TO CHECK POOL REUSE, RECYCLING AND IDLE TIMEOUT WITHOUT A DOCKER DAEMON
+
+
+@pytest.fixture
+def docker_commands(monkeypatch):
+    commands = []
+
+    async def fake_run_captured(command, cwd=None):
+        commands.append(command)
+        await asyncio.sleep(0)  # Lets other sessions run, like a real docker call
+        if command[:2] == ["docker", "run"]:
+            return 0, f"container-{len(commands)}\n"
+        return 0, ""
+
+    monkeypatch.setattr(container_pool_module, "run_captured", fake_run_captured)
+    # Fake containers must not be removed at interpreter exit
+    monkeypatch.setattr(container_pool_module.atexit, "register", lambda func: None)
+    return commands
+
+
+def started(commands):
+    return [c for c in commands if c[:2] == ["docker", "run"]]
+
+
+@pytest.mark.asyncio
+async def test_idle_container_is_reused(docker_commands):
+    pool = ContainerPool(size=2, idle_timeout=60, max_runs=10)
+
+    first = await pool.acquire("image:a")
+    first.runs += 1
+    await pool.release(first, healthy=True)
+    second = await pool.acquire("image:a")
+
+    assert second is first
+    assert len(started(docker_commands)) == 1
+    assert [
+        "docker",
+        "exec",
+        first.container_id,
+        "rm",
+        "-rf",
+        "/tmp/job",
+    ] in docker_commands
+
+
+@pytest.mark.asyncio
+async def test_container_is_recycled_after_max_runs(docker_commands):
+    pool = ContainerPool(size=1, idle_timeout=60, max_runs=1)
+
+    container = await pool.acquire("image:a")
+    container.runs += 1
+    await pool.release(container, healthy=True)
+
+    assert pool.idle["image:a"] == []
+    assert ["docker", "rm", "-f", container.container_id] in docker_commands
+
+
+@pytest.mark.asyncio
+async def test_idle_timeout_removes_containers(docker_commands):
+    pool = ContainerPool(size=1, idle_timeout=0, max_runs=10)
+
+    container = await pool.acquire("image:a")
+    await pool.release(container, healthy=True)
+    await pool.reap_idle()
+
+    assert pool.idle["image:a"] == []
+    assert container.container_id not in pool.container_ids
+
+
+@pytest.mark.asyncio
+async def test_acquire_of_another_image_during_reaping(docker_commands):
+    pool = ContainerPool(size=1, idle_timeout=0, max_runs=10)
+
+    container = await pool.acquire("image:a")
+    await pool.release(container, healthy=True)
+    # Both reap the expired container, the second adds a new image to the idle dict
+    await asyncio.gather(pool.acquire("image:b"), pool.acquire("image:c"))
+
+    assert container.container_id not in pool.container_ids
+    assert len(started(docker_commands)) == 3
+
+
+@pytest.mark.asyncio
+async def test_logs_are_not_copied_into_the_container(
+    docker_commands, monkeypatch, tmp_path
+):
+    archives = []
+
+    async def fake_run_with_input(command, data, cwd=None):
+        archives.append(tarfile.open(fileobj=io.BytesIO(data)).getnames())
+        return 0, ""
+
+    async def fake_run_streaming(command, cwd, on_line, timeout=None):
+        return 0
+
+    monkeypatch.setattr(container_pool_module, "run_with_input", fake_run_with_input)
+    monkeypatch.setattr(container_pool_module, "run_streaming", fake_run_streaming)
+    workspace = Workspace(session_id="session", root=str(tmp_path)).create()
+    for name in ("generated.py", "run_measured.py", "build.log", "run.log"):
+        workspace.write_file(name, "")
+
+    pool = ContainerPool(size=1, idle_timeout=60, max_runs=10)
+    await pool.run("image:a", workspace, on_line=None)
+
+    assert archives == [["generated.py", "run_measured.py"]]
+
+
+@pytest.mark.asyncio
+async def test_result_file_is_copied_back(docker_commands, monkeypatch, tmp_path):
+    fake_run_captured = container_pool_module.run_captured
+
+    async def run_captured(command, cwd=None):
+        # The program in the container wrote result.json into the job directory
+        if command[:2] == ["docker", "cp"] and command[2].endswith("/result.json"):
+            with open(command[3], "w", encoding="utf-8") as f:
+                json.dump({"objective_value": 1150, "status": "Optimal"}, f)
+        return await fake_run_captured(command, cwd)
+
+    async def fake_run_with_input(command, data, cwd=None):
+        return 0, ""
+
+    async def fake_run_streaming(command, cwd, on_line, timeout=None):
+        return 0
+
+    monkeypatch.setattr(container_pool_module, "run_captured", run_captured)
+    monkeypatch.setattr(container_pool_module, "run_with_input", fake_run_with_input)
+    monkeypatch.setattr(container_pool_module, "run_streaming", fake_run_streaming)
+    workspace = Workspace(session_id="session", root=str(tmp_path)).create()
+
+    pool = ContainerPool(size=1, idle_timeout=60, max_runs=10)
+    await pool.run("image:a", workspace, on_line=None)
+
+    result, error = read_result_file(workspace)
+    assert error is None and result.objective_value == 1150
+    # Copied before the reset removes the job directory
+    copy_back = [c for c in docker_commands if c[:2] == ["docker", "cp"]]
+    reset = ["docker", "exec", "container-1", "rm", "-rf", "/tmp/job"]
+    assert docker_commands.index(copy_back[0]) < docker_commands.index(reset)
@@ -0,0 +1,43 @@
+# pytest -s tests/utils/test_data_summary.py
+import pandas as pd
+from utils.data_summary import summarize_sheet
+
+## THIS PURPOSE IS TO KEEP THE PROMPT SIZE BOUNDED FOR LARGE EXCEL SHEETS
+
+
+def test_small_sheet_is_sent_completely():
+    df = pd.DataFrame(
+        {"Material ID": ["Materiaali 1", "Materiaali 2"], "Length (mm)": [6000, 8000]}
+    )
+
+    text = summarize_sheet("data.xlsx", "Materials", df)
+
+    assert text.startswith("File: data.xlsx, Sheet: Materials\nData:\n")
+    assert '"Material ID":"Materiaali 2"' in text
+
+
+def test_large_sheet_is_summarized():
+    df = pd.DataFrame(
+        {
+            "Order ID": [f"Tilaus {i}" for i in range(20000)],
+            "Quantity": list(range(20000)),
+        }
+    )
+
+    text = summarize_sheet("orders.xlsx", "Orders", df)
+
+    assert "Rows: 20000" in text
+    assert "Quantity (int64): 20000 non-null, min 0, max 19999" in text
+    assert "Order ID (object): 20000 non-null, 20000 unique values" in text
+    assert "Tilaus 19999" not in text
+    assert "'orders.xlsx' (sheet 'Orders')" in text
+
+
+def test_summary_size_does_not_grow_with_rows():
+    small = pd.DataFrame({"value": range(1000)})
+    large = pd.DataFrame({"value": range(1000000)})
+
+    small_text = summarize_sheet("a.xlsx", "Sheet1", small)
+    large_text = summarize_sheet("a.xlsx", "Sheet1", large)
+
+    assert len(large_text) < len(small_text) + 100
@@ -0,0 +1,31 @@
+# pytest -s tests/utils/test_decisions.py
+from tests.benchmarks.workflow import output_of_code
+from utils.decisions import PLAN_DECISION, ROUND_DECISION, AutoDecisionPolicy
+
+## THIS PURPOSE IS TO CHECK THE AUTOMATIC ANSWERS USED INSTEAD OF THE ACTION BUTTONS
+
+
+def test_first_plan_is_accepted():
+    assert AutoDecisionPolicy().decide(PLAN_DECISION, {}) == "continue"
+
+
+def test_rounds_stop_at_the_limit():
+    policy = AutoDecisionPolicy(max_rounds=2)
+    result = output_of_code(100)
+
+    assert policy.decide(ROUND_DECISION, {"results": [result]}) == "continue"
+    assert policy.decide(ROUND_DECISION, {"results": [result, result]}) == "done"
+
+
+def test_stop_when_goal_met():
+    achieved = output_of_code(100)
+    missed = output_of_code(100).model_copy(
+        update={"is_goal_achieved": "False, one order is not fulfilled."}
+    )
+
+    keep_going = AutoDecisionPolicy(max_rounds=5)
+    assert keep_going.decide(ROUND_DECISION, {"results": [achieved]}) == "continue"
+
+    policy = AutoDecisionPolicy(max_rounds=5, stop_when_goal_met=True)
+    assert policy.decide(ROUND_DECISION, {"results": [missed]}) == "continue"
+    assert policy.decide(ROUND_DECISION, {"results": [missed, achieved]}) == "done"
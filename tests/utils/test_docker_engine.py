@@ -0,0 +1,253 @@
+# pytest -s tests/utils/test_docker_engine.py
+import asyncio
+import io
+import os
+import tarfile
+
+import pytest
+from docker.errors import NotFound
+
+import utils.executors as executors_module
+import utils.image_cache as image_cache_module
+from utils import Workspace
+from utils.docker_engine import DockerEngine, EngineEvent, build_event, output_events
+from utils.executors import DockerApiExecutor, copy_compose_result
+from utils.image_cache import ImageCache, dependency_hash
+from utils.profiling import PROFILER_FILE
+from utils.result_file import RESULT_FILE, read_result_file
+
+## THIS PURPOSE IS TO CHECK THE DOCKER ENGINE API EXECUTOR
+## THE ENGINE IS REPLACED WITH A SCRIPTED ONE, SO NO DOCKER DAEMON IS NEEDED
+
+
+def test_build_stream_messages_become_events():
+    assert build_event({"stream": "Step 1/4 : FROM python\n"}) == EngineEvent(
+        "build", "Step 1/4 : FROM python\n"
+    )
+    assert build_event({"aux": {"ID": "sha256:abc"}}) is None
+
+    error = build_event(
+        {"error": "failed", "errorDetail": {"message": "pip install failed"}}
+    )
+    assert error.error and error.text == "pip install failed"
+
+
+def test_output_chunks_are_split_into_lines_per_stream():
+    chunks = [
+        (b"Total ", None),
+        (b"waste: 12\nDone", b"Traceback\n"),
+        (None, b"NameError"),
+    ]
+
+    assert list(output_events(chunks)) == [
+        EngineEvent("stdout", "Total waste: 12\n"),
+        EngineEvent("stderr", "Traceback\n"),
+        EngineEvent("stdout", "Done"),
+        EngineEvent("stderr", "NameError"),
+    ]
+
+
+class ScriptedEngine:
+    def __init__(self, lines, exit_code=0, delay=0):
+        self.lines = lines
+        self.exit_code = exit_code
+        self.delay = delay
+        self.calls = []
+
+    async def build(self, path, tag):
+        self.calls.append(("build", tag))
+        yield EngineEvent("build", "Successfully built\n")
+
+    async def create(self, image, command=None, workdir=None, mount=None):
+        self.calls.append(("create", image, command))
+        return "container"
+
+    async def output(self, container):
+        for line in self.lines:
+            await asyncio.sleep(self.delay)
+            yield EngineEvent("stdout", line)
+
+    async def wait(self, container):
+        return self.exit_code
+
+    async def remove(self, container):
+        self.calls.append(("remove", container))
+
+    async def remove_image(self, tag, prune=True):
+        self.calls.append(("remove_image", tag))
+
+    async def image_exists(self, tag):
+        self.calls.append(("image_exists", tag))
+        return True
+
+    async def image_size(self, tag):
+        return 100
+
+    async def copy_from(self, container, path, destination):
+        self.calls.append(("copy_from", container, path))
+        with open(destination, "w", encoding="utf-8") as f:
+            f.write('{"objective_value": 12}')
+        return True
+
+
+async def run_code(tmp_path, engine, timeout=None, script="generated.py"):
+    # Without a WORKDIR there is no cached image, the image is built through the engine
+    workspace = Workspace(session_id="Session", root=str(tmp_path)).create()
+    workspace.write_file("Dockerfile", 'FROM python:3.11-slim\nCMD ["python"]\n')
+    build, output = [], []
+
+    async def on_output(line):
+        build.append(line)
+
+    async def on_line(line):
+        output.append(line)
+
+    returncode = await DockerApiExecutor(engine).run(
+        workspace, script, on_output, on_line, lambda: None, timeout
+    )
+    return returncode, build, output
+
+
+@pytest.mark.asyncio
+async def test_exit_code_comes_from_the_container(tmp_path):
+    engine = ScriptedEngine(["Total waste: 12\n"], exit_code=3)
+
+    returncode, build, output = await run_code(tmp_path, engine)
+
+    assert returncode == 3
+    assert build == ["Successfully built\n"]
+    assert output == ["Total waste: 12\n"]
+    assert engine.calls == [
+        ("build", "optimizer-run:session"),
+        ("create", "optimizer-run:session", None),
+        ("remove", "container"),
+        ("remove_image", "optimizer-run:session"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_result_file_is_copied_out_of_a_built_image(tmp_path):
+    engine = ScriptedEngine(["Total waste: 12\n"])
+
+    returncode, _, _ = await run_code(tmp_path, engine)
+    workspace = Workspace(session_id="Session", root=str(tmp_path))
+
+    assert returncode == 0
+    assert engine.calls.index(("copy_from", "container", RESULT_FILE)) < (
+        engine.calls.index(("remove", "container"))
+    )
+    assert read_result_file(workspace)[0].objective_value == 12
+
+
+class ArchiveContainer:
+    # Stands in for a docker SDK container, get_archive returns a tar stream like the API
+    attrs = {"Config": {"WorkingDir": ""}}
+
+    def __init__(self, files):
+        self.files = files
+        self.paths = []
+
+    def get_archive(self, path):
+        self.paths.append(path)
+        if path not in self.files:
+            raise NotFound("No such file")
+        data = io.BytesIO()
+        with tarfile.open(fileobj=data, mode="w") as archive:
+            info = tarfile.TarInfo(os.path.basename(path))
+            info.size = len(self.files[path])
+            archive.addfile(info, io.BytesIO(self.files[path]))
+        return iter([data.getvalue()]), {"size": info.size}
+
+
+@pytest.mark.asyncio
+async def test_copy_from_reads_the_file_from_the_working_directory(tmp_path):
+    container = ArchiveContainer({"/result.json": b'{"objective_value": 3}'})
+    destination = str(tmp_path / "result.json")
+
+    assert await DockerEngine(client=object()).copy_from(
+        container, "result.json", destination
+    )
+    assert not await DockerEngine(client=object()).copy_from(
+        container, "missing.json", str(tmp_path / "missing.json")
+    )
+
+    assert container.paths == ["/result.json", "/missing.json"]
+    with open(destination, encoding="utf-8") as f:
+        assert f.read() == '{"objective_value": 3}'
+    assert not os.path.exists(tmp_path / "missing.json")
+
+
+@pytest.mark.asyncio
+async def test_compose_run_copies_the_result_file(tmp_path, monkeypatch):
+    commands = []
+
+    async def fake_run_captured(command, cwd=None):
+        commands.append(command)
+        if command[-3:] == ["ps", "-a", "-q"]:
+            return 0, "first\nsecond\n"
+        if command[2] == "second:result.json":
+            with open(command[3], "w", encoding="utf-8") as f:
+                f.write('{"objective_value": 5}')
+            return 0, ""
+        return 1, "Could not find the file result.json in container first"
+
+    monkeypatch.setattr(executors_module, "run_captured", fake_run_captured)
+    workspace = Workspace(session_id="session", root=str(tmp_path)).create()
+
+    assert await copy_compose_result(workspace)
+    assert [command[2] for command in commands[1:]] == [
+        "first:result.json",
+        "second:result.json",
+    ]
+    assert read_result_file(workspace)[0].objective_value == 5
+
+
+@pytest.mark.asyncio
+async def test_profiling_is_skipped_when_the_image_runs_its_own_command(tmp_path):
+    engine = ScriptedEngine(["Total waste: 12\n"])
+
+    returncode, build, output = await run_code(tmp_path, engine, script=PROFILER_FILE)
+
+    assert returncode == 0
+    assert build[0].startswith("Profiling skipped: the Dockerfile has no WORKDIR")
+    assert ("create", "optimizer-run:session", None) in engine.calls
+    assert not os.path.exists(os.path.join(tmp_path, "session", PROFILER_FILE))
+
+
+@pytest.mark.asyncio
+async def test_timeout_removes_the_container(tmp_path):
+    engine = ScriptedEngine(["tick\n"] * 100, delay=0.05)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await run_code(tmp_path, engine, timeout=0.2)
+
+    assert ("remove", "container") in engine.calls
+
+
+@pytest.mark.asyncio
+async def test_image_cache_queries_go_through_the_engine(tmp_path, monkeypatch):
+    async def no_cli(command, cwd=None):
+        raise AssertionError(f"docker CLI called: {command}")
+
+    monkeypatch.setattr(image_cache_module, "run_captured", no_cli)
+    dockerfile = 'FROM python:3.11-slim\nWORKDIR /app\nCOPY . .\nCMD ["python"]\n'
+    workspace = Workspace(session_id="session", root=str(tmp_path)).create()
+    workspace.write_file("Dockerfile", dockerfile)
+    key = dependency_hash(dockerfile, "")
+    cache = ImageCache(index_path=str(tmp_path / "index.json"), max_images=1)
+    cache.entries = {
+        "old": {"tag": "optimizer-cache:old", "size": 1, "last_used": 1},
+        key: {"tag": f"optimizer-cache:{key[:16]}", "size": 1, "last_used": 2},
+    }
+    engine = ScriptedEngine([])
+
+    async def on_line(line):
+        pass
+
+    tag = await cache.prepare(workspace, on_line, engine)
+
+    assert tag == f"optimizer-cache:{key[:16]}"
+    assert engine.calls == [
+        ("image_exists", tag),
+        ("remove_image", "optimizer-cache:old"),
+    ]
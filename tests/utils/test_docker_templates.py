@@ -0,0 +1,56 @@
+# pytest -s tests/utils/test_docker_templates.py
+from schemas import Code
+from utils.docker_templates import (
+    can_use_template,
+    docker_files_signature,
+    template_docker_files,
+)
+
+## THIS PURPOSE IS TO CHECK WHEN DOCKER FILES CAN BE GENERATED WITHOUT THE LLM
+
+
+def test_standard_project_uses_template():
+    code = Code(
+        python_code="print('hello')",
+        requirements="pandas\nPuLP==2.9.0\nopenpyxl>=3.1,<4",
+        resources="cutting_stock_problem_data.xlsx",
+    )
+
+    assert can_use_template(code)
+
+    files = template_docker_files(code)
+    assert "pip install" in files.dockerfile
+    assert "-r requirements.txt" in files.dockerfile
+    assert "WORKDIR /app" in files.dockerfile
+    assert "container_name" not in files.compose_file
+
+
+def test_no_requirements_skips_pip_install():
+    code = Code(python_code="print('hello')")
+
+    assert can_use_template(code)
+    assert "pip install" not in template_docker_files(code).dockerfile
+
+
+def test_unusual_projects_fall_back_to_llm():
+    system_package = Code(
+        python_code="print('hello')",
+        requirements="pandas",
+        resources="GLPK solver installed with apt-get",
+    )
+    not_pip = Code(
+        python_code="print('hello')",
+        requirements="pandas\napt-get install glpk-utils",
+    )
+
+    assert not can_use_template(system_package)
+    assert not can_use_template(not_pip)
+
+
+def test_signature_ignores_code_changes():
+    first = Code(python_code="print(1)", requirements="pandas")
+    second = Code(python_code="print(2)", requirements="pandas")
+    third = Code(python_code="print(2)", requirements="pandas\nPuLP")
+
+    assert docker_files_signature(first) == docker_files_signature(second)
+    assert docker_files_signature(first) != docker_files_signature(third)
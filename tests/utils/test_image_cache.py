@@ -0,0 +1,69 @@
+# pytest -s tests/utils/test_image_cache.py
+import yaml
+from utils.image_cache import (
+    ImageCache,
+    build_override,
+    dependency_hash,
+    dockerfile_workdir,
+)
+
+## THIS PURPOSE IS TO CHECK CACHE KEYS, COMPOSE OVERRIDES AND LRU EVICTION WITHOUT DOCKER
+
+dockerfile = """FROM python:3.11-slim
+WORKDIR /app
+COPY requirements.txt .
+RUN pip install -r requirements.txt
+COPY . .
+CMD ["python", "generated.py"]
+"""
+
+
+def test_hash_ignores_requirement_order_and_comments():
+    first = dependency_hash(dockerfile, "pandas\nPuLP\n# solver\nopenpyxl")
+    second = dependency_hash(dockerfile, "openpyxl\npulp\n\npandas\n")
+
+    assert first == second
+    assert first != dependency_hash(dockerfile, "pandas\nopenpyxl")
+
+
+def test_override_mounts_workspace_into_workdir():
+    compose = "services:\n  app:\n    build: .\n    command: python /app/generated.py\n"
+
+    override = build_override(
+        compose, "optimizer-cache:abc", dockerfile_workdir(dockerfile)
+    )
+
+    assert override["services"]["app"]["image"] == "optimizer-cache:abc"
+    assert override["services"]["app"]["volumes"] == ["./:/app"]
+    assert "mem_limit" in override["services"]["app"]
+    assert yaml.safe_dump(override)
+
+
+def test_dockerfile_without_workdir_is_not_cached():
+    assert dockerfile_workdir("FROM python:3.11\nCOPY . .\n") is None
+
+
+def test_least_recently_used_images_are_evicted(tmp_path):
+    cache = ImageCache(index_path=str(tmp_path / "index.json"), max_images=2)
+    cache.entries = {
+        "old": {"tag": "optimizer-cache:old", "size": 1, "last_used": 1},
+        "mid": {"tag": "optimizer-cache:mid", "size": 1, "last_used": 2},
+        "new": {"tag": "optimizer-cache:new", "size": 1, "last_used": 3},
+    }
+
+    assert cache.eviction_candidates(keep="new") == ["old"]
+    # The image in use is never evicted, even when it is the oldest one
+    assert cache.eviction_candidates(keep="old") == ["mid"]
+
+
+def test_size_cap_evicts_until_under_budget(tmp_path):
+    cache = ImageCache(
+        index_path=str(tmp_path / "index.json"), max_images=0, max_bytes=250
+    )
+    cache.entries = {
+        "a": {"tag": "optimizer-cache:a", "size": 100, "last_used": 1},
+        "b": {"tag": "optimizer-cache:b", "size": 100, "last_used": 2},
+        "c": {"tag": "optimizer-cache:c", "size": 100, "last_used": 3},
+    }
+
+    assert cache.eviction_candidates(keep="c") == ["a"]
@@ -0,0 +1,77 @@
+# pytest -s tests/utils/test_instrumentation.py
+import json
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+from utils.instrumentation import (
+    Metrics,
+    TokenUsage,
+    instrumented,
+    phase,
+    record_phase,
+    run_trace,
+)
+
+## THIS PURPOSE IS TO CHECK THAT NODE PHASES, TOKENS AND RETRIES END UP IN THE TRACE AND METRICS
+
+
+def llm_result(input_tokens, output_tokens):
+    message = AIMessage(
+        content="answer",
+        usage_metadata={
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        },
+    )
+    return LLMResult(generations=[[ChatGeneration(message=message)]])
+
+
+@pytest.mark.asyncio
+async def test_node_phases_and_tokens_are_traced(tmp_path):
+    async def agent(state):
+        with phase("parse"):
+            pass
+        TokenUsage().on_llm_end(llm_result(100, 20))
+        return state
+
+    node = instrumented("code_fixer", agent)
+    trace_path = tmp_path / "trace.jsonl"
+    with run_trace("thread-1", trace_path=str(trace_path), metrics_path="") as trace:
+        await node({})
+        await node({})
+
+    summary = trace.summary()["nodes"]["code_fixer"]
+    assert summary["calls"] == 2
+    assert summary["retries"] == 1
+    assert summary["phases"]["parse"]["count"] == 2
+    assert summary["phases"]["total"]["count"] == 2
+    assert summary["tokens"] == {"prompt": 200, "completion": 40}
+
+    saved = json.loads(trace_path.read_text().strip())
+    assert saved["run_id"] == "thread-1"
+    assert len(saved["spans"]) == 4
+
+
+def test_phases_outside_a_run_are_ignored():
+    record_phase("build", 1.0)  # No trace, nothing to record and no error
+
+
+@pytest.mark.asyncio
+async def test_prometheus_text(tmp_path):
+    metrics = Metrics()
+    with run_trace(trace_path="", metrics_path="") as trace:
+        await instrumented("start_docker", lambda state: _build(state))({})
+    metrics.add(trace)
+
+    text = metrics.prometheus_text()
+    assert "optimizer_runs_total 1" in text
+    assert 'optimizer_node_calls_total{node="start_docker"} 1' in text
+    assert 'optimizer_phase_count_total{node="start_docker",phase="build"} 1' in text
+    assert "# TYPE optimizer_phase_seconds_total counter" in text
+
+
+async def _build(state):
+    record_phase("build", 2.5)
+    return state
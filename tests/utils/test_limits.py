@@ -0,0 +1,86 @@
+# pytest -s tests/utils/test_limits.py
+import subprocess
+import sys
+
+from utils.limits import (
+    KILLED_EXIT_CODE,
+    memory_limit_bytes,
+    parse_stats_line,
+    process_limits,
+    was_killed,
+    write_runner,
+)
+from utils.workspace import Workspace
+
+## THIS PURPOSE IS TO CHECK THAT THE RUNNER SCRIPT REPORTS RESOURCE USAGE OF THE GENERATED CODE
+
+
+def run_in_workspace(tmp_path, code):
+    workspace = Workspace(session_id="limits", root=str(tmp_path))
+    workspace.write_file("generated.py", code)
+    command = write_runner(workspace)
+    return subprocess.run(
+        [sys.executable, *command[1:]],
+        cwd=workspace.path,
+        capture_output=True,
+        text=True,
+    )
+
+
+def test_runner_reports_usage_after_program_output(tmp_path):
+    result = run_in_workspace(
+        tmp_path, "data = bytearray(50 * 1024 * 1024)\nprint('solved')\n"
+    )
+    lines = result.stdout.splitlines()
+
+    assert result.returncode == 0
+    assert lines[0] == "solved"
+    stats = parse_stats_line(lines[-1])
+    assert stats["exit_code"] == 0
+    assert stats["peak_memory_mb"] >= 50
+    assert stats["cpu_time"] >= 0
+
+
+def test_runner_keeps_exit_code(tmp_path):
+    result = run_in_workspace(tmp_path, "raise SystemExit(3)\n")
+
+    assert result.returncode == 3
+    assert parse_stats_line(result.stdout.splitlines()[-1])["exit_code"] == 3
+
+
+def test_killed_program_is_reported_like_docker(tmp_path):
+    result = run_in_workspace(
+        tmp_path, "import os, signal\nos.kill(os.getpid(), signal.SIGKILL)\n"
+    )
+
+    assert result.returncode == KILLED_EXIT_CODE
+    stats = parse_stats_line(result.stdout.splitlines()[-1])
+    assert stats["exit_code"] == KILLED_EXIT_CODE
+    assert was_killed(stats["exit_code"]) and was_killed(-9)
+    assert not was_killed(1)
+
+
+def test_normal_output_is_not_stats():
+    assert parse_stats_line("Objective value: 12") is None
+
+
+def address_space_limit(**options):
+    # RLIMIT_AS seen by a child process started with process_limits
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import resource; print(resource.getrlimit(resource.RLIMIT_AS)[0])",
+        ],
+        preexec_fn=process_limits(**options),
+        capture_output=True,
+        text=True,
+    )
+    return int(result.stdout)
+
+
+def test_address_space_limit_is_opt_in():
+    import resource
+
+    assert address_space_limit(address_space_factor=0) == resource.RLIM_INFINITY
+    assert address_space_limit(address_space_factor=4) == 4 * memory_limit_bytes()
@@ -0,0 +1,76 @@
+# pytest -s tests/utils/test_llm_cache.py
+import time
+
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from schemas import Code
+from utils.llm_cache import CachedChatModel, LLMCache
+
+## THIS PURPOSE IS TO CHECK THAT REPEATED PROMPTS ARE ANSWERED FROM THE CACHE
+
+
+class StructuredStub:
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, prompt):
+        self.calls += 1
+        return Code(python_code=f"print({self.calls})", requirements="pandas")
+
+
+class StubModel:
+    model_name = "stub"
+    temperature = 0
+
+    def __init__(self):
+        self.structured = StructuredStub()
+
+    def with_structured_output(self, schema):
+        return self.structured
+
+
+@pytest.mark.asyncio
+async def test_streamed_response_is_cached(tmp_path):
+    cache = LLMCache(path=str(tmp_path / "cache.sqlite"))
+    model = CachedChatModel(
+        FakeListChatModel(responses=["first answer", "second answer"]), cache
+    )
+
+    async def collect(prompt):
+        return "".join([chunk.content async for chunk in model.astream(prompt)])
+
+    assert await collect("prompt") == "first answer"
+    assert await collect("prompt") == "first answer"
+    assert await collect("other prompt") == "second answer"
+    assert cache.stats() == {"hits": 1, "misses": 2, "entries": 2}
+
+
+def test_structured_output_is_cached_per_schema(tmp_path):
+    cache = LLMCache(path=str(tmp_path / "cache.sqlite"))
+    stub = StubModel()
+    model = CachedChatModel(stub, cache)
+
+    first = model.with_structured_output(Code).invoke("generate code")
+    second = model.with_structured_output(Code).invoke("generate code")
+
+    assert first == second
+    assert stub.structured.calls == 1
+
+
+def test_cache_survives_restart(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    LLMCache(path=path).set("key", "value")
+
+    assert LLMCache(path=path).get("key") == "value"
+
+
+def test_expired_and_least_recently_used_entries_are_dropped(tmp_path):
+    cache = LLMCache(path=str(tmp_path / "cache.sqlite"), ttl=0.05, max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")
+    cache.set("c", "3")
+
+    assert cache.get("b") is None  # Least recently used
+    time.sleep(0.1)
+    assert cache.get("a") is None  # Expired
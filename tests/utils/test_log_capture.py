@@ -0,0 +1,60 @@
+# pytest -s tests/utils/test_log_capture.py
+from utils import Workspace
+from utils.log_capture import RUN_LOG_FILE, LogCapture, LogStream
+
+## THIS PURPOSE IS TO TEST THAT CAPTURED OUTPUT STAYS WITHIN ITS BYTE BUDGET
+
+
+def test_head_and_tail_are_kept():
+    stream = LogStream(head_bytes=30, tail_bytes=30)
+    for number in range(1000):
+        stream.add(f"iteration {number}\n")
+
+    text = stream.text()
+
+    assert text.startswith("iteration 0\niteration 1\n")
+    assert text.endswith("iteration 998\niteration 999\n")
+    assert "lines" in text and "omitted" in text
+    assert len(text) < 150
+    assert stream.total_bytes > 10000
+
+
+def test_budget_counts_utf8_bytes():
+    stream = LogStream(head_bytes=20, tail_bytes=30)
+    for number in range(100):
+        stream.add(f"hävikki {number} mm²\n")
+
+    text = stream.text()
+    head, tail = text.split("omitted ...]\n")
+
+    assert len(head.split("\n[")[0].encode("utf-8")) <= 20
+    assert len(tail.encode("utf-8")) <= 30
+    assert stream.total_bytes == sum(
+        len(f"hävikki {number} mm²\n".encode("utf-8")) for number in range(100)
+    )
+
+
+def test_repeated_lines_are_collapsed():
+    stream = LogStream(head_bytes=1000, tail_bytes=1000)
+    stream.add("Downloading...\n")
+    for _ in range(500):
+        stream.add("Downloading...\n")
+    stream.add("Done\n")
+
+    assert stream.text() == (
+        "Downloading...\n[previous line repeated 500 more times]\nDone\n"
+    )
+
+
+def test_full_output_is_spilled(tmp_path):
+    workspace = Workspace(session_id="session", root=str(tmp_path)).create()
+    capture = LogCapture(workspace, head_bytes=10, tail_bytes=10)
+    for number in range(100):
+        capture.run.add(f"line {number}\n")
+    capture.build.add("Step 1/3\n")
+    capture.close()
+
+    with open(workspace.file_path(RUN_LOG_FILE), encoding="utf-8") as f:
+        assert f.read().count("\n") == 100
+    assert f"full output in {RUN_LOG_FILE}" in capture.run.text()
+    assert capture.build.text() == "Step 1/3\n"
@@ -0,0 +1,36 @@
+# pytest -s tests/utils/test_performance.py
+from schemas import ExecutionStats
+from utils.performance import build_metrics, format_metrics, solver_status
+
+## THIS PURPOSE IS TO CHECK THAT EXECUTION MEASUREMENTS END UP IN THE RESULT METRICS
+
+
+def test_solver_status_from_pulp_output():
+    output = "Welcome to the CBC MILP Solver\nStatus: Optimal\nObjective: 12.0\n"
+
+    assert solver_status(output) == "Optimal"
+
+
+def test_solver_status_from_cbc_log():
+    output = "Result - Optimal solution found\n\nObjective value: 3.0\n"
+
+    assert solver_status(output) == "Optimal solution found"
+
+
+def test_metrics_from_execution_stats():
+    stats = ExecutionStats(wall_time=2.5, cpu_time=2.0, peak_memory_mb=120.0)
+
+    metrics = build_metrics(stats, "Solution status: FEASIBLE\n")
+
+    assert metrics.runtime_seconds == 2.5
+    assert metrics.peak_memory_mb == 120.0
+    assert metrics.solver_status == "FEASIBLE"
+    assert "Runtime: 2.50 s" in format_metrics(metrics)
+
+
+def test_missing_measurements():
+    metrics = build_metrics(None, "no status here")
+
+    assert metrics.runtime_seconds is None
+    assert metrics.solver_status is None
+    assert format_metrics(None) == "Not measured."
@@ -0,0 +1,60 @@
+# pytest -s tests/utils/test_process.py
+import asyncio
+import sys
+import time
+
+import pytest
+from utils.process import read_lines, run_streaming, spawn_process
+
+## THIS PURPOSE IS TO CHECK THAT SUBPROCESS OUTPUT IS READ WITHOUT BLOCKING THE EVENT LOOP
+
+
+@pytest.mark.asyncio
+async def test_read_lines_streams_output(tmp_path):
+    command = [sys.executable, "-c", "print('first'); print('second')"]
+    process = await spawn_process(command, str(tmp_path))
+
+    lines = [line async for line in read_lines(process)]
+    await process.wait()
+
+    assert [line.strip() for line in lines] == ["first", "second"]
+    assert process.returncode == 0
+
+
+@pytest.mark.asyncio
+async def test_processes_do_not_block_each_other(tmp_path):
+    command = [sys.executable, "-c", "import time; time.sleep(0.5); print('done')"]
+
+    async def run():
+        process = await spawn_process(command, str(tmp_path))
+        lines = [line async for line in read_lines(process)]
+        await process.wait()
+        return lines
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(run() for _ in range(4)))
+    elapsed = time.perf_counter() - start
+
+    assert all(lines == ["done\n"] for lines in results)
+    # Four sequential runs would take at least two seconds
+    assert elapsed < 1.5
+
+
+@pytest.mark.asyncio
+async def test_run_streaming_kills_process_on_timeout(tmp_path):
+    command = [
+        sys.executable,
+        "-c",
+        "import time; print('started', flush=True); time.sleep(30)",
+    ]
+    lines = []
+
+    async def on_line(line):
+        lines.append(line)
+
+    start = time.perf_counter()
+    with pytest.raises(asyncio.TimeoutError):
+        await run_streaming(command, str(tmp_path), on_line, timeout=0.5)
+
+    assert time.perf_counter() - start < 5
+    assert lines == ["started\n"]
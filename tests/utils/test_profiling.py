@@ -0,0 +1,48 @@
+# pytest -s tests/utils/test_profiling.py
+import subprocess
+import sys
+
+from utils.limits import parse_stats_line, write_runner
+from utils.profiling import format_profile_report, parse_profile_line, write_profiler
+from utils.workspace import Workspace
+
+## THIS PURPOSE IS TO CHECK THAT THE PROFILER FINDS THE HOT SPOT OF THE GENERATED CODE
+
+slow_code = """def slow_part():
+    return sum(i * i for i in range(200000))
+
+
+def fast_part():
+    return 1
+
+
+blocks = [bytearray(1024 * 1024) for _ in range(5)]
+print(slow_part() + fast_part())
+"""
+
+
+def test_profiler_reports_hot_functions_and_allocations(tmp_path):
+    workspace = Workspace(session_id="profile", root=str(tmp_path))
+    workspace.write_file("generated.py", slow_code)
+    command = write_runner(workspace, write_profiler(workspace))
+
+    result = subprocess.run(
+        [sys.executable, *command[1:]],
+        cwd=workspace.path,
+        capture_output=True,
+        text=True,
+    )
+    lines = result.stdout.splitlines()
+
+    assert result.returncode == 0
+    assert lines[0] == "2666646666700001"
+    report = parse_profile_line(lines[1])
+    assert parse_stats_line(lines[2]) is not None
+
+    functions = [entry["function"] for entry in report["functions"]]
+    assert "generated.py:1(slow_part)" in functions
+    assert report["peak_traced_mb"] >= 5
+
+    text = format_profile_report(report)
+    assert "slow_part" in text
+    assert "Allocation peaks" in text
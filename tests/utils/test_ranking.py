@@ -0,0 +1,95 @@
+# pytest -s tests/utils/test_ranking.py
+import pytest
+
+from schemas import OutputOfCode, PerformanceMetrics, Purpose
+from tests.benchmarks.workflow import PURPOSE
+from utils.ranking import (
+    best_candidate,
+    is_ambiguous,
+    objective_direction,
+    rank_results,
+    ranking_reason,
+)
+
+## THIS PURPOSE IS TO TEST THE DETERMINISTIC CHOICE OF THE BEST RESULT
+
+
+def result(objective_value, goal="True, all orders are fulfilled.", runtime=None):
+    return OutputOfCode(
+        answer="",
+        answer_description="",
+        improvement="",
+        objective_value=objective_value,
+        explanation="",
+        is_goal_achieved=goal,
+        metrics=PerformanceMetrics(runtime_seconds=runtime),
+    )
+
+
+def test_direction():
+    results = [result(1000), result(900), result(None), result(1100)]
+    assert rank_results(results, "minimize") == [1, 0, 3, 2]
+    assert rank_results(results, "maximize") == [3, 0, 1, 2]
+    assert best_candidate([]) is None
+
+
+def test_ties_break_on_goal_then_runtime():
+    results = [
+        result(900, goal="False, one order is missing."),
+        result(900, runtime=4.0),
+        result(900, runtime=2.5),
+    ]
+    assert rank_results(results, by_runtime=True) == [2, 1, 0]
+    # Without runtime the earlier of the equal results wins
+    assert rank_results(results, by_runtime=False) == [1, 2, 0]
+    assert "ran fastest" in ranking_reason(results, 2)
+
+
+def test_equal_results_keep_their_own_index():
+    # results.index() would return 0 for both equal results
+    results = [result(900), result(900)]
+    assert rank_results(results, by_runtime=False) == [0, 1]
+
+
+def test_ambiguous_only_without_comparable_values():
+    assert is_ambiguous([result(None), result(float("nan"))])
+    assert not is_ambiguous([result(None), result(1200)])
+    assert not is_ambiguous([result(None)])
+    assert ranking_reason([result(1200)], 0).startswith("Optimization 1 is the only")
+
+
+def test_direction_of_the_run():
+    maximize = PURPOSE.model_copy(update={"objective_direction": "maximize"})
+
+    assert objective_direction({"purpose": PURPOSE}) == "minimize"  # Not given
+    assert objective_direction({"purpose": maximize}) == "maximize"
+    # The batch job option wins over the problem analysis
+    state = {"purpose": maximize, "objectiveDirection": "minimize"}
+    assert objective_direction(state) == "minimize"
+    assert best_candidate([result(900), result(1200)], "maximize") == 1
+
+
+def test_unknown_direction_is_an_error():
+    with pytest.raises(ValueError, match="maximise"):
+        rank_results([result(900)], "maximise")
+    with pytest.raises(ValueError):
+        objective_direction({"objectiveDirection": "max"})
+
+
+@pytest.mark.parametrize(
+    "value, direction",
+    [
+        (" Maximize", "maximize"),
+        ("minimise", "minimize"),
+        ("MAX", "maximize"),
+        ("biggest", None),
+        (1, None),
+    ],
+)
+def test_llm_direction_is_normalized(value, direction):
+    # An unknown wording must not fail the problem analysis, the default takes over
+    purpose = Purpose(**{**PURPOSE.model_dump(), "objective_direction": value})
+
+    assert purpose.objective_direction == direction
+    if direction is None:
+        assert objective_direction({"purpose": purpose}) == "minimize"
@@ -0,0 +1,61 @@
+# pytest -s tests/utils/test_result_file.py
+import json
+
+from schemas import ProgramResult
+from utils import Workspace
+from utils.result_file import (
+    RESULT_FILE,
+    clear_result_file,
+    output_from_result,
+    read_result_file,
+    summarize_for_analysis,
+)
+
+## THIS PURPOSE IS TO TEST READING THE RESULT FILE WRITTEN BY THE GENERATED PROGRAM
+
+
+def workspace_with(tmp_path, content):
+    workspace = Workspace(session_id="session", root=str(tmp_path)).create()
+    if content is not None:
+        workspace.write_file(RESULT_FILE, content)
+    return workspace
+
+
+def test_valid_result_file(tmp_path):
+    data = {"objective_value": 900, "status": "Optimal", "solution": [1, 2]}
+    workspace = workspace_with(tmp_path, json.dumps(data))
+
+    result, error = read_result_file(workspace)
+
+    assert error is None
+    assert result.objective_value == 900
+    assert result.solver_stats == {}
+    clear_result_file(workspace)
+    assert read_result_file(workspace) == (None, None)
+
+
+def test_invalid_result_files(tmp_path):
+    for content in ("not json", "[1, 2]", '{"objective_value": "a lot"}'):
+        result, error = read_result_file(workspace_with(tmp_path, content))
+        assert result is None
+        assert RESULT_FILE in error
+
+
+def test_summary_is_short(tmp_path):
+    result = ProgramResult(objective_value=900, status="Optimal", solution="x" * 10000)
+    output = "Building...\n" * 5000 + "Total waste: 900\n"
+
+    summary = summarize_for_analysis(result, output, limit=500)
+
+    assert len(summary) < 1500
+    assert "Objective value: 900" in summary
+    assert summary.endswith("Total waste: 900\n")
+
+
+def test_output_without_llm():
+    solved = output_from_result(ProgramResult(objective_value=900, status="Optimal"))
+    failed = output_from_result(ProgramResult(status="Infeasible"))
+
+    assert solved.objective_value == 900
+    assert solved.is_goal_achieved.startswith("True")
+    assert failed.is_goal_achieved.startswith("False")
@@ -0,0 +1,69 @@
+# pytest -s tests/utils/test_static_checks.py
+from utils.static_checks import preflight_check, preflight_report
+
+## THIS PURPOSE IS TO CATCH BROKEN CODE BEFORE IT IS BUILT INTO A DOCKER IMAGE
+
+requirements = "pandas\nopenpyxl\nPuLP"
+
+
+def test_valid_code_passes():
+    code = """import json
+import pandas as pd
+from pulp import LpProblem, LpMinimize
+
+def solve(data):
+    problem = LpProblem("test", LpMinimize)
+    return [row for row in data if row]
+
+print(json.dumps(solve([1, 0, 2])))
+"""
+
+    assert preflight_check(code, requirements) == []
+
+
+def test_syntax_error_is_reported_with_line():
+    errors = preflight_check("x = 1\nif x == 1\n    print(x)\n", requirements)
+
+    assert len(errors) == 1
+    assert "line 2" in errors[0]
+    assert "SyntaxError" in errors[0]
+
+
+def test_undefined_name_is_reported():
+    # Same mistake as in the code fixer test: pulp is used but only names from it are imported
+    code = """from pulp import LpProblem, LpMaximize
+problem = LpProblem("CuttingStockProblem", LpMaximize)
+print("Total utilized material:", pulp.value(problem.objective))
+"""
+
+    errors = preflight_check(code, requirements)
+
+    assert errors == [
+        "File \"generated.py\", line 3\nNameError: name 'pulp' is not defined"
+    ]
+
+
+def test_import_missing_from_requirements():
+    code = "import numpy as np\nimport sklearn\nimport yaml\nprint(np, sklearn, yaml)\n"
+
+    errors = preflight_check(code, "numpy\nPyYAML")
+
+    assert len(errors) == 1
+    assert "scikit-learn" in errors[0]
+
+
+def test_local_modules_are_allowed():
+    code = "import helpers\nprint(helpers.run())\n"
+
+    assert preflight_check(code, "", local_modules={"helpers"}) == []
+
+
+def test_dependencies_of_listed_packages_are_warnings():
+    code = "import numpy as np\nimport pkg_resources\nimport networkx\nprint(np, networkx)\n"
+
+    errors, warnings = preflight_report(code, "pandas")
+
+    assert len(errors) == 1 and "networkx" in errors[0]
+    assert warnings == [
+        "Line 1: 'numpy' is not in requirements.txt, expecting it to be installed by pandas"
+    ]
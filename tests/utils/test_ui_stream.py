@@ -0,0 +1,72 @@
+# pytest -s tests/utils/test_ui_stream.py
+import asyncio
+
+import pytest
+
+from utils.ui_stream import TokenStreamer
+
+## THIS PURPOSE IS TO TEST THAT TOKENS ARE SENT TO THE UI IN BATCHES
+
+
+class FakeStep:
+    def __init__(self):
+        self.messages = []
+
+    async def stream_token(self, token):
+        self.messages.append(token)
+
+
+def stream(tokens, **limits):
+    step = FakeStep()
+
+    async def run():
+        async with TokenStreamer(step, **limits) as streamer:
+            for token in tokens:
+                await streamer.send(token)
+
+    asyncio.run(run())
+    return step.messages
+
+
+def test_tokens_are_coalesced_by_size():
+    tokens = ["abcd"] * 1000
+    messages = stream(tokens, interval=3600, max_bytes=400)
+
+    assert "".join(messages) == "".join(tokens)
+    assert len(messages) == 10
+
+
+def test_rest_is_sent_on_exit():
+    assert stream(["a", "b", "", "c"], interval=3600, max_bytes=400) == ["abc"]
+
+
+def test_rest_is_sent_on_error():
+    step = FakeStep()
+
+    async def run():
+        async with TokenStreamer(step, interval=3600) as streamer:
+            await streamer.send("partial")
+            raise RuntimeError("LLM failed")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(run())
+    assert step.messages == ["partial"]
+
+
+def test_zero_interval_sends_every_token():
+    assert stream(["a", "b"], interval=0) == ["a", "b"]
+
+
+def test_lone_token_is_sent_by_the_deadline():
+    step = FakeStep()
+
+    async def run():
+        async with TokenStreamer(step, interval=0.05) as streamer:
+            await streamer.send("Solving model...\n")
+            assert step.messages == []
+            # No further token, e.g. a long solve after the log line
+            await asyncio.sleep(0.2)
+            assert step.messages == ["Solving model...\n"]
+
+    asyncio.run(run())
+    assert step.messages == ["Solving model...\n"]
@@ -0,0 +1,65 @@
+# pytest -s tests/utils/test_venv_executor.py
+import asyncio
+import time
+
+import pytest
+
+from utils import Workspace
+from utils.executors import VenvExecutor
+from utils.limits import parse_stats_line
+from utils.venv_cache import VenvCache
+
+## THIS PURPOSE IS TO RUN GENERATED CODE IN A CACHED VIRTUALENV WITHOUT DOCKER
+## ONLY CODE WITHOUT REQUIREMENTS IS RUN, SO NO NETWORK IS NEEDED
+
+
+async def run_code(tmp_path, code, timeout=None):
+    workspace = Workspace(session_id="session", root=str(tmp_path)).create()
+    workspace.write_file("generated.py", code)
+    workspace.write_file("requirements.txt", "No requirements provided")
+    executor = VenvExecutor(VenvCache(str(tmp_path / "venvs")))
+    build, output = [], []
+
+    async def on_output(line):
+        build.append(line)
+
+    async def on_line(line):
+        output.append(line)
+
+    returncode = await executor.run(
+        workspace, "generated.py", on_output, on_line, lambda: None, timeout
+    )
+    return returncode, build, output, executor
+
+
+@pytest.mark.asyncio
+async def test_runs_code_and_reports_stats(tmp_path, monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "secret")
+    code = 'import os\nprint("Total waste:", 1200)\nprint(os.environ.get("OPENAI_API_KEY"))\n'
+
+    returncode, _, output, executor = await run_code(tmp_path, code)
+
+    assert returncode == 0
+    assert output[:2] == ["Total waste: 1200\n", "None\n"]
+    stats = parse_stats_line(output[-1].strip())
+    assert stats["exit_code"] == 0 and stats["peak_memory_mb"] > 0
+
+    # Same requirements, the virtualenv is reused
+    _, build, _, _ = await run_code(tmp_path, code)
+    assert build[0].startswith("Using cached virtualenv")
+
+
+@pytest.mark.asyncio
+async def test_failing_code_returns_exit_code(tmp_path):
+    returncode, _, output, _ = await run_code(tmp_path, "print(totl_waste)\n")
+
+    assert returncode == 1
+    assert any("NameError" in line for line in output)
+
+
+@pytest.mark.asyncio
+async def test_timeout_kills_the_program(tmp_path):
+    started = time.monotonic()
+    with pytest.raises(asyncio.TimeoutError):
+        await run_code(tmp_path, "import time\ntime.sleep(30)\n", timeout=0.5)
+    assert time.monotonic() - started < 10
@@ -0,0 +1,35 @@
+# pytest -s tests/utils/test_wheelhouse.py
+from utils import wheelhouse
+from utils.wheelhouse import build_context_args, pip_install_line, pip_options
+
+## THIS PURPOSE IS TO CHECK HOW IMAGE BUILDS USE THE LOCAL WHEELHOUSE AND PIP CACHE
+
+
+def test_install_line_mounts_wheelhouse_and_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(wheelhouse, "WHEELHOUSE_DIR", str(tmp_path / "wheels"))
+    line = pip_install_line()
+
+    assert "--mount=type=cache,target=/root/.cache/pip" in line
+    assert "--mount=type=bind,from=wheelhouse,target=/wheelhouse" in line
+    assert "--find-links /wheelhouse" in line
+    assert "--no-index" not in line
+    assert build_context_args(line) == [
+        "--build-context",
+        f"wheelhouse={tmp_path / 'wheels'}",
+    ]
+
+
+def test_offline_installs_only_from_wheelhouse(monkeypatch):
+    monkeypatch.setattr(wheelhouse, "WHEELHOUSE_OFFLINE", True)
+    assert pip_options("/wheelhouse") == ["--find-links", "/wheelhouse", "--no-index"]
+
+
+def test_without_buildkit_or_wheelhouse(monkeypatch):
+    monkeypatch.setattr(wheelhouse, "WHEELHOUSE_DIR", "")
+    assert pip_install_line() == (
+        "RUN --mount=type=cache,target=/root/.cache/pip pip install -r requirements.txt"
+    )
+    assert build_context_args(pip_install_line()) == []
+
+    monkeypatch.setattr(wheelhouse, "BUILDKIT_PIP_CACHE", False)
+    assert pip_install_line() == "RUN pip install --no-cache-dir -r requirements.txt"
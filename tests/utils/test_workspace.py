@@ -0,0 +1,61 @@
+# pytest -s tests/utils/test_workspace.py
+import os
+
+import pytest
+
+from utils.workspace import Workspace
+
+## THIS PURPOSE IS TO CHECK THAT SESSIONS GET SEPARATE DIRECTORIES AND COMPOSE PROJECTS
+
+
+def test_sessions_are_isolated(tmp_path):
+    first = Workspace(session_id="Thread-1", root=str(tmp_path)).create()
+    second = Workspace(session_id="thread-2", root=str(tmp_path)).create()
+
+    first.write_file("generated.py", "print('first')")
+    second.write_file("generated.py", "print('second')")
+
+    assert first.path != second.path
+    assert first.project_name != second.project_name
+    with open(first.file_path("generated.py"), encoding="utf-8") as f:
+        assert f.read() == "print('first')"
+
+
+def test_project_name_is_valid_for_compose(tmp_path):
+    workspace = Workspace(session_id="A b/../C:1", root=str(tmp_path))
+
+    assert workspace.project_name == "optimizer-abc1"
+    assert workspace.compose_command("up")[:3] == [
+        "docker-compose",
+        "-p",
+        "optimizer-abc1",
+    ]
+
+
+def test_compose_file_has_no_fixed_container_name(tmp_path):
+    workspace = Workspace(session_id="session", root=str(tmp_path))
+    workspace.write_compose_file(
+        "services:\n  app:\n    build: .\n    container_name: my-python-app\n    command: python /app/generated.py\n"
+    )
+
+    with open(workspace.file_path("compose.yaml"), encoding="utf-8") as f:
+        content = f.read()
+
+    assert "container_name" not in content
+    assert "command: python /app/generated.py" in content
+
+
+def test_uploads_stay_in_the_workspace(tmp_path):
+    workspace = Workspace(session_id="session", root=str(tmp_path / "root"))
+    source = tmp_path / "upload.xlsx"
+    source.write_bytes(b"data")
+
+    assert workspace.copy_file(str(source), "../x.py") == "x.py"
+    assert workspace.copy_file(str(source), "/etc/orders.xlsx") == "orders.xlsx"
+    assert workspace.copy_file(str(source), "..\\..\\win.py") == "win.py"
+    assert sorted(os.listdir(workspace.path)) == ["orders.xlsx", "win.py", "x.py"]
+    assert not (tmp_path / "root" / "x.py").exists()
+
+    for name in ["", "..", ".env", "dir/"]:
+        with pytest.raises(ValueError, match="Invalid file name"):
+            workspace.copy_file(str(source), name)
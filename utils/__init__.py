@@ -0,0 +1 @@
+from .workspace import Workspace, WORKSPACES_ROOT
@@ -0,0 +1,199 @@
+# utils/base_image.py
+# Prebuilt optimization base image with the solver stack most generated programs use.
+# The image is built once from the versioned spec in base_image/requirements.txt and tagged
+# with a hash of the spec, so changing the spec gives a new image. Code whose requirements
+# are all satisfied by the spec runs directly in the base image without any build.
+#
+# python -m utils.base_image  # build the base image ahead of the first run
+import asyncio
+import hashlib
+import os
+import re
+import shutil
+
+from packaging.requirements import InvalidRequirement, Requirement
+
+from schemas import Code, DockerFiles
+from .docker_templates import DOCKER_PYTHON_IMAGE, requirement_lines
+from .process import run_captured, run_streaming
+from .wheelhouse import build_context_args, pip_install_line
+from .workspace import WORKSPACES_ROOT
+
+BASE_IMAGE = os.getenv("BASE_IMAGE", "true").lower() in ("1", "true", "yes")
+BASE_IMAGE_SPEC = os.getenv(
+    "BASE_IMAGE_SPEC",
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        "base_image",
+        "requirements.txt",
+    ),
+)
+BASE_IMAGE_REPOSITORY = "optimizer-base"
+BASE_IMAGE_BUILD_DIR = os.path.join(WORKSPACES_ROOT, ".base_image")
+
+
+def canonical_name(name: str) -> str:
+    # PEP 503, "PuLP", "pulp" and "Pulp" are the same package
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def read_spec(path=BASE_IMAGE_SPEC) -> str:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+    except OSError:
+        return ""
+
+
+def spec_versions(spec: str) -> dict:
+    """Pinned package versions of the spec, keyed by the canonical package name."""
+    versions = {}
+    for line in requirement_lines(spec):
+        requirement = Requirement(line)
+        pins = [s.version for s in requirement.specifier if s.operator == "=="]
+        if pins:
+            versions[canonical_name(requirement.name)] = pins[0]
+    return versions
+
+
+def base_image_tag(spec: str) -> str:
+    # Same spec on the same Python image = same image
+    digest = hashlib.sha256()
+    digest.update(DOCKER_PYTHON_IMAGE.encode())
+    digest.update(b"\0")
+    digest.update("\n".join(requirement_lines(spec)).encode())
+    return f"{BASE_IMAGE_REPOSITORY}:{digest.hexdigest()[:16]}"
+
+
+def covered_by_base_image(requirements: str, spec: str) -> bool:
+    """Check if every requirement of the code is already installed in the base image."""
+    versions = spec_versions(spec)
+    if not versions:
+        return False
+    for line in requirement_lines(requirements):
+        try:
+            requirement = Requirement(line)
+        except InvalidRequirement:
+            return False
+        # Extras and markers may pull in packages the image doesn't have
+        if requirement.extras or requirement.marker or requirement.url:
+            return False
+        version = versions.get(canonical_name(requirement.name))
+        if version is None or not requirement.specifier.contains(
+            version, prereleases=True
+        ):
+            return False
+    return True
+
+
+def base_image_docker_files(code: Code, spec=None):
+    """
+    Docker files that run the code directly in the base image.
+
+    Returns:
+    - DockerFiles without a pip install step, None if the base image is disabled or
+      doesn't satisfy the requirements.
+    """
+    spec = read_spec() if spec is None else spec
+    if not BASE_IMAGE or not covered_by_base_image(code.requirements, spec):
+        return None
+    lines = [
+        f"FROM {base_image_tag(spec)}",
+        "WORKDIR /app",
+        "COPY . .",
+        'CMD ["python", "generated.py"]',
+    ]
+    compose_file = "services:\n  app:\n    build: .\n    command: python generated.py\n"
+    return DockerFiles(dockerfile="\n".join(lines) + "\n", compose_file=compose_file)
+
+
+def base_image_of(dockerfile: str, spec=None):
+    # The base image tag when the Dockerfile only copies the code on top of it
+    spec = read_spec() if spec is None else spec
+    tag = base_image_tag(spec)
+    images = re.findall(r"(?im)^\s*FROM\s+(\S+)", dockerfile)
+    if images != [tag] or re.search(r"(?im)^\s*RUN\b", dockerfile):
+        return None
+    return tag
+
+
+class BaseImage:
+    def __init__(self, spec_path=BASE_IMAGE_SPEC, build_dir=BASE_IMAGE_BUILD_DIR):
+        self.spec_path = spec_path
+        self.build_dir = build_dir
+        self.lock = asyncio.Lock()
+        self.ready = set()  # Tags known to exist, checked once per process
+
+    async def ensure(self, on_line, engine=None) -> str:
+        """
+        Make sure the base image of the current spec exists, building it only once.
+
+        Parameters:
+        - on_line: Async callback that receives build output line by line.
+        - engine: DockerEngine for the existence check, the docker CLI when None.
+
+        Returns:
+        - Tag of the base image.
+        """
+        spec = read_spec(self.spec_path)
+        tag = base_image_tag(spec)
+        async with self.lock:
+            if tag in self.ready:
+                return tag
+            if engine is not None:
+                exists = await engine.image_exists(tag)
+            else:
+                returncode, _ = await run_captured(["docker", "image", "inspect", tag])
+                exists = returncode == 0
+            if exists:
+                await on_line(f"Using base image {tag}\n")
+            else:
+                await on_line(f"Building base image {tag}\n")
+                shutil.rmtree(self.build_dir, ignore_errors=True)
+                os.makedirs(self.build_dir)
+                dockerfile = "\n".join(
+                    [
+                        f"FROM {DOCKER_PYTHON_IMAGE}",
+                        "WORKDIR /app",
+                        "COPY requirements.txt .",
+                        pip_install_line(),
+                    ]
+                )
+                with open(
+                    os.path.join(self.build_dir, "Dockerfile"), "w", encoding="utf-8"
+                ) as f:
+                    f.write(dockerfile + "\n")
+                with open(
+                    os.path.join(self.build_dir, "requirements.txt"),
+                    "w",
+                    encoding="utf-8",
+                ) as f:
+                    f.write("\n".join(requirement_lines(spec)) + "\n")
+                returncode = await run_streaming(
+                    [
+                        "docker",
+                        "build",
+                        *build_context_args(dockerfile),
+                        "-t",
+                        tag,
+                        ".",
+                    ],
+                    self.build_dir,
+                    on_line,
+                )
+                if returncode != 0:
+                    raise Exception("Base image build failed")
+            self.ready.add(tag)
+        return tag
+
+
+# Shared by all sessions in the server process
+base_image = BaseImage()
+
+
+if __name__ == "__main__":
+
+    async def print_line(line):
+        print(line, end="")
+
+    asyncio.run(base_image.ensure(print_line))
@@ -0,0 +1,75 @@
+# utils/candidates.py
+# Several candidate solutions per optimization round.
+# Each candidate is generated with its own LLM call and runs in its own workspace,
+# so all of them can be built and executed at the same time.
+import asyncio
+import os
+import shutil
+
+from .image_cache import OVERRIDE_FILE
+from .limits import RUNNER_FILE
+from .log_capture import BUILD_LOG_FILE, RUN_LOG_FILE
+from .profiling import PROFILER_FILE
+from .result_file import RESULT_FILE
+from .workspace import Workspace
+
+CANDIDATES_PER_ROUND = int(os.getenv("CANDIDATES_PER_ROUND", "1"))  # 1 = one solution
+
+# Files written for a run, everything else in a workspace is input data
+GENERATED_FILES = {
+    "generated.py",
+    "requirements.txt",
+    "Dockerfile",
+    "compose.yaml",
+    OVERRIDE_FILE,
+    RUNNER_FILE,
+    PROFILER_FILE,
+    RESULT_FILE,
+    BUILD_LOG_FILE,
+    RUN_LOG_FILE,
+}
+
+
+def candidates_per_round(state) -> int:
+    # The state can ask for a different number than the default, e.g. in batch runs
+    return max(1, state.get("candidatesPerRound") or CANDIDATES_PER_ROUND)
+
+
+def variant_hint(index: int, count: int) -> str:
+    # Added to the prompt of every candidate but the first, so the candidates differ
+    if index == 0:
+        return ""
+    return (
+        f"\n\nThis is candidate solution {index + 1} of {count}. "
+        "Use a clearly different approach, algorithm or solver settings than the obvious "
+        "first solution, so that the candidates explore different solutions."
+    )
+
+
+def candidate_workspace(workspace: Workspace, index: int) -> Workspace:
+    """Create a separate workspace for a candidate, with the input data of the session."""
+    candidate = Workspace(
+        session_id=f"{workspace.session_id}-candidate-{index + 1}", root=workspace.root
+    ).create()
+    for name in os.listdir(workspace.create().path):
+        source = workspace.file_path(name)
+        if name not in GENERATED_FILES and os.path.isfile(source):
+            shutil.copyfile(source, candidate.file_path(name))
+    return candidate
+
+
+async def generate_candidates(generate, count: int) -> list:
+    """
+    Call `generate(index)` for every candidate at the same time.
+
+    Returns:
+    - The generated candidates, failed generations are left out.
+      The first error is raised when every generation failed.
+    """
+    responses = await asyncio.gather(
+        *(generate(index) for index in range(count)), return_exceptions=True
+    )
+    candidates = [r for r in responses if not isinstance(r, BaseException)]
+    if not candidates:
+        raise responses[0]
+    return candidates
@@ -0,0 +1,61 @@
+# utils/checkpoints.py
+# Persistent LangGraph checkpoints, so that an interrupted run continues from the last
+# completed node instead of starting again from the problem analysis.
+# Every chat thread (or batch job) is one LangGraph thread, the state after each node
+# is stored in a local SQLite database.
+import os
+
+import aiosqlite
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+from .workspace import WORKSPACES_ROOT
+
+# "" = checkpoints disabled
+CHECKPOINT_DB = os.getenv(
+    "CHECKPOINT_DB", os.path.join(WORKSPACES_ROOT, "checkpoints.sqlite")
+)
+
+
+async def open_checkpointer(path=CHECKPOINT_DB):
+    """
+    Open the checkpoint database, must be called in the event loop that runs the graph.
+
+    Returns:
+    - AsyncSqliteSaver for workflow.compile(), None when checkpoints are disabled.
+    """
+    if not path:
+        return None
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = await aiosqlite.connect(path)
+    checkpointer = AsyncSqliteSaver(conn)
+    await checkpointer.setup()
+    return checkpointer
+
+
+def thread_config(thread_id: str, **config) -> dict:
+    # Checkpoints are keyed by the thread id of the run config
+    return {**config, "configurable": {"thread_id": thread_id}}
+
+
+async def unfinished_run(app, config: dict):
+    """
+    Check whether the last run of the thread stopped before the end of the graph.
+
+    Returns:
+    - State snapshot of the interrupted run, None if there is nothing to resume.
+    """
+    if app.checkpointer is None:
+        return None
+    snapshot = await app.aget_state(config)
+    return snapshot if snapshot.next else None
+
+
+async def clear_thread(checkpointer: AsyncSqliteSaver, thread_id: str):
+    # A new run of the thread must not continue with the state of the previous one
+    await checkpointer.setup()
+    async with checkpointer.lock:
+        for table in ("checkpoints", "writes"):
+            await checkpointer.conn.execute(
+                f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,)
+            )
+        await checkpointer.conn.commit()
@@ -0,0 +1,84 @@
+# utils/code_patch.py
+# Patch mode for the code fixer.
+# Most fixes change a line or two, but returning the whole program costs thousands of output
+# tokens for a long solver. In patch mode the LLM returns search/replace edits, which are
+# applied and validated here. If they don't apply cleanly, the fixer asks for a full rewrite.
+import os
+
+from schemas import Code, CodeFix, CodePatch
+
+# "patch" = search/replace edits with full rewrite as fallback, "rewrite" = always the whole code
+CODE_FIX_MODE = os.getenv("CODE_FIX_MODE", "patch").lower()
+
+
+class PatchError(ValueError):
+    """The edits can't be applied to the code or the result is not valid Python."""
+
+
+def matching_lines(code: str, search: str):
+    """
+    Find the whole lines of the code that equal the search text when trailing whitespace
+    is ignored. The rest of the code is left as it is.
+
+    Returns:
+    - (start, end) offsets of the lines in the code, None if they don't match exactly once.
+    """
+    lines = code.splitlines(keepends=True)
+    wanted = [line.rstrip() for line in search.splitlines()]
+    starts = [
+        start
+        for start in range(len(lines) - len(wanted) + 1)
+        if all(lines[start + i].rstrip() == line for i, line in enumerate(wanted))
+    ]
+    if len(starts) != 1:
+        return None
+    start = sum(len(line) for line in lines[: starts[0]])
+    end = start + sum(len(line) for line in lines[starts[0] : starts[0] + len(wanted)])
+    if not search.endswith("\n"):
+        # Keep the line break after the last line when the search text has none
+        end = start + len(code[start:end].rstrip("\r\n"))
+    return start, end
+
+
+def apply_edits(code: str, edits) -> str:
+    """
+    Apply search/replace edits in order, each search text must match exactly once.
+
+    Returns:
+    - The patched code, PatchError if an edit doesn't apply or the result doesn't compile.
+    """
+    if not edits:
+        raise PatchError("The patch has no edits")
+    for number, edit in enumerate(edits, start=1):
+        count = code.count(edit.search) if edit.search else 0
+        if count == 1:
+            code = code.replace(edit.search, edit.replace, 1)
+            continue
+        if count == 0 and edit.search.strip():
+            # LLMs often change trailing whitespace of the copied lines
+            span = matching_lines(code, edit.search)
+            if span:
+                start, end = span
+                code = code[:start] + edit.replace + code[end:]
+                continue
+        found = "not found" if count == 0 else f"found {count} times"
+        raise PatchError(f"Search text of edit {number} {found}")
+
+    try:
+        compile(code, "generated.py", "exec")
+    except SyntaxError as e:
+        raise PatchError(f"Patched code doesn't compile: {e}")
+    return code
+
+
+def patch_to_fix(code: Code, patch: CodePatch) -> CodeFix:
+    # Same result as a full rewrite, the rest of the workflow doesn't see the difference.
+    # Unchanged requirements aren't repeated in a patch, the current ones are kept.
+    changed = patch.requirements_changed and patch.requirements is not None
+    return CodeFix(
+        fixed_python_code=apply_edits(code.python_code, patch.edits),
+        requirements=patch.requirements if changed else code.requirements,
+        requirements_changed=changed,
+        fix_description=patch.fix_description,
+        original_error=patch.original_error,
+    )
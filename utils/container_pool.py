@@ -0,0 +1,216 @@
+# utils/container_pool.py
+# Pool of pre-started, long-lived sandbox containers per dependency image.
+# Instead of create/start/teardown through docker-compose for every run, the script is copied
+# into an idle container, executed with `docker exec` and the container is reset afterwards.
+import asyncio
+import atexit
+import io
+import os
+import subprocess
+import tarfile
+import time
+from collections import defaultdict
+
+from .limits import docker_run_limits
+from .log_capture import BUILD_LOG_FILE, RUN_LOG_FILE
+from .process import run_captured, run_streaming, run_with_input
+from .result_file import RESULT_FILE
+from .workspace import Workspace
+
+CONTAINER_POOL_SIZE = int(os.getenv("CONTAINER_POOL_SIZE", "0"))  # 0 = pool disabled
+CONTAINER_POOL_IDLE_TIMEOUT = float(os.getenv("CONTAINER_POOL_IDLE_TIMEOUT", "300"))
+CONTAINER_POOL_MAX_RUNS = int(os.getenv("CONTAINER_POOL_MAX_RUNS", "20"))
+
+# Directory inside the container where each job's files are copied
+JOB_DIR = "/tmp/job"
+POOL_LABEL = "optimizer-pool"
+# Logs of the current run are still being written, the program doesn't need them
+COPY_EXCLUDED_FILES = {BUILD_LOG_FILE, RUN_LOG_FILE}
+
+
+def workspace_archive(workspace: Workspace) -> bytes:
+    # Tar stream of the workspace for `docker cp -`, without the excluded files
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as archive:
+        for name in sorted(os.listdir(workspace.path)):
+            if name not in COPY_EXCLUDED_FILES:
+                archive.add(workspace.file_path(name), arcname=name)
+    return buffer.getvalue()
+
+
+class PooledContainer:
+    def __init__(self, container_id: str, image: str):
+        self.container_id = container_id
+        self.image = image
+        self.runs = 0
+        self.last_used = time.monotonic()
+
+
+class ContainerPool:
+    def __init__(
+        self,
+        size=CONTAINER_POOL_SIZE,
+        idle_timeout=CONTAINER_POOL_IDLE_TIMEOUT,
+        max_runs=CONTAINER_POOL_MAX_RUNS,
+    ):
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.max_runs = max_runs
+        self.idle = defaultdict(list)  # image -> idle containers
+        self.slots = defaultdict(
+            lambda: asyncio.Semaphore(self.size)
+        )  # image -> free slots
+        self.container_ids = set()  # Every container started by this pool, for shutdown
+        atexit.register(self.shutdown)
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    async def start_container(self, image: str) -> PooledContainer:
+        returncode, output = await run_captured(
+            [
+                "docker",
+                "run",
+                "-d",
+                "--rm",
+                "--label",
+                POOL_LABEL,
+                *docker_run_limits(),
+                "--entrypoint",
+                "sleep",
+                image,
+                "infinity",
+            ]
+        )
+        if returncode != 0:
+            raise Exception(f"Starting pooled container failed: {output.strip()}")
+        container_id = output.strip().splitlines()[-1]
+        self.container_ids.add(container_id)
+        return PooledContainer(container_id, image)
+
+    async def remove_container(self, container: PooledContainer):
+        self.container_ids.discard(container.container_id)
+        await run_captured(["docker", "rm", "-f", container.container_id])
+
+    def expired(self, container: PooledContainer) -> bool:
+        return time.monotonic() - container.last_used > self.idle_timeout
+
+    async def reap_idle(self):
+        # Remove containers nobody has used within the idle timeout
+        # Expired containers are taken out before awaiting anything, acquire() of another
+        # session may add images to self.idle meanwhile
+        expired = []
+        for image, containers in list(self.idle.items()):
+            self.idle[image] = []
+            for container in containers:
+                if self.expired(container):
+                    expired.append(container)
+                else:
+                    self.idle[image].append(container)
+        for container in expired:
+            await self.remove_container(container)
+
+    async def acquire(self, image: str) -> PooledContainer:
+        await self.reap_idle()
+        await self.slots[image].acquire()
+        try:
+            if self.idle[image]:
+                return self.idle[image].pop()
+            return await self.start_container(image)
+        except Exception:
+            self.slots[image].release()
+            raise
+
+    async def release(self, container: PooledContainer, healthy: bool):
+        try:
+            if healthy and container.runs < self.max_runs:
+                # Reset: drop the job files so the next script starts from a clean directory
+                returncode, _ = await run_captured(
+                    ["docker", "exec", container.container_id, "rm", "-rf", JOB_DIR]
+                )
+                healthy = returncode == 0
+            else:
+                healthy = False
+
+            if healthy:
+                container.last_used = time.monotonic()
+                self.idle[container.image].append(container)
+            else:
+                await self.remove_container(container)
+        finally:
+            self.slots[container.image].release()
+
+    async def run(
+        self, image: str, workspace: Workspace, on_line, command=None, timeout=None
+    ) -> int:
+        """
+        Run generated.py from the workspace in an idle container of the given image.
+
+        Parameters:
+        - image: Dependency image (see ImageCache) the container is started from.
+        - workspace: Session workspace whose files are copied into the container.
+        - on_line: Async callback that receives program output line by line.
+        - command: Command to run in the job directory, defaults to python generated.py.
+        - timeout: Wall-clock limit in seconds, the container is discarded when it is hit.
+
+        Returns:
+        - Exit code of the program.
+        """
+        container = await self.acquire(image)
+        healthy = False
+        try:
+            container_id = container.container_id
+            await run_captured(["docker", "exec", container_id, "mkdir", "-p", JOB_DIR])
+            returncode, output = await run_with_input(
+                ["docker", "cp", "-", f"{container_id}:{JOB_DIR}"],
+                workspace_archive(workspace),
+            )
+            if returncode != 0:
+                raise Exception(f"Copying files to container failed: {output.strip()}")
+
+            returncode = await run_streaming(
+                [
+                    "docker",
+                    "exec",
+                    "-w",
+                    JOB_DIR,
+                    container_id,
+                    *(command or ["python", "generated.py"]),
+                ],
+                workspace.path,
+                on_line,
+                timeout=timeout,
+            )
+            container.runs += 1
+            # The workspace is copied, not mounted, so the result file is copied back
+            # before the reset deletes the job directory. No file = the program wrote none.
+            await run_captured(
+                [
+                    "docker",
+                    "cp",
+                    f"{container_id}:{JOB_DIR}/{RESULT_FILE}",
+                    workspace.file_path(RESULT_FILE),
+                ]
+            )
+            healthy = True
+            return returncode
+        finally:
+            await self.release(container, healthy)
+
+    def shutdown(self):
+        # Called at interpreter exit, pooled containers would otherwise keep sleeping forever
+        if self.container_ids:
+            try:
+                subprocess.run(
+                    ["docker", "rm", "-f", *self.container_ids],
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                )
+            except OSError as e:
+                print(f"Removing pooled containers failed: {e}")
+            self.container_ids.clear()
+
+
+# Shared by all sessions in the server process
+container_pool = ContainerPool()
@@ -0,0 +1,58 @@
+# utils/data_summary.py
+# Compact, size-bounded description of uploaded Excel sheets for the prompts.
+# Small sheets are sent as they are, large ones as schema, statistics and a sample,
+# the generated code reads the full file from its working directory in the container.
+import os
+import pandas as pd
+
+# Sheets with at most this many rows are sent to the LLM completely
+DATA_FULL_ROWS = int(os.getenv("DATA_FULL_ROWS", "50"))
+# Number of example rows sent from larger sheets
+DATA_SAMPLE_ROWS = int(os.getenv("DATA_SAMPLE_ROWS", "10"))
+
+
+def records_json(df: pd.DataFrame) -> str:
+    return df.to_json(orient="records", force_ascii=False, indent=2)
+
+
+def column_summary(df: pd.DataFrame) -> str:
+    lines = []
+    for column in df.columns:
+        series = df[column]
+        line = f"- {column} ({series.dtype}): {series.notna().sum()} non-null"
+        if pd.api.types.is_numeric_dtype(series) and series.notna().any():
+            line += (
+                f", min {series.min()}, max {series.max()}, "
+                f"mean {series.mean():.4g}, sum {series.sum()}"
+            )
+        else:
+            line += f", {series.nunique()} unique values"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def summarize_sheet(filename: str, sheet_name: str, df: pd.DataFrame) -> str:
+    """
+    Describe one sheet of an uploaded Excel file for the prompts.
+
+    Parameters:
+    - filename: Name of the uploaded file, the code can read it from its working directory.
+    - sheet_name: Name of the sheet.
+    - df: Contents of the sheet.
+
+    Returns:
+    - All rows as JSON for small sheets, otherwise columns, statistics and a sample.
+    """
+    header = f"File: {filename}, Sheet: {sheet_name}"
+    if len(df) <= DATA_FULL_ROWS:
+        return f"{header}\nData:\n{records_json(df)}"
+
+    return (
+        f"{header}\n"
+        f"Rows: {len(df)}, Columns: {len(df.columns)}\n"
+        f"Columns:\n{column_summary(df)}\n"
+        f"First {DATA_SAMPLE_ROWS} rows:\n{records_json(df.head(DATA_SAMPLE_ROWS))}\n"
+        f"Note: this is only a summary of the data. The complete data is in the file "
+        f"'{filename}' (sheet '{sheet_name}') in the working directory, the code must "
+        f"read it from there instead of hard-coding values."
+    )
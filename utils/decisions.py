@@ -0,0 +1,45 @@
+# utils/decisions.py
+# Automatic answers to the questions the agents normally ask with Chainlit action buttons.
+# Headless runs put a policy into the state, the agents then skip the buttons.
+from pydantic import BaseModel
+
+# Decisions asked by the agents
+PLAN_DECISION = "plan"  # problem_analyzer: continue / new / cancel
+ROUND_DECISION = "round"  # code_output_analyzer: continue / done
+RESUME_DECISION = "resume"  # main: resume / new, after an interrupted run
+
+
+def goal_achieved(result) -> bool:
+    # is_goal_achieved starts with a boolean, followed by an explanation
+    text = (getattr(result, "is_goal_achieved", "") or "").strip().lower()
+    return text.startswith(("true", "yes"))
+
+
+# A pydantic model, so that it is stored in the state checkpoints like the rest of the state
+class AutoDecisionPolicy(BaseModel):
+    """
+    Accepts the first plan and keeps optimizing until max_rounds rounds are done,
+    or earlier when stop_when_goal_met is set and the last result achieved the goal.
+    Interrupted runs are always resumed.
+    """
+
+    max_rounds: int = 3
+    stop_when_goal_met: bool = False
+
+    def decide(self, decision: str, state) -> str:
+        if decision == PLAN_DECISION:
+            return "continue"
+        if decision == RESUME_DECISION:
+            return "resume"
+        if decision == ROUND_DECISION:
+            results = state.get("results", [])
+            # A round can add several results when candidates are generated per round
+            rounds = state.get("iterations") or len(results)
+            if rounds >= self.max_rounds:
+                return "done"
+            # The result of the round, the best one when there were several candidates
+            last = state.get("result") or (results[-1] if results else None)
+            if self.stop_when_goal_met and last and goal_achieved(last):
+                return "done"
+            return "continue"
+        raise ValueError(f"Unknown decision: {decision}")
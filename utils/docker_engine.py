@@ -0,0 +1,230 @@
+# utils/docker_engine.py
+# Docker Engine API client for running generated code without the docker CLI.
+# One client is shared by the server process, its HTTP session keeps a pool of connections
+# to the daemon socket open, so a run is a few API calls instead of several CLI processes.
+# Build and program output arrive as structured events and the exit code is read from the
+# container state, no text scraping needed.
+import asyncio
+import io
+import os
+import posixpath
+import shutil
+import tarfile
+from typing import NamedTuple
+
+import docker
+from docker.errors import APIError, ImageNotFound, NotFound
+
+from .limits import EXECUTION_TIMEOUT, engine_limits
+
+DOCKER_API_POOL_SIZE = int(os.getenv("DOCKER_API_POOL_SIZE", "10"))
+# Read timeout of API calls in seconds. Output streams time out after this long without
+# output, so the default is longer than a run can take.
+DOCKER_API_TIMEOUT = int(
+    os.getenv("DOCKER_API_TIMEOUT", str(int(EXECUTION_TIMEOUT) + 60))
+)
+
+RUN_LABEL = "optimizer-run"
+
+
+class EngineEvent(NamedTuple):
+    source: str  # "build", "stdout" or "stderr"
+    text: str
+    error: bool = False
+
+
+def build_event(chunk: dict):
+    # One decoded message of the build stream, None for messages without text (e.g. image IDs)
+    if "error" in chunk:
+        detail = chunk.get("errorDetail") or {}
+        return EngineEvent("build", detail.get("message") or chunk["error"], True)
+    if chunk.get("stream"):
+        return EngineEvent("build", chunk["stream"])
+    if chunk.get("status"):
+        progress = f" {chunk['progress']}" if chunk.get("progress") else ""
+        return EngineEvent("build", f"{chunk['status']}{progress}\n")
+    return None
+
+
+class LineSplitter:
+    """Splits the raw output chunks of one stream into lines."""
+
+    def __init__(self):
+        self.buffer = ""
+
+    def feed(self, chunk: bytes) -> list:
+        self.buffer += chunk.decode("utf-8", errors="replace")
+        *lines, self.buffer = self.buffer.split("\n")
+        return [line + "\n" for line in lines]
+
+    def rest(self) -> list:
+        rest, self.buffer = self.buffer, ""
+        return [rest] if rest else []
+
+
+def output_events(chunks):
+    """
+    Turn demultiplexed (stdout, stderr) chunks of a container into line events.
+
+    Returns:
+    - Generator of EngineEvents with source "stdout" or "stderr".
+    """
+    splitters = {"stdout": LineSplitter(), "stderr": LineSplitter()}
+    for chunk in chunks:
+        for source, data in zip(("stdout", "stderr"), chunk):
+            if data:
+                for line in splitters[source].feed(data):
+                    yield EngineEvent(source, line)
+    for source, splitter in splitters.items():
+        for line in splitter.rest():
+            yield EngineEvent(source, line)
+
+
+async def iterate_in_thread(make_iterator):
+    # The SDK blocks, the iterator is consumed in a worker thread and items handed to the loop
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    done = object()
+
+    def produce():
+        try:
+            for item in make_iterator():
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, done)
+
+    worker = loop.run_in_executor(None, produce)
+    try:
+        while (item := await queue.get()) is not done:
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        if worker.done():
+            await worker
+
+
+class DockerEngine:
+    def __init__(
+        self, pool_size=DOCKER_API_POOL_SIZE, timeout=DOCKER_API_TIMEOUT, client=None
+    ):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._client = client
+
+    @property
+    def client(self):
+        # Connected on first use, importing the module doesn't need a running daemon
+        if self._client is None:
+            self._client = docker.from_env(
+                max_pool_size=self.pool_size, timeout=self.timeout
+            )
+        return self._client
+
+    async def build(self, path: str, tag: str):
+        """Build the image of the directory, yields EngineEvents of the build output."""
+
+        def stream():
+            return self.client.api.build(
+                path=path, tag=tag, rm=True, forcerm=True, decode=True
+            )
+
+        async for chunk in iterate_in_thread(stream):
+            event = build_event(chunk)
+            if event:
+                yield event
+
+    async def create(self, image: str, command=None, workdir=None, mount=None):
+        """
+        Create a container with the execution limits, the mount directory is bound
+        to the working directory of the image.
+        """
+        options = {"labels": [RUN_LABEL], **engine_limits()}
+        if workdir:
+            options["working_dir"] = workdir
+        if mount and workdir:
+            options["volumes"] = {mount: {"bind": workdir, "mode": "rw"}}
+        return await asyncio.to_thread(
+            self.client.containers.create, image, command, **options
+        )
+
+    async def output(self, container):
+        """Start the container and yield EngineEvents of its output until it stops."""
+        await asyncio.to_thread(container.start)
+
+        def stream():
+            # logs=True replays what was printed before the stream was attached
+            return output_events(container.attach(stream=True, logs=True, demux=True))
+
+        async for event in iterate_in_thread(stream):
+            yield event
+
+    async def wait(self, container) -> int:
+        result = await asyncio.to_thread(container.wait)
+        return result["StatusCode"]
+
+    async def remove(self, container):
+        # Force also kills a container that is still running, e.g. after a timeout
+        try:
+            await asyncio.to_thread(container.remove, force=True)
+        except NotFound:
+            pass
+
+    async def copy_from(self, container, path: str, destination: str) -> bool:
+        """
+        Copy one file out of a container, also a stopped one. A relative path is relative
+        to the working directory of the container.
+
+        Returns:
+        - False if the container has no such file.
+        """
+        if not posixpath.isabs(path):
+            workdir = container.attrs.get("Config", {}).get("WorkingDir") or "/"
+            path = posixpath.join(workdir, path)
+
+        def read_archive():
+            stream, _ = container.get_archive(path)
+            return b"".join(stream)
+
+        try:
+            data = await asyncio.to_thread(read_archive)
+        except NotFound:
+            return False
+        with tarfile.open(fileobj=io.BytesIO(data)) as archive:
+            member = archive.next()
+            if member is None or not member.isfile():
+                return False
+            with open(destination, "wb") as f:
+                shutil.copyfileobj(archive.extractfile(member), f)
+        return True
+
+    async def image_exists(self, tag: str) -> bool:
+        try:
+            await asyncio.to_thread(self.client.images.get, tag)
+            return True
+        except ImageNotFound:
+            return False
+
+    async def image_size(self, tag: str) -> int:
+        try:
+            image = await asyncio.to_thread(self.client.images.get, tag)
+        except ImageNotFound:
+            return 0
+        return image.attrs.get("Size", 0)
+
+    async def remove_image(self, tag: str, prune=True):
+        # prune also drops the dangling layers a build for a single run left behind
+        try:
+            await asyncio.to_thread(self.client.images.remove, tag, force=True)
+            if prune:
+                await asyncio.to_thread(
+                    self.client.images.prune, filters={"dangling": True}
+                )
+        except APIError as e:
+            print(f"Removing image {tag} failed: {e}")
+
+
+# Shared by all sessions in the server process
+docker_engine = DockerEngine()
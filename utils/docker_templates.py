@@ -0,0 +1,91 @@
+# utils/docker_templates.py
+# Deterministic Dockerfile/compose.yaml for standard Python projects.
+# Almost every round needs the same "python base image + pip install + run generated.py" pair,
+# so the LLM is only asked for Docker files when the code needs something unusual.
+import hashlib
+import os
+import re
+
+from schemas import Code, DockerFiles
+from .wheelhouse import pip_install_line
+
+DOCKER_PYTHON_IMAGE = os.getenv("DOCKER_PYTHON_IMAGE", "python:3.11-slim")
+
+# Default texts of the Code model, these mean that nothing was given
+NO_REQUIREMENTS = "No requirements provided"
+NO_RESOURCES = "No additional resources provided"
+
+# A plain pip requirement, e.g. "pandas", "PuLP==2.9.0" or "ortools>=9.0"
+REQUIREMENT_PATTERN = re.compile(
+    r"^[A-Za-z0-9][A-Za-z0-9._-]*(\[[A-Za-z0-9._,-]+\])?\s*([<>=!~]=?\s*[A-Za-z0-9.*+!_-]+\s*,?\s*)*$"
+)
+
+# Resources mentioning these need more than pip, so the LLM writes the Docker files
+UNUSUAL_RESOURCE_KEYWORDS = (
+    "apt",
+    "apt-get",
+    "system package",
+    "system dependency",
+    "binary",
+    "executable",
+    "environment variable",
+    "port",
+    "gpu",
+    "cuda",
+    "glpk",
+    "cplex",
+    "gurobi",
+)
+
+
+def requirement_lines(requirements: str) -> list:
+    if not requirements or requirements.strip() == NO_REQUIREMENTS:
+        return []
+    lines = []
+    for line in requirements.splitlines():
+        line = line.split("#", 1)[0].strip()
+        if line:
+            lines.append(line)
+    return lines
+
+
+def can_use_template(code: Code) -> bool:
+    """Check if the standard template is enough to run the code."""
+    if not all(
+        REQUIREMENT_PATTERN.match(line) for line in requirement_lines(code.requirements)
+    ):
+        return False
+
+    resources = (code.resources or "").strip().lower()
+    if not resources or resources == NO_RESOURCES.lower():
+        return True
+    # Data files (e.g. Excel sheets) are already in the workspace and copied with the code
+    return not any(
+        re.search(rf"\b{re.escape(keyword)}\b", resources)
+        for keyword in UNUSUAL_RESOURCE_KEYWORDS
+    )
+
+
+def template_docker_files(code: Code) -> DockerFiles:
+    lines = [f"FROM {DOCKER_PYTHON_IMAGE}", "WORKDIR /app"]
+    if requirement_lines(code.requirements):
+        lines += [
+            "COPY requirements.txt .",
+            pip_install_line(),  # Wheelhouse and pip cache mounts with BuildKit
+        ]
+    lines += ["COPY . .", 'CMD ["python", "generated.py"]']
+
+    compose_file = "services:\n  app:\n    build: .\n    command: python generated.py\n"
+    return DockerFiles(dockerfile="\n".join(lines) + "\n", compose_file=compose_file)
+
+
+def docker_files_signature(code: Code, base_image="") -> str:
+    # Docker files only depend on requirements and resources (and the base image version),
+    # not on the code itself
+    digest = hashlib.sha256()
+    digest.update((code.requirements or "").strip().encode())
+    digest.update(b"\0")
+    digest.update((code.resources or "").strip().encode())
+    digest.update(b"\0")
+    digest.update(base_image.encode())
+    return digest.hexdigest()
@@ -0,0 +1,341 @@
+# utils/executors.py
+# Backends that run the generated code for start_docker_container_agent.
+# The agent only deals with output, stats and errors, so the backend can be swapped
+# (e.g. a scripted stand-in for offline benchmarks) without touching the workflow.
+# EXECUTOR_BACKEND=venv runs the code in a local virtualenv instead of Docker,
+# EXECUTOR_BACKEND=docker-api talks to the Docker Engine API instead of the docker CLI.
+import asyncio
+import os
+import signal
+
+from .container_pool import container_pool
+from .docker_engine import docker_engine
+from .image_cache import dockerfile_workdir, image_cache
+from .limits import process_limits, write_runner
+from .profiling import PROFILER_FILE, write_profiler
+from .process import (
+    kill_process,
+    read_lines,
+    run_captured,
+    run_quietly,
+    run_streaming,
+    spawn_process,
+)
+from .result_file import RESULT_FILE
+from .venv_cache import venv_cache
+from .workspace import Workspace
+
+EXECUTOR_BACKEND = os.getenv("EXECUTOR_BACKEND", "docker")
+
+
+def script_command(workspace: Workspace, script: str) -> list:
+    # The profiler wrapper is only written when the script really runs through the runner
+    if script == PROFILER_FILE:
+        write_profiler(workspace)
+    return write_runner(workspace, script)
+
+
+async def image_command_note(script: str, on_output):
+    # Without a WORKDIR the code is copied into the image and its own CMD runs generated.py
+    if script == PROFILER_FILE:
+        await on_output(
+            "Profiling skipped: the Dockerfile has no WORKDIR, "
+            "the image runs generated.py with its own command.\n"
+        )
+
+
+async def copy_compose_result(workspace: Workspace) -> bool:
+    """
+    Copy result.json out of the stopped compose containers, for images the code was copied
+    into. docker cp resolves a relative path from /, the working directory without a WORKDIR.
+
+    Returns:
+    - Whether a container had the file.
+    """
+    _, output = await run_captured(
+        workspace.compose_command("ps", "-a", "-q"), workspace.path
+    )
+    for container_id in output.split():
+        returncode, _ = await run_captured(
+            [
+                "docker",
+                "cp",
+                f"{container_id}:{RESULT_FILE}",
+                workspace.file_path(RESULT_FILE),
+            ]
+        )
+        if returncode == 0:
+            return True
+    return False
+
+
+class DockerExecutor:
+    """Builds the image with docker compose (or reuses a cached one) and runs the code in it."""
+
+    name = "docker"
+
+    async def run(
+        self,
+        workspace: Workspace,
+        script: str,
+        on_output,
+        on_line,
+        on_start,
+        timeout=None,
+    ) -> int:
+        """
+        Build and run the code of the workspace.
+
+        Parameters:
+        - workspace: Session workspace with generated.py, requirements.txt and Docker files.
+        - script: Script to run, generated.py or PROFILER_FILE to profile it. The runner and
+          the profiler are written only when the image can run them, see image_command_note.
+        - on_output: Async callback for build output lines.
+        - on_line: Async callback for program output lines.
+        - on_start: Called when the build is done and the program starts.
+        - timeout: Wall-clock limit for the program in seconds, asyncio.TimeoutError when hit.
+
+        Returns:
+        - Exit code of the run.
+        """
+        # Compose override file with limits and the cached dependency image
+        override = None
+        pooled = False  # Whether the code ran in a warm pooled container
+        try:
+            # Build the Docker image, or reuse a cached one when Dockerfile and requirements are unchanged
+            print("Building Docker image...")
+            image = await image_cache.prepare(workspace, on_output)
+            # The runner script reports CPU time and peak memory, it needs the workspace mounted
+            command = script_command(workspace, script) if image else None
+
+            if image and container_pool.enabled:
+                # Hand the script to a warm container, no compose up/down needed
+                print("Running in pooled container...")
+                pooled = True
+                on_start()
+                return await container_pool.run(
+                    image, workspace, on_line, command=command, timeout=timeout
+                )
+
+            override = image_cache.write_override(workspace, image, command)
+            if image is None:
+                await image_command_note(script, on_output)
+                build_command = workspace.compose_command("build", override=override)
+                if await run_streaming(build_command, workspace.path, on_output) != 0:
+                    raise Exception("Docker image build failed")
+
+            # Run the Docker container
+            print("Running Docker container...")
+            up_command = workspace.compose_command(
+                "up",
+                "--abort-on-container-exit",
+                "--no-log-prefix",
+                *(["--no-build"] if image else []),
+                override=override,
+            )
+            on_start()
+            up_process = await spawn_process(up_command, workspace.path)
+
+            async def follow_output():
+                async for line in read_lines(up_process):
+                    await on_line(line)
+                    if "exited with code" in line:
+                        break
+
+                # Drain whatever compose still prints so the process can exit
+                await up_process.communicate()
+
+            try:
+                await asyncio.wait_for(follow_output(), timeout)
+            except asyncio.TimeoutError:
+                # compose down in finally stops the container itself
+                kill_process(up_process)
+                await up_process.wait()
+                raise
+            if image is None and up_process.returncode == 0:
+                # The workspace isn't mounted, result.json stays in the container otherwise
+                await copy_compose_result(workspace)
+            return up_process.returncode
+
+        finally:
+            # Clean up Docker resources, cached images are tagged so prune only drops dangling layers
+            if not pooled:
+                await run_quietly(
+                    workspace.compose_command("down", override=override), workspace.path
+                )
+                await run_quietly(["docker", "image", "prune", "-f"], workspace.path)
+
+
+class DockerApiExecutor:
+    """
+    Runs the code through the Docker Engine API, without docker compose.
+
+    Cached dependency images come from the image cache as with DockerExecutor, its image
+    queries and evictions go through the API too. The container is then created, followed
+    and removed with API calls on a shared client.
+    Dockerfiles without a WORKDIR are built through the API as well.
+    """
+
+    name = "docker-api"
+
+    def __init__(self, engine=None):
+        self.engine = engine or docker_engine
+
+    async def run(
+        self,
+        workspace: Workspace,
+        script: str,
+        on_output,
+        on_line,
+        on_start,
+        timeout=None,
+    ) -> int:
+        """Same contract as DockerExecutor.run, the exit code comes from the container state."""
+        print("Building Docker image...")
+        image = await image_cache.prepare(workspace, on_output, self.engine)
+        built = None  # Image built for this run only, removed afterwards
+        container = None
+        try:
+            if image:
+                with open(
+                    workspace.file_path("Dockerfile"), "r", encoding="utf-8"
+                ) as f:
+                    workdir = dockerfile_workdir(f.read())
+                command = script_command(workspace, script)
+            else:
+                await image_command_note(script, on_output)
+                built = image = f"optimizer-run:{workspace.safe_id}"
+                async for event in self.engine.build(workspace.path, image):
+                    if event.error:
+                        raise Exception(f"Docker image build failed: {event.text}")
+                    await on_output(event.text)
+                # The code is copied into the image, its CMD runs it
+                workdir = command = None
+
+            print("Running Docker container...")
+            container = await self.engine.create(
+                image, command, workdir=workdir, mount=os.path.abspath(workspace.path)
+            )
+            on_start()
+
+            async def follow_output():
+                async for event in self.engine.output(container):
+                    await on_line(event.text)
+                return await self.engine.wait(container)
+
+            returncode = await asyncio.wait_for(follow_output(), timeout)
+            if built and returncode == 0:
+                # The workspace isn't mounted, result.json stays in the container otherwise
+                await self.engine.copy_from(
+                    container, RESULT_FILE, workspace.file_path(RESULT_FILE)
+                )
+            return returncode
+        finally:
+            if container is not None:
+                await self.engine.remove(container)
+            if built:
+                await self.engine.remove_image(built)
+
+
+# Only these variables reach the program, API keys of the server stay out of its reach
+SANDBOX_ENV_KEYS = (
+    "PATH",
+    "LANG",
+    "LC_ALL",
+    "TZ",
+    "SYSTEMROOT",
+    "TMPDIR",
+    "TEMP",
+    "TMP",
+)
+
+
+def sandbox_env() -> dict:
+    env = {key: os.environ[key] for key in SANDBOX_ENV_KEYS if key in os.environ}
+    env["PYTHONUNBUFFERED"] = "1"  # Output is streamed line by line, not at exit
+    return env
+
+
+class VenvExecutor:
+    """
+    Runs the code in a subprocess with a cached virtualenv, for machines without Docker.
+
+    The Docker limits are replaced with rlimits: CPU time is capped at the timeout and,
+    with VENV_ADDRESS_SPACE_FACTOR, address space at a multiple of EXECUTION_MEMORY
+    (virtual memory, not resident memory like Docker's limit). This is a lighter sandbox
+    than a container, the program runs as the server user with access to the host filesystem.
+    """
+
+    name = "venv"
+
+    def __init__(self, cache=None):
+        self.cache = cache or venv_cache
+
+    async def run(
+        self,
+        workspace: Workspace,
+        script: str,
+        on_output,
+        on_line,
+        on_start,
+        timeout=None,
+    ) -> int:
+        """Same contract as DockerExecutor.run, build output is the virtualenv install."""
+        print("Preparing virtualenv...")
+        python = await self.cache.prepare(workspace, on_output)
+        command = script_command(workspace, script)
+        command[0] = python
+
+        print("Running in virtualenv...")
+        on_start()
+        # Own process group, so a timeout also kills the program started by the runner
+        process = await spawn_process(
+            command,
+            workspace.path,
+            env=sandbox_env(),
+            preexec_fn=process_limits(timeout) if os.name == "posix" else None,
+            start_new_session=True,
+        )
+
+        async def follow_output():
+            async for line in read_lines(process):
+                await on_line(line)
+            return await process.wait()
+
+        try:
+            return await asyncio.wait_for(follow_output(), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            kill_process_group(process)
+            await process.wait()
+            raise
+
+
+def kill_process_group(process):
+    if os.name != "posix":
+        kill_process(process)
+        return
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass  # Already exited
+
+
+BACKENDS = {
+    "docker": DockerExecutor,
+    "docker-api": DockerApiExecutor,
+    "venv": VenvExecutor,
+}
+
+# Backend used by start_docker_container_agent, see set_executor
+executor = BACKENDS[EXECUTOR_BACKEND]()
+
+
+def get_executor():
+    return executor
+
+
+def set_executor(new_executor):
+    """Replace the shared executor, returns the previous one so it can be restored."""
+    global executor
+    previous, executor = executor, new_executor
+    return previous
@@ -0,0 +1,234 @@
+# utils/image_cache.py
+# Content-addressed cache of dependency images.
+# Images are keyed by a hash of the Dockerfile and requirements.txt, so rounds that only change
+# generated.py reuse an already built image and just mount the new script into the container.
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from collections import defaultdict
+import yaml
+
+from .base_image import base_image, base_image_of
+from .limits import compose_limits
+from .process import run_captured, run_streaming
+from .wheelhouse import build_context_args
+from .workspace import Workspace, WORKSPACES_ROOT
+
+IMAGE_CACHE_INDEX = os.getenv(
+    "IMAGE_CACHE_INDEX", os.path.join(WORKSPACES_ROOT, ".image_cache.json")
+)
+IMAGE_CACHE_MAX_IMAGES = int(os.getenv("IMAGE_CACHE_MAX_IMAGES", "10"))
+IMAGE_CACHE_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_BYTES", "0"))  # 0 = no limit
+IMAGE_REPOSITORY = "optimizer-cache"
+
+# Compose override written next to compose.yaml when a cached image is used
+OVERRIDE_FILE = "compose.cache.yaml"
+
+
+def normalize_requirements(requirements: str) -> str:
+    # Order, case and comments don't change what gets installed
+    lines = []
+    for line in requirements.splitlines():
+        line = line.split("#", 1)[0].strip().lower()
+        if line:
+            lines.append(line)
+    return "\n".join(sorted(lines))
+
+
+def dependency_hash(dockerfile: str, requirements: str) -> str:
+    digest = hashlib.sha256()
+    digest.update(
+        "\n".join(l.rstrip() for l in dockerfile.strip().splitlines()).encode()
+    )
+    digest.update(b"\0")
+    digest.update(normalize_requirements(requirements).encode())
+    return digest.hexdigest()
+
+
+def dockerfile_workdir(dockerfile: str):
+    # The last WORKDIR is where the script lives, the workspace is mounted there
+    workdirs = re.findall(r"(?im)^\s*WORKDIR\s+(\S+)", dockerfile)
+    return workdirs[-1] if workdirs else None
+
+
+def build_override(compose_file: str, tag=None, workdir=None, command=None) -> dict:
+    compose = yaml.safe_load(compose_file) or {}
+    services = {}
+    for name, service in (compose.get("services") or {}).items():
+        if not isinstance(service, dict):
+            continue
+        # CPU and memory limits apply to every service
+        services[name] = compose_limits()
+        if tag and "build" in service:
+            services[name].update(
+                {
+                    "image": tag,
+                    "pull_policy": "never",
+                    "volumes": [f"./:{workdir}"],
+                }
+            )
+            if command:
+                services[name]["command"] = command
+    return {"services": services}
+
+
+class ImageCache:
+    def __init__(
+        self,
+        index_path=IMAGE_CACHE_INDEX,
+        max_images=IMAGE_CACHE_MAX_IMAGES,
+        max_bytes=IMAGE_CACHE_MAX_BYTES,
+    ):
+        self.index_path = index_path
+        self.max_images = max_images
+        self.max_bytes = max_bytes
+        self.locks = defaultdict(asyncio.Lock)  # One build per key at a time
+        self.entries = self.load()
+
+    def load(self) -> dict:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.index_path) or ".", exist_ok=True)
+        with open(self.index_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=2)
+
+    # With a Docker Engine API client (engine) the queries are API calls, not CLI processes
+
+    async def image_exists(self, tag: str, engine=None) -> bool:
+        if engine is not None:
+            return await engine.image_exists(tag)
+        returncode, _ = await run_captured(["docker", "image", "inspect", tag])
+        return returncode == 0
+
+    async def image_size(self, tag: str, engine=None) -> int:
+        if engine is not None:
+            return await engine.image_size(tag)
+        returncode, output = await run_captured(
+            ["docker", "image", "inspect", "-f", "{{.Size}}", tag]
+        )
+        return (
+            int(output.strip()) if returncode == 0 and output.strip().isdigit() else 0
+        )
+
+    async def remove_image(self, tag: str, engine=None):
+        if engine is not None:
+            await engine.remove_image(tag, prune=False)
+        else:
+            await run_captured(["docker", "image", "rm", "-f", tag])
+
+    def touch(self, key: str, tag: str, size: int):
+        entry = self.entries.get(key, {"tag": tag, "size": size})
+        entry["last_used"] = time.time()
+        self.entries[key] = entry
+
+    def eviction_candidates(self, keep: str) -> list:
+        # Least recently used first, never the image that is about to be used
+        ordered = sorted(self.entries.items(), key=lambda item: item[1]["last_used"])
+        count = len(self.entries)
+        total = sum(entry.get("size", 0) for entry in self.entries.values())
+        evicted = []
+        for key, entry in ordered:
+            over_count = self.max_images and count > self.max_images
+            over_bytes = self.max_bytes and total > self.max_bytes
+            if not (over_count or over_bytes):
+                break
+            if key == keep:
+                continue
+            evicted.append(key)
+            count -= 1
+            total -= entry.get("size", 0)
+        return evicted
+
+    async def evict(self, keep: str, engine=None):
+        for key in self.eviction_candidates(keep):
+            entry = self.entries.pop(key)
+            print(f"Evicting cached image {entry['tag']}")
+            await self.remove_image(entry["tag"], engine)
+        self.save()
+
+    async def prepare(self, workspace: Workspace, on_line, engine=None):
+        """
+        Make sure a dependency image for the workspace exists, building it only on a cache miss.
+
+        Parameters:
+        - workspace: Session workspace with Dockerfile and requirements.txt.
+        - on_line: Async callback that receives build output line by line.
+        - engine: DockerEngine for the image queries, the docker CLI when None.
+          Builds always use the CLI for BuildKit.
+
+        Returns:
+        - Tag of the cached image (or of the base image), or None if the Dockerfile has no WORKDIR to mount the
+          script into (normal compose build is used then).
+        """
+        with open(workspace.file_path("Dockerfile"), "r", encoding="utf-8") as f:
+            dockerfile = f.read()
+        if dockerfile_workdir(dockerfile) is None:
+            return None
+
+        # Code that only needs the base image runs in it directly, nothing to build
+        if base_image_of(dockerfile):
+            return await base_image.ensure(on_line, engine)
+
+        requirements = ""
+        if os.path.exists(workspace.file_path("requirements.txt")):
+            with open(
+                workspace.file_path("requirements.txt"), "r", encoding="utf-8"
+            ) as f:
+                requirements = f.read()
+
+        key = dependency_hash(dockerfile, requirements)
+        tag = f"{IMAGE_REPOSITORY}:{key[:16]}"
+
+        async with self.locks[key]:
+            if key in self.entries and await self.image_exists(tag, engine):
+                await on_line(f"Using cached dependency image {tag}\n")
+                size = self.entries[key].get("size", 0)
+            else:
+                self.entries.pop(key, None)
+                returncode = await run_streaming(
+                    [
+                        "docker",
+                        "build",
+                        *build_context_args(dockerfile),
+                        "-t",
+                        tag,
+                        ".",
+                    ],
+                    workspace.path,
+                    on_line,
+                )
+                if returncode != 0:
+                    raise Exception("Docker image build failed")
+                size = await self.image_size(tag, engine)
+            self.touch(key, tag, size)
+        await self.evict(keep=key, engine=engine)
+        return tag
+
+    def write_override(self, workspace: Workspace, tag=None, command=None):
+        """
+        Write a compose override with resource limits. With a cached image tag the override
+        also runs that image with the workspace mounted, optionally with another command.
+
+        Returns:
+        - Name of the override file, or None if compose.yaml has no service to override.
+        """
+        with open(workspace.file_path("Dockerfile"), "r", encoding="utf-8") as f:
+            workdir = dockerfile_workdir(f.read())
+        with open(workspace.file_path("compose.yaml"), "r", encoding="utf-8") as f:
+            override = build_override(f.read(), tag, workdir, command)
+        if not override["services"]:
+            return None
+        workspace.write_file(OVERRIDE_FILE, yaml.safe_dump(override, sort_keys=False))
+        return OVERRIDE_FILE
+
+
+# Shared by all sessions in the server process
+image_cache = ImageCache()
@@ -0,0 +1,305 @@
+# utils/instrumentation.py
+# Per-run timing and token accounting for the workflow nodes.
+# Every node records its phases (LLM first token and streaming, parsing, Docker build and run,
+# waiting for the user) into the trace of the current run. Finished runs are appended to a
+# JSON-lines file and aggregated into Prometheus text-format metrics.
+import functools
+import json
+import os
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+TRACE_PATH = os.getenv("TRACE_PATH", "")  # One JSON line per run, "" = not written
+METRICS_PATH = os.getenv("METRICS_PATH", "")  # Prometheus text file, "" = not written
+
+# Trace of the run and the node being executed, LangGraph runs nodes in tasks
+# that inherit these from the task that started the run
+current_trace = ContextVar("current_trace", default=None)
+current_node = ContextVar("current_node", default=None)
+
+
+class RunTrace:
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        self.started = time.time()
+        self.finished = None
+        self.spans = []
+        self.node_calls = defaultdict(int)
+        self.tokens = defaultdict(lambda: {"prompt": 0, "completion": 0})
+
+    def record(self, node: str, phase: str, seconds: float, **fields):
+        self.spans.append(
+            {"node": node, "phase": phase, "seconds": round(seconds, 6), **fields}
+        )
+
+    def add_tokens(self, node: str, prompt_tokens: int, completion_tokens: int):
+        self.tokens[node]["prompt"] += prompt_tokens
+        self.tokens[node]["completion"] += completion_tokens
+
+    def phase_totals(self) -> dict:
+        # (node, phase) -> [count, seconds]
+        totals = defaultdict(lambda: [0, 0.0])
+        for span in self.spans:
+            total = totals[(span["node"], span["phase"])]
+            total[0] += 1
+            total[1] += span["seconds"]
+        return totals
+
+    def summary(self) -> dict:
+        nodes = {}
+        for (node, phase), (count, seconds) in self.phase_totals().items():
+            entry = nodes.setdefault(
+                node, {"calls": self.node_calls[node], "phases": {}}
+            )
+            entry["retries"] = max(0, entry["calls"] - 1)
+            entry["phases"][phase] = {"count": count, "seconds": round(seconds, 6)}
+        for node, tokens in self.tokens.items():
+            nodes.setdefault(node, {"calls": self.node_calls[node], "phases": {}})
+            nodes[node]["tokens"] = dict(tokens)
+        return {
+            "run_id": self.run_id,
+            "total_seconds": round((self.finished or time.time()) - self.started, 6),
+            "nodes": nodes,
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {**self.summary(), "started": self.started, "spans": self.spans}
+        )
+
+
+class Metrics:
+    """Totals over every finished run of the process."""
+
+    def __init__(self):
+        self.runs = 0
+        self.run_seconds = 0.0
+        self.phase_count = defaultdict(int)
+        self.phase_seconds = defaultdict(float)
+        self.node_calls = defaultdict(int)
+        self.node_retries = defaultdict(int)
+        self.tokens = defaultdict(int)  # (node, "prompt"/"completion") -> tokens
+
+    def add(self, trace: RunTrace):
+        self.runs += 1
+        self.run_seconds += (trace.finished or time.time()) - trace.started
+        for key, (count, seconds) in trace.phase_totals().items():
+            self.phase_count[key] += count
+            self.phase_seconds[key] += seconds
+        for node, calls in trace.node_calls.items():
+            self.node_calls[node] += calls
+            self.node_retries[node] += max(0, calls - 1)
+        for node, tokens in trace.tokens.items():
+            for kind, count in tokens.items():
+                self.tokens[(node, kind)] += count
+
+    def prometheus_text(self) -> str:
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{key}="{val}"' for key, val in labels.items())
+                lines.append(
+                    f"{name}{{{label_text}}} {value}" if labels else f"{name} {value}"
+                )
+
+        metric(
+            "optimizer_runs_total",
+            "counter",
+            "Finished workflow runs.",
+            [({}, self.runs)],
+        )
+        metric(
+            "optimizer_run_seconds_total",
+            "counter",
+            "Wall time of finished workflow runs.",
+            [({}, round(self.run_seconds, 6))],
+        )
+        metric(
+            "optimizer_node_calls_total",
+            "counter",
+            "Executions of each workflow node.",
+            [
+                ({"node": node}, calls)
+                for node, calls in sorted(self.node_calls.items())
+            ],
+        )
+        metric(
+            "optimizer_node_retries_total",
+            "counter",
+            "Repeated executions of a node within one run (fix loops, new plans, rounds).",
+            [
+                ({"node": node}, count)
+                for node, count in sorted(self.node_retries.items())
+            ],
+        )
+        metric(
+            "optimizer_phase_seconds_total",
+            "counter",
+            "Time spent in each phase of a node.",
+            [
+                ({"node": node, "phase": phase}, round(seconds, 6))
+                for (node, phase), seconds in sorted(self.phase_seconds.items())
+            ],
+        )
+        metric(
+            "optimizer_phase_count_total",
+            "counter",
+            "Number of times each phase of a node was recorded.",
+            [
+                ({"node": node, "phase": phase}, count)
+                for (node, phase), count in sorted(self.phase_count.items())
+            ],
+        )
+        metric(
+            "optimizer_llm_tokens_total",
+            "counter",
+            "LLM tokens reported by the API per node.",
+            [
+                ({"node": node, "type": kind}, count)
+                for (node, kind), count in sorted(self.tokens.items())
+            ],
+        )
+        return "\n".join(lines) + "\n"
+
+
+# Shared by every session of the process
+metrics = Metrics()
+
+
+def record_phase(phase: str, seconds: float, **fields):
+    trace = current_trace.get()
+    if trace is not None:
+        trace.record(current_node.get() or "workflow", phase, seconds, **fields)
+
+
+@contextmanager
+def phase(name: str, **fields):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(name, time.perf_counter() - started, **fields)
+
+
+def record_tokens(prompt_tokens: int, completion_tokens: int):
+    trace = current_trace.get()
+    if trace is not None:
+        trace.add_tokens(
+            current_node.get() or "workflow", prompt_tokens, completion_tokens
+        )
+
+
+def instrumented(node: str, agent):
+    """Wrap a workflow node so its runs and total time are recorded in the current trace."""
+
+    @functools.wraps(agent)
+    async def wrapper(state):
+        trace = current_trace.get()
+        if trace is not None:
+            trace.node_calls[node] += 1
+        token = current_node.set(node)
+        try:
+            with phase("total"):
+                return await agent(state)
+        finally:
+            current_node.reset(token)
+
+    return wrapper
+
+
+def write_line(path: str, line: str):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+
+
+def write_metrics(path: str):
+    # Written to a temporary file first, a scraper never sees a half-written file
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temporary = f"{path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        f.write(metrics.prometheus_text())
+    os.replace(temporary, path)
+
+
+@contextmanager
+def run_trace(run_id=None, trace_path=None, metrics_path=None):
+    """
+    Collect the trace of one workflow run.
+
+    Parameters:
+    - run_id: Identifier of the run, e.g. the chat thread id.
+    - trace_path: JSON-lines file the finished trace is appended to, defaults to TRACE_PATH.
+    - metrics_path: Prometheus text file rewritten after the run, defaults to METRICS_PATH.
+    """
+    trace = RunTrace(run_id or str(uuid.uuid4()))
+    token = current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        current_trace.reset(token)
+        trace.finished = time.time()
+        metrics.add(trace)
+        trace_path = TRACE_PATH if trace_path is None else trace_path
+        metrics_path = METRICS_PATH if metrics_path is None else metrics_path
+        if trace_path:
+            write_line(trace_path, trace.to_json())
+        if metrics_path:
+            write_metrics(metrics_path)
+
+
+class TokenUsage(BaseCallbackHandler):
+    """Adds the token usage the API reports for an LLM call to the current trace."""
+
+    run_inline = True
+
+    def on_llm_end(self, response, **kwargs):
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                usage = getattr(message, "usage_metadata", None)
+                if usage:
+                    record_tokens(
+                        usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+                    )
+
+
+def with_usage(kwargs: dict) -> dict:
+    # Adds the token callback to the config of an LLM call
+    config = dict(kwargs.pop("config", None) or {})
+    config["callbacks"] = [*(config.get("callbacks") or []), TokenUsage()]
+    return {**kwargs, "config": config}
+
+
+async def timed_stream(model, prompt, *args, **kwargs):
+    """model.astream with time to first token, streaming time and token usage recorded."""
+    started = time.perf_counter()
+    first_token = None
+    async for chunk in model.astream(prompt, *args, **with_usage(kwargs)):
+        if first_token is None:
+            first_token = time.perf_counter()
+            record_phase("llm_first_token", first_token - started)
+        yield chunk
+    record_phase("llm_stream", time.perf_counter() - (first_token or started))
+
+
+class TimedStructuredModel:
+    # llm.with_structured_output(schema) with call time and token usage recorded
+    def __init__(self, runnable):
+        self.runnable = runnable
+
+    def invoke(self, prompt, *args, **kwargs):
+        with phase("llm_structured"):
+            return self.runnable.invoke(prompt, *args, **with_usage(kwargs))
+
+    async def ainvoke(self, prompt, *args, **kwargs):
+        with phase("llm_structured"):
+            return await self.runnable.ainvoke(prompt, *args, **with_usage(kwargs))
@@ -0,0 +1,119 @@
+# utils/limits.py
+# Wall-clock timeout, CPU quota and memory limit for running generated code,
+# plus a small runner script that reports CPU time and peak memory of the program.
+import json
+import math
+import os
+import re
+import signal
+
+from .workspace import Workspace
+
+EXECUTION_TIMEOUT = float(os.getenv("EXECUTION_TIMEOUT", "600"))  # Seconds
+EXECUTION_CPUS = float(os.getenv("EXECUTION_CPUS", "1"))  # Number of CPUs
+EXECUTION_MEMORY = os.getenv("EXECUTION_MEMORY", "2g")  # Docker memory limit
+# Address space cap of runs without Docker as a multiple of EXECUTION_MEMORY, 0 = no cap.
+# Unlike Docker's limit on resident memory, RLIMIT_AS counts reserved virtual memory:
+# numpy/OpenBLAS reserve buffers per thread and solvers map large arenas, so a cap equal to
+# EXECUTION_MEMORY fails programs that run fine in Docker. Opt-in for that reason.
+VENV_ADDRESS_SPACE_FACTOR = float(os.getenv("VENV_ADDRESS_SPACE_FACTOR", "0"))
+
+# Exit code of a container process killed by SIGKILL, usually the out-of-memory killer
+KILLED_EXIT_CODE = 137
+
+RUNNER_FILE = "run_measured.py"
+STATS_MARKER = "__EXECUTION_STATS__"
+
+# Runs the given script as a child process and prints its resource usage as the last line
+RUNNER_SCRIPT = f"""import json
+import resource
+import subprocess
+import sys
+
+returncode = subprocess.call([sys.executable, *sys.argv[1:]])
+# A child killed by a signal has a negative return code, reported like a shell would (137)
+exit_code = returncode if returncode >= 0 else 128 - returncode
+usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+stats = {{
+    "cpu_time": usage.ru_utime + usage.ru_stime,
+    "peak_memory_mb": usage.ru_maxrss / 1024,
+    "exit_code": exit_code,
+}}
+sys.stdout.flush()
+print("{STATS_MARKER}" + json.dumps(stats), flush=True)
+sys.exit(exit_code)
+"""
+
+
+def was_killed(exit_code) -> bool:
+    # 137 from a container or the runner, -9 from a local process killed by SIGKILL
+    return exit_code in (KILLED_EXIT_CODE, -signal.SIGKILL)
+
+
+def write_runner(workspace: Workspace, target: str = "generated.py") -> list:
+    # Returns the command that runs the target script (generated.py or the profiler) through the runner
+    workspace.write_file(RUNNER_FILE, RUNNER_SCRIPT)
+    return ["python", RUNNER_FILE, target]
+
+
+def parse_stats_line(line: str):
+    # Resource usage reported by the runner, None for normal output lines
+    if not line.startswith(STATS_MARKER):
+        return None
+    try:
+        return json.loads(line[len(STATS_MARKER) :])
+    except ValueError:
+        return None
+
+
+def docker_run_limits() -> list:
+    return ["--cpus", str(EXECUTION_CPUS), "--memory", EXECUTION_MEMORY]
+
+
+def compose_limits() -> dict:
+    return {"cpus": EXECUTION_CPUS, "mem_limit": EXECUTION_MEMORY}
+
+
+def engine_limits() -> dict:
+    # Container options of the Docker Engine API (docker SDK)
+    return {"nano_cpus": int(EXECUTION_CPUS * 1e9), "mem_limit": EXECUTION_MEMORY}
+
+
+def memory_limit_bytes(limit: str = EXECUTION_MEMORY):
+    # Docker style size, e.g. "512m" or "2g", None if it can't be parsed
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([bkmg]?)b?\s*", limit.lower())
+    if not match:
+        return None
+    number, unit = match.groups()
+    return int(float(number) * 1024 ** "bkmg".index(unit or "b"))
+
+
+def process_limits(timeout=None, address_space_factor=None):
+    """
+    Local counterpart of the container limits, for processes run without Docker.
+
+    Returns:
+    - Function for subprocess preexec_fn that caps CPU time of the child process at
+      timeout * EXECUTION_CPUS, and its address space at VENV_ADDRESS_SPACE_FACTOR *
+      EXECUTION_MEMORY when the factor is set. The address space is not resident memory,
+      see VENV_ADDRESS_SPACE_FACTOR.
+    """
+    import resource
+
+    if address_space_factor is None:
+        address_space_factor = VENV_ADDRESS_SPACE_FACTOR
+    memory = memory_limit_bytes()
+    address_space = (
+        int(memory * address_space_factor)
+        if memory and address_space_factor > 0
+        else None
+    )
+    cpu_seconds = math.ceil(timeout * EXECUTION_CPUS) + 1 if timeout else None
+
+    def apply():
+        if address_space:
+            resource.setrlimit(resource.RLIMIT_AS, (address_space, address_space))
+        if cpu_seconds:
+            resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds))
+
+    return apply
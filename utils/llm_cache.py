@@ -0,0 +1,181 @@
+# utils/llm_cache.py
+# Persistent response cache for the shared LLM instances.
+# Responses are stored in SQLite keyed by model, prompt and output schema, with TTL and
+# LRU size limits. Re-running the same problem or a benchmark then skips the API calls.
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from .workspace import WORKSPACES_ROOT
+
+LLM_CACHE = os.getenv("LLM_CACHE", "false").lower() in ("1", "true", "yes")
+LLM_CACHE_PATH = os.getenv(
+    "LLM_CACHE_PATH", os.path.join(WORKSPACES_ROOT, ".llm_cache.sqlite")
+)
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))  # 0 = no expiry
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1000"))
+
+
+def cache_key(model: str, prompt, schema=None) -> str:
+    payload = {
+        "model": model,
+        "prompt": str(prompt),
+        "schema": schema.model_json_schema() if schema else None,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def model_id(model) -> str:
+    name = getattr(model, "model_name", None) or type(model).__name__
+    return f"{name}:{getattr(model, 'temperature', None)}"
+
+
+class LLMCache:
+    def __init__(
+        self,
+        path=LLM_CACHE_PATH,
+        ttl=LLM_CACHE_TTL,
+        max_entries=LLM_CACHE_MAX_ENTRIES,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "created_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self.connection.commit()
+
+    def get(self, key: str):
+        row = self.connection.execute(
+            "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        now = time.time()
+        if row and self.ttl and now - row[1] > self.ttl:
+            self.connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.connection.commit()
+            row = None
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.connection.execute(
+            "UPDATE responses SET last_used = ? WHERE key = ?", (now, key)
+        )
+        self.connection.commit()
+        return row[0]
+
+    def set(self, key: str, value: str):
+        now = time.time()
+        self.connection.execute(
+            "INSERT OR REPLACE INTO responses (key, value, created_at, last_used) "
+            "VALUES (?, ?, ?, ?)",
+            (key, value, now, now),
+        )
+        # Least recently used entries go first when the cache is full
+        self.connection.execute(
+            "DELETE FROM responses WHERE key NOT IN "
+            "(SELECT key FROM responses ORDER BY last_used DESC LIMIT ?)",
+            (self.max_entries,),
+        )
+        self.connection.commit()
+
+    def stats(self) -> dict:
+        (size,) = self.connection.execute("SELECT COUNT(*) FROM responses").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": size}
+
+    def clear(self):
+        self.connection.execute("DELETE FROM responses")
+        self.connection.commit()
+
+
+class CachedStructuredModel:
+    # Cached version of llm.with_structured_output(schema)
+    def __init__(self, runnable, cache: LLMCache, model: str, schema):
+        self.runnable = runnable
+        self.cache = cache
+        self.model = model
+        self.schema = schema
+
+    def invoke(self, prompt, *args, **kwargs):
+        key = cache_key(self.model, prompt, self.schema)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return self.schema.model_validate_json(cached)
+        response = self.runnable.invoke(prompt, *args, **kwargs)
+        self.cache.set(key, response.model_dump_json())
+        return response
+
+    async def ainvoke(self, prompt, *args, **kwargs):
+        key = cache_key(self.model, prompt, self.schema)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return self.schema.model_validate_json(cached)
+        response = await self.runnable.ainvoke(prompt, *args, **kwargs)
+        self.cache.set(key, response.model_dump_json())
+        return response
+
+
+class CachedChatModel:
+    """
+    Wraps a chat model so that astream, ainvoke and with_structured_output use the cache.
+    Everything else is passed to the wrapped model.
+    """
+
+    def __init__(self, model, cache: LLMCache):
+        self.wrapped = model
+        self.cache = cache
+        self.model = model_id(model)
+
+    def __getattr__(self, name):
+        return getattr(self.wrapped, name)
+
+    async def astream(self, prompt, *args, **kwargs):
+        key = cache_key(self.model, prompt)
+        cached = self.cache.get(key)
+        if cached is not None:
+            # The whole response at once, callers collect chunks anyway
+            yield AIMessageChunk(content=cached)
+            return
+
+        content = ""
+        async for chunk in self.wrapped.astream(prompt, *args, **kwargs):
+            content += chunk.content
+            yield chunk
+        self.cache.set(key, content)
+
+    async def ainvoke(self, prompt, *args, **kwargs):
+        key = cache_key(self.model, prompt)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return AIMessage(content=cached)
+        response = await self.wrapped.ainvoke(prompt, *args, **kwargs)
+        self.cache.set(key, response.content)
+        return response
+
+    def with_structured_output(self, schema, **kwargs):
+        runnable = self.wrapped.with_structured_output(schema, **kwargs)
+        return CachedStructuredModel(runnable, self.cache, self.model, schema)
+
+
+# Created on first use, so the SQLite file only exists when caching is enabled
+shared_cache = None
+
+
+def cached(model):
+    """Return the model wrapped with the shared response cache, or as is when LLM_CACHE is off."""
+    global shared_cache
+    if not LLM_CACHE:
+        return model
+    if shared_cache is None:
+        shared_cache = LLMCache()
+    return CachedChatModel(model, shared_cache)
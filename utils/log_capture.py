@@ -0,0 +1,119 @@
+# utils/log_capture.py
+# Bounded capture of build and program output.
+# Noisy builds and solvers printing every iteration can produce megabytes of output,
+# which used to end up in the state and in every analysis and fixer prompt.
+# Only the beginning and the end of each stream are kept in memory, repeated lines are
+# collapsed and the full output is written to a log file in the workspace.
+import os
+from collections import deque
+
+from .workspace import Workspace
+
+LOG_HEAD_BYTES = int(os.getenv("LOG_HEAD_BYTES", "4000"))  # Kept from the start
+LOG_TAIL_BYTES = int(os.getenv("LOG_TAIL_BYTES", "12000"))  # Kept from the end
+# Full logs in the workspace, "false" = not written
+LOG_SPILL = os.getenv("LOG_SPILL", "true").lower() in ("1", "true", "yes")
+
+BUILD_LOG_FILE = "build.log"
+RUN_LOG_FILE = "run.log"
+
+
+def byte_size(line: str) -> int:
+    # Budgets are in bytes, solver output with non-ASCII text has more bytes than characters
+    return len(line.encode("utf-8", errors="replace"))
+
+
+class LogStream:
+    """
+    One output stream with a byte budget: the first head_bytes and the last tail_bytes
+    (a ring buffer of lines) are kept, everything between is only counted. Sizes are
+    UTF-8 bytes, not characters.
+    """
+
+    def __init__(
+        self, head_bytes=LOG_HEAD_BYTES, tail_bytes=LOG_TAIL_BYTES, spill_path=None
+    ):
+        self.head_bytes = head_bytes
+        self.tail_bytes = tail_bytes
+        self.spill_path = spill_path
+        self.spill = open(spill_path, "w", encoding="utf-8") if spill_path else None
+        self.head = []
+        self.head_size = 0
+        self.tail = deque()
+        self.tail_size = 0
+        self.omitted_lines = 0
+        self.omitted_bytes = 0
+        self.total_bytes = 0
+        self.last_line = None
+        self.repeats = 0  # How many times last_line came again in a row
+
+    def add(self, line: str):
+        self.total_bytes += byte_size(line)
+        if self.spill:
+            self.spill.write(line)
+        if line == self.last_line:
+            self.repeats += 1
+            return
+        self.flush_repeats()
+        self.last_line = line
+        self.keep(line)
+
+    def flush_repeats(self):
+        if self.repeats:
+            self.keep(f"[previous line repeated {self.repeats} more times]\n")
+            self.repeats = 0
+
+    def keep(self, line: str):
+        size = byte_size(line)
+        if not self.tail and self.head_size + size <= self.head_bytes:
+            self.head.append(line)
+            self.head_size += size
+            return
+        self.tail.append((line, size))
+        self.tail_size += size
+        # The newest line always stays, even when it alone is over the budget
+        while self.tail_size > self.tail_bytes and len(self.tail) > 1:
+            _, dropped = self.tail.popleft()
+            self.tail_size -= dropped
+            self.omitted_lines += 1
+            self.omitted_bytes += dropped
+
+    def text(self) -> str:
+        """The kept output, with a note where lines were left out."""
+        self.flush_repeats()
+        parts = list(self.head)
+        if self.omitted_lines:
+            note = (
+                f"[... {self.omitted_lines} lines ({self.omitted_bytes} bytes) omitted"
+            )
+            if self.spill_path:
+                note += f", full output in {os.path.basename(self.spill_path)}"
+            parts.append(note + " ...]\n")
+        parts.extend(line for line, _ in self.tail)
+        return "".join(parts)
+
+    def tail_text(self, size: int) -> str:
+        return self.text()[-size:]
+
+    def close(self):
+        self.flush_repeats()
+        if self.spill:
+            self.spill.close()
+            self.spill = None
+
+
+class LogCapture:
+    """Separate bounded streams for the image build and the program run of one execution."""
+
+    def __init__(self, workspace: Workspace = None, spill=LOG_SPILL, **limits):
+        def spill_path(name):
+            return workspace.file_path(name) if workspace and spill else None
+
+        if workspace:
+            workspace.create()
+        self.build = LogStream(spill_path=spill_path(BUILD_LOG_FILE), **limits)
+        self.run = LogStream(spill_path=spill_path(RUN_LOG_FILE), **limits)
+
+    def close(self):
+        self.build.close()
+        self.run.close()
@@ -0,0 +1,68 @@
+# utils/performance.py
+# Performance-aware mode: runtime, memory and solver status of each execution are collected
+# into PerformanceMetrics, so later optimization rounds can target speed as well as quality.
+import os
+import re
+
+from schemas import ExecutionStats, PerformanceMetrics
+
+# When enabled, new rounds are asked to reduce runtime and memory too, not only improve quality
+PERFORMANCE_MODE = os.getenv("PERFORMANCE_MODE", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+# e.g. "Status: Optimal" (PuLP), "Solution status: OPTIMAL" (OR-Tools)
+STATUS_PATTERN = re.compile(
+    r"^\s*(?:solver\s+|solution\s+)?status\s*[:=]\s*([A-Za-z][A-Za-z _-]*?)\s*$",
+    re.IGNORECASE | re.MULTILINE,
+)
+# e.g. "Result - Optimal solution found" (CBC log)
+CBC_RESULT_PATTERN = re.compile(r"^Result - (.+?)\s*$", re.MULTILINE)
+
+
+def solver_status(output: str):
+    # The last reported status wins, solvers may print intermediate ones
+    matches = STATUS_PATTERN.findall(output) or CBC_RESULT_PATTERN.findall(output)
+    return matches[-1] if matches else None
+
+
+def build_metrics(stats: ExecutionStats, output: str) -> PerformanceMetrics:
+    return PerformanceMetrics(
+        runtime_seconds=stats.wall_time if stats else None,
+        cpu_time_seconds=stats.cpu_time if stats else None,
+        peak_memory_mb=stats.peak_memory_mb if stats else None,
+        solver_status=solver_status(output or ""),
+    )
+
+
+def format_metrics(metrics: PerformanceMetrics) -> str:
+    if metrics is None:
+        return "Not measured."
+
+    def value(number, unit):
+        return f"{number:.2f} {unit}" if number is not None else "unknown"
+
+    return (
+        f"Runtime: {value(metrics.runtime_seconds, 's')}, "
+        f"CPU time: {value(metrics.cpu_time_seconds, 's')}, "
+        f"Peak memory: {value(metrics.peak_memory_mb, 'MB')}, "
+        f"Solver status: {metrics.solver_status or 'unknown'}"
+    )
+
+
+def performance_notes(metrics: PerformanceMetrics, profile_report: str = None) -> str:
+    # Text for the new round prompt, tells the LLM whether speed matters
+    measured = format_metrics(metrics)
+    if profile_report:
+        # Hot spots of the last run, so the next version can target the real bottleneck
+        measured += f"\n\nProfile of the last run:\n{profile_report}"
+    if PERFORMANCE_MODE:
+        return (
+            f"{measured}\n"
+            "Performance is a primary goal in this task: reduce runtime and memory use "
+            "(e.g. better formulation, fewer variables, solver time limits, vectorized data handling) "
+            "while keeping or improving the solution quality."
+        )
+    return f"{measured}\nRuntime is not the priority, focus on the solution quality."
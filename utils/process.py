@@ -0,0 +1,79 @@
+# utils/process.py
+# Helpers for running external commands (docker, docker-compose) without blocking the event loop.
+import asyncio
+
+# Maximum length of a single output line read from a subprocess (asyncio default is 64 KiB)
+STREAM_LIMIT = 1024 * 1024
+
+
+# Start a subprocess without blocking the event loop, stdout and stderr are combined
+# Extra options (env, preexec_fn, start_new_session) are passed on to the subprocess
+async def spawn_process(command, cwd, **options):
+    return await asyncio.create_subprocess_exec(
+        *command,
+        cwd=cwd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+        limit=STREAM_LIMIT,
+        **options,
+    )
+
+
+# Read the output of a subprocess line by line
+async def read_lines(process):
+    async for raw_line in process.stdout:
+        yield raw_line.decode("utf-8", errors="replace")
+
+
+# Run a command, pass every output line to the given callback and return the exit code.
+# With a timeout the process is killed and asyncio.TimeoutError raised when it runs too long.
+async def run_streaming(command, cwd, on_line, timeout=None):
+    process = await spawn_process(command, cwd)
+
+    async def consume():
+        async for line in read_lines(process):
+            await on_line(line)
+        return await process.wait()
+
+    try:
+        return await asyncio.wait_for(consume(), timeout)
+    except (asyncio.TimeoutError, asyncio.CancelledError):
+        kill_process(process)
+        await process.wait()
+        raise
+
+
+def kill_process(process):
+    try:
+        process.kill()
+    except ProcessLookupError:
+        pass  # Already exited
+
+
+# Run a command and return its exit code and output, used for short docker queries
+async def run_captured(command, cwd=None):
+    process = await spawn_process(command, cwd)
+    stdout, _ = await process.communicate()
+    return process.returncode, stdout.decode("utf-8", errors="replace")
+
+
+# Run a command with data on its stdin, e.g. a tar stream for `docker cp -`
+async def run_with_input(command, data: bytes, cwd=None):
+    process = await asyncio.create_subprocess_exec(
+        *command,
+        cwd=cwd,
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+    )
+    stdout, _ = await process.communicate(data)
+    return process.returncode, stdout.decode("utf-8", errors="replace")
+
+
+# Run a cleanup command, output goes straight to the server console
+async def run_quietly(command, cwd):
+    try:
+        process = await asyncio.create_subprocess_exec(*command, cwd=cwd)
+        await process.wait()
+    except Exception as e:
+        print(f"Command {' '.join(command)} failed: {e}")
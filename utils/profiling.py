@@ -0,0 +1,106 @@
+# utils/profiling.py
+# Opt-in profiling of generated code inside the container.
+# generated.py is run under cProfile and tracemalloc, and a compact report of the hottest
+# functions and the biggest allocation sites is printed as one marked line at the end.
+import json
+import os
+
+from .workspace import Workspace
+
+PROFILING_MODE = os.getenv("PROFILING_MODE", "false").lower() in ("1", "true", "yes")
+# Number of functions and allocation sites in the report
+PROFILE_TOP = int(os.getenv("PROFILE_TOP", "15"))
+
+PROFILER_FILE = "profile_generated.py"
+PROFILE_MARKER = "__PROFILE_REPORT__"
+
+PROFILER_SCRIPT = f"""import cProfile
+import json
+import os
+import pstats
+import runpy
+import sys
+import tracemalloc
+
+TOP = {PROFILE_TOP}
+
+tracemalloc.start()
+profiler = cProfile.Profile()
+exit_code = 0
+try:
+    profiler.runcall(runpy.run_path, "generated.py", run_name="__main__")
+except SystemExit as e:
+    exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+finally:
+    _, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    functions = []
+    stats = pstats.Stats(profiler).stats
+    ordered = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)
+    for (filename, line, name), (_, calls, total, cumulative, _) in ordered:
+        if filename == __file__ or "runpy" in filename or name == "<built-in method builtins.exec>":
+            continue
+        functions.append(
+            {{
+                "function": f"{{os.path.basename(filename)}}:{{line}}({{name}})",
+                "calls": calls,
+                "total_time": round(total, 4),
+                "cumulative_time": round(cumulative, 4),
+            }}
+        )
+        if len(functions) >= TOP:
+            break
+
+    allocations = [
+        {{
+            "location": f"{{os.path.basename(stat.traceback[0].filename)}}:{{stat.traceback[0].lineno}}",
+            "size_mb": round(stat.size / 1024 / 1024, 3),
+            "count": stat.count,
+        }}
+        for stat in snapshot.statistics("lineno")[:TOP]
+    ]
+
+    report = {{
+        "functions": functions,
+        "allocations": allocations,
+        "peak_traced_mb": round(peak / 1024 / 1024, 3),
+    }}
+    sys.stdout.flush()
+    print("{PROFILE_MARKER}" + json.dumps(report), flush=True)
+sys.exit(exit_code)
+"""
+
+
+def write_profiler(workspace: Workspace) -> str:
+    # Returns the script to run instead of generated.py
+    workspace.write_file(PROFILER_FILE, PROFILER_SCRIPT)
+    return PROFILER_FILE
+
+
+def parse_profile_line(line: str):
+    # Profile report printed by the profiler script, None for normal output lines
+    if not line.startswith(PROFILE_MARKER):
+        return None
+    try:
+        return json.loads(line[len(PROFILE_MARKER) :])
+    except ValueError:
+        return None
+
+
+def format_profile_report(report: dict) -> str:
+    lines = ["Top functions by cumulative time:"]
+    for entry in report.get("functions", []):
+        lines.append(
+            f"- {entry['function']}: {entry['cumulative_time']} s cumulative, "
+            f"{entry['total_time']} s own, {entry['calls']} calls"
+        )
+    lines.append(
+        f"Allocation peaks (peak traced memory {report.get('peak_traced_mb', 0)} MB):"
+    )
+    for entry in report.get("allocations", []):
+        lines.append(
+            f"- {entry['location']}: {entry['size_mb']} MB in {entry['count']} blocks"
+        )
+    return "\n".join(lines)
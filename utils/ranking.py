@@ -0,0 +1,118 @@
+# utils/ranking.py
+# Deterministic choice of the best optimization result.
+# Results are compared by objective value, ties are broken by goal achievement and runtime.
+# The LLM only has to decide when no result has an objective value to compare.
+import math
+import os
+
+from .decisions import goal_achieved
+
+DIRECTIONS = ("minimize", "maximize")
+# Whether a smaller or larger objective_value is better, when the run doesn't say
+OBJECTIVE_DIRECTION = os.getenv("OBJECTIVE_DIRECTION", "minimize")
+# Faster result wins when objective value and goal achievement are equal
+RANK_BY_RUNTIME = os.getenv("RANK_BY_RUNTIME", "true").lower() in ("1", "true", "yes")
+
+
+def check_direction(direction: str) -> str:
+    if direction not in DIRECTIONS:
+        raise ValueError(
+            f"Objective direction must be 'minimize' or 'maximize', not {direction!r}"
+        )
+    return direction
+
+
+check_direction(OBJECTIVE_DIRECTION)
+
+
+def objective_direction(state) -> str:
+    """
+    Direction of the run: the batch job option, then what the problem analyzer found
+    in the user's goal, then OBJECTIVE_DIRECTION.
+    """
+    purpose = state.get("purpose")
+    direction = (
+        state.get("objectiveDirection")
+        or getattr(purpose, "objective_direction", None)
+        or OBJECTIVE_DIRECTION
+    )
+    return check_direction(direction)
+
+
+def objective_of(result):
+    # Missing, NaN and infinite values can't be compared
+    value = getattr(result, "objective_value", None)
+    if value is None or not math.isfinite(value):
+        return None
+    return value
+
+
+def runtime_of(result):
+    metrics = getattr(result, "metrics", None)
+    return getattr(metrics, "runtime_seconds", None)
+
+
+def rank_key(result, index, direction=OBJECTIVE_DIRECTION, by_runtime=RANK_BY_RUNTIME):
+    # Smaller key is better, the index keeps equal results in their original order
+    value = objective_of(result)
+    sign = -1 if direction == "maximize" else 1
+    runtime = runtime_of(result) if by_runtime else None
+    return (
+        value is None,
+        sign * value if value is not None else 0,
+        not goal_achieved(result),
+        runtime is None,
+        runtime or 0,
+        index,
+    )
+
+
+def rank_results(
+    results: list, direction=OBJECTIVE_DIRECTION, by_runtime=RANK_BY_RUNTIME
+):
+    """
+    Order the results from best to worst.
+
+    Returns:
+    - Indexes of the results, best first. Results without an objective value come last.
+    """
+    check_direction(direction)
+    return sorted(
+        range(len(results)),
+        key=lambda index: rank_key(results[index], index, direction, by_runtime),
+    )
+
+
+def best_candidate(results: list, direction=OBJECTIVE_DIRECTION):
+    """Index of the best result, None for an empty list."""
+    ranking = rank_results(results, direction)
+    return ranking[0] if ranking else None
+
+
+def is_ambiguous(results: list) -> bool:
+    # Nothing to compare deterministically, e.g. the LLM could not find any objective value
+    return len(results) > 1 and all(objective_of(result) is None for result in results)
+
+
+def ranking_reason(results: list, best: int, direction=OBJECTIVE_DIRECTION) -> str:
+    """Explain the deterministic choice for the final report."""
+    result = results[best]
+    value = objective_of(result)
+    if len(results) == 1:
+        return f"Optimization 1 is the only result, objective value {value}."
+    word = "highest" if direction == "maximize" else "lowest"
+    reason = f"Optimization {best + 1} has the {word} objective value ({value})"
+
+    # Explain the tie-break when the runner-up has the same value
+    runner_up = results[rank_results(results, direction)[1]]
+    if objective_of(runner_up) == value:
+        if goal_achieved(result) != goal_achieved(runner_up):
+            reason += ", shared with another result but it achieves the goal"
+        elif RANK_BY_RUNTIME and runtime_of(result) != runtime_of(runner_up):
+            reason += (
+                f", shared with another result but it ran fastest "
+                f"({runtime_of(result):.2f} s)"
+            )
+        else:
+            reason += ", shared with another result and it was found first"
+    return reason + "."
@@ -0,0 +1,113 @@
+# utils/result_file.py
+# Result protocol between the generated program and the workflow.
+# The program writes result.json into its working directory, which is the mounted workspace,
+# so objective value and solver status are read from the file instead of the LLM guessing
+# them from the whole output. The LLM then only sees a short summary, or nothing at all.
+# Runs without the mount (pooled containers, images built with the code copied in) copy the
+# file out of the container into the workspace after the run.
+import json
+import os
+
+from pydantic import ValidationError
+
+from schemas import OutputOfCode, ProgramResult
+from .workspace import Workspace
+
+RESULT_FILE = "result.json"
+RESULT_FILE_MAX_BYTES = int(os.getenv("RESULT_FILE_MAX_BYTES", str(1024 * 1024)))
+# false = a valid result.json replaces the LLM analysis of the output completely
+RESULT_LLM_ANALYSIS = os.getenv("RESULT_LLM_ANALYSIS", "true").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+# How much of the solution and the program output the LLM sees next to the result
+RESULT_SUMMARY_CHARS = int(os.getenv("RESULT_SUMMARY_CHARS", "3000"))
+
+# Statuses that mean a usable solution was found
+SOLVED_STATUSES = ("optimal", "feasible", "solved", "success", "integer optimal")
+
+
+def clear_result_file(workspace: Workspace):
+    # A file from an earlier run would be mistaken for the result of this one
+    path = workspace.file_path(RESULT_FILE)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def read_result_file(workspace: Workspace):
+    """
+    Read and validate result.json written by the program.
+
+    Returns:
+    - (ProgramResult, None) for a valid file, (None, None) when the program did not
+      write one and (None, error) when it is too large or invalid.
+    """
+    path = workspace.file_path(RESULT_FILE)
+    if not os.path.isfile(path):
+        return None, None
+    if os.path.getsize(path) > RESULT_FILE_MAX_BYTES:
+        return None, f"{RESULT_FILE} is larger than {RESULT_FILE_MAX_BYTES} bytes"
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        return None, f"{RESULT_FILE} is not valid JSON: {e}"
+    if not isinstance(data, dict):
+        return None, f"{RESULT_FILE} must contain a JSON object"
+    try:
+        return ProgramResult.model_validate(data), None
+    except ValidationError as e:
+        return None, f"{RESULT_FILE} does not match the result protocol: {e}"
+
+
+def solution_text(result: ProgramResult, limit=RESULT_SUMMARY_CHARS) -> str:
+    text = json.dumps(result.solution, ensure_ascii=False, default=str)
+    if len(text) > limit:
+        text = text[:limit] + f"... ({len(text) - limit} more characters)"
+    return text
+
+
+def is_solved(result: ProgramResult) -> bool:
+    if result.status:
+        return result.status.strip().lower() in SOLVED_STATUSES
+    return result.objective_value is not None
+
+
+def summarize_for_analysis(
+    result: ProgramResult, output: str, limit=RESULT_SUMMARY_CHARS
+) -> str:
+    """The result file and the end of the output, instead of the whole output with build logs."""
+    lines = [
+        f"Result file ({RESULT_FILE}) written by the program:",
+        f"- Objective value: {result.objective_value}",
+        f"- Status: {result.status}",
+        f"- Solver statistics: {json.dumps(result.solver_stats, default=str)}",
+        f"- Solution: {solution_text(result, limit)}",
+    ]
+    tail = output[-limit:]
+    if len(output) > limit:
+        lines.append(f"\nLast {limit} characters of the program output:")
+    else:
+        lines.append("\nProgram output:")
+    lines.append(tail)
+    return "\n".join(lines)
+
+
+def output_from_result(result: ProgramResult) -> OutputOfCode:
+    """Analysis built from the result file only, used when RESULT_LLM_ANALYSIS is off."""
+    status = result.status or "unknown"
+    solved = is_solved(result)
+    stats = ", ".join(f"{key}: {value}" for key, value in result.solver_stats.items())
+    return OutputOfCode(
+        answer=f"Objective value {result.objective_value}, status {status}",
+        answer_description=f"Solution: {solution_text(result)}",
+        improvement="",
+        objective_value=result.objective_value,
+        explanation=f"Solver statistics: {stats}" if stats else "",
+        is_goal_achieved=(
+            f"True, the program reported status {status}."
+            if solved
+            else f"False, the program reported status {status}."
+        ),
+    )
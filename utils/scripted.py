@@ -0,0 +1,142 @@
+# utils/scripted.py
+# Deterministic offline stand-ins for the LLM, the executor and the Chainlit UI.
+# They replay canned responses in order, so the whole workflow can be run and benchmarked
+# without network access, an OpenAI key or a Docker daemon.
+# init_headless_context is also used by batch.py for real runs without the UI.
+import json
+import uuid
+
+from chainlit.context import ChainlitContext, context_var
+from chainlit.emitter import BaseChainlitEmitter
+from chainlit.session import HTTPSession
+from langchain_core.messages import AIMessage, AIMessageChunk
+from pydantic import BaseModel
+
+
+class ScriptExhausted(Exception):
+    pass
+
+
+def response_text(response) -> str:
+    return response.model_dump_json() if isinstance(response, BaseModel) else response
+
+
+class ScriptedStructuredModel:
+    def __init__(self, model, schema):
+        self.model = model
+        self.schema = schema
+
+    def invoke(self, prompt, *args, **kwargs):
+        response = self.model.next_response(prompt)
+        if isinstance(response, self.schema):
+            return response
+        return self.schema.model_validate_json(response_text(response))
+
+    async def ainvoke(self, prompt, *args, **kwargs):
+        return self.invoke(prompt)
+
+
+class ScriptedChatModel:
+    """
+    Chat model that replays canned responses in order, one per LLM call.
+
+    Responses are Pydantic models (e.g. Purpose, Code) or raw strings. Streamed calls get
+    the JSON of the model in chunks, with_structured_output calls get the model itself.
+    """
+
+    def __init__(self, responses, chunk_size=64):
+        self.responses = list(responses)
+        self.chunk_size = chunk_size
+        self.prompts = []  # Every prompt the workflow sent, in order
+
+    def next_response(self, prompt):
+        self.prompts.append(str(prompt))
+        if not self.responses:
+            raise ScriptExhausted(
+                f"No scripted response left for call {len(self.prompts)}"
+            )
+        return self.responses.pop(0)
+
+    async def astream(self, prompt, *args, **kwargs):
+        text = response_text(self.next_response(prompt))
+        for start in range(0, len(text), self.chunk_size):
+            yield AIMessageChunk(content=text[start : start + self.chunk_size])
+
+    async def ainvoke(self, prompt, *args, **kwargs):
+        return AIMessage(content=response_text(self.next_response(prompt)))
+
+    def with_structured_output(self, schema, **kwargs):
+        return ScriptedStructuredModel(self, schema)
+
+
+class ScriptedExecutor:
+    """
+    Executor backend that replays canned program runs instead of building and running containers.
+
+    Each run is an (output, exit code) pair, the output is passed on line by line like real
+    program output, so tracebacks and stats lines are handled the same way.
+    A third item, a dict, is written to the workspace as the result file of the run.
+    """
+
+    name = "scripted"
+
+    def __init__(self, runs):
+        self.runs = list(runs)
+        self.codes = []  # generated.py of every run, in order
+
+    async def run(
+        self, workspace, script, on_output, on_line, on_start, timeout=None
+    ) -> int:
+        with open(workspace.file_path("generated.py"), "r", encoding="utf-8") as f:
+            self.codes.append(f.read())
+        if not self.runs:
+            raise ScriptExhausted(f"No scripted run left for run {len(self.codes)}")
+        output, returncode, *result = self.runs.pop(0)
+        if result:
+            with open(workspace.file_path("result.json"), "w", encoding="utf-8") as f:
+                json.dump(result[0], f)
+
+        on_start()
+        for line in output.splitlines(keepends=True):
+            await on_line(line)
+        return returncode
+
+
+class ScriptedEmitter(BaseChainlitEmitter):
+    """Chainlit emitter without a browser, action buttons are answered from a list."""
+
+    def __init__(self, session, answers):
+        super().__init__(session)
+        self.answers = list(answers)
+
+    async def send_ask_user(self, step_dict, spec, raise_on_timeout=False):
+        if not self.answers:
+            raise ScriptExhausted("No scripted answer left for an action message")
+        value = self.answers.pop(0)
+        return {"value": value, "label": value}
+
+
+def headless_session(thread_id=None) -> HTTPSession:
+    return HTTPSession(
+        id=str(uuid.uuid4()),
+        thread_id=thread_id or str(uuid.uuid4()),
+        token=None,
+        user=None,
+        client_type="webapp",
+    )
+
+
+def init_headless_context(thread_id=None) -> ChainlitContext:
+    """Set up a Chainlit context for the current task, so agents can run outside the server."""
+    session = headless_session(thread_id)
+    context = ChainlitContext(session, emitter=BaseChainlitEmitter(session))
+    context_var.set(context)
+    return context
+
+
+def init_scripted_context(answers, thread_id=None) -> ChainlitContext:
+    """Like init_headless_context, action buttons are answered from the given list."""
+    session = headless_session(thread_id)
+    context = ChainlitContext(session, emitter=ScriptedEmitter(session, answers))
+    context_var.set(context)
+    return context
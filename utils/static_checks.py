@@ -0,0 +1,186 @@
+# utils/static_checks.py
+# Fast local checks for generated code, run before paying for a Docker build.
+# Finds syntax errors, names that are never defined and imports missing from requirements.txt.
+import ast
+import builtins
+import re
+import sys
+
+from .docker_templates import requirement_lines
+
+# Import name -> pip package name, for packages where these differ
+IMPORT_TO_PACKAGE = {
+    "sklearn": "scikit-learn",
+    "cv2": "opencv-python",
+    "yaml": "pyyaml",
+    "PIL": "pillow",
+    "bs4": "beautifulsoup4",
+    "dateutil": "python-dateutil",
+    "dotenv": "python-dotenv",
+}
+
+# Import name -> packages that install it as a dependency. Such an import works when
+# one of these is in requirements.txt, so it is only a warning.
+TRANSITIVE_IMPORTS = {
+    "numpy": {
+        "pandas",
+        "scipy",
+        "scikit-learn",
+        "ortools",
+        "matplotlib",
+        "statsmodels",
+    },
+    "scipy": {"scikit-learn", "statsmodels"},
+    "dateutil": {"pandas", "matplotlib"},
+    "pytz": {"pandas"},
+    "google": {"ortools"},  # google.protobuf
+    "absl": {"ortools"},
+    "et_xmlfile": {"openpyxl"},
+    "joblib": {"scikit-learn"},
+}
+
+# Shipped with the Python images the code runs in
+ALWAYS_AVAILABLE = {"pkg_resources", "setuptools", "pip"}
+
+# Names Python defines for every module
+MODULE_NAMES = {"__file__", "__name__", "__doc__", "__builtins__", "__spec__"}
+
+
+def normalize_package(name: str) -> str:
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def requirement_names(requirements: str) -> set:
+    return {
+        normalize_package(re.split(r"[<>=!~\[;\s]", line, 1)[0])
+        for line in requirement_lines(requirements)
+    }
+
+
+def check_syntax(code: str):
+    try:
+        compile(code, "generated.py", "exec")
+    except SyntaxError as e:
+        return (
+            f'File "generated.py", line {e.lineno}\n{e.text or ""}SyntaxError: {e.msg}'
+        )
+    return None
+
+
+def defined_names(tree: ast.AST) -> set:
+    # Flow-insensitive: a name bound anywhere in the module counts as defined
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and not isinstance(node.ctx, ast.Load):
+            names.add(node.id)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(node.name)
+        elif isinstance(node, ast.arg):
+            names.add(node.arg)
+        elif isinstance(node, ast.alias):
+            names.add(node.asname or node.name.split(".")[0])
+        elif isinstance(node, ast.ExceptHandler) and node.name:
+            names.add(node.name)
+        elif isinstance(node, (ast.Global, ast.Nonlocal)):
+            names.update(node.names)
+        elif isinstance(node, (ast.MatchAs, ast.MatchStar)) and node.name:
+            names.add(node.name)
+        elif isinstance(node, ast.MatchMapping) and node.rest:
+            names.add(node.rest)
+    return names
+
+
+def check_undefined_names(tree: ast.AST) -> list:
+    # Star imports can define anything, the check would only give false alarms
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ImportFrom) and any(a.name == "*" for a in node.names):
+            return []
+
+    known = defined_names(tree) | set(dir(builtins)) | MODULE_NAMES
+    errors = []
+    reported = set()
+    for node in ast.walk(tree):
+        if (
+            isinstance(node, ast.Name)
+            and isinstance(node.ctx, ast.Load)
+            and node.id not in known
+            and node.id not in reported
+        ):
+            reported.add(node.id)
+            errors.append(
+                f'File "generated.py", line {node.lineno}\n'
+                f"NameError: name '{node.id}' is not defined"
+            )
+    return errors
+
+
+def imported_modules(tree: ast.AST) -> dict:
+    # Top level module name -> line of the first import
+    modules = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                modules.setdefault(alias.name.split(".")[0], node.lineno)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            modules.setdefault(node.module.split(".")[0], node.lineno)
+    return modules
+
+
+def check_imports(tree: ast.AST, requirements: str, local_modules=()) -> tuple:
+    """
+    Returns:
+    - Errors for imports that nothing in requirements.txt installs, and warnings for
+      imports that are only installed as a dependency of a listed package.
+    """
+    declared = requirement_names(requirements)
+    errors = []
+    warnings = []
+    for module, lineno in imported_modules(tree).items():
+        if (
+            module in sys.stdlib_module_names
+            or module in local_modules
+            or module in ALWAYS_AVAILABLE
+        ):
+            continue
+        package = normalize_package(IMPORT_TO_PACKAGE.get(module, module))
+        if package in declared or normalize_package(module) in declared:
+            continue
+        providers = sorted(TRANSITIVE_IMPORTS.get(module, set()) & declared)
+        if providers:
+            warnings.append(
+                f"Line {lineno}: '{module}' is not in requirements.txt, "
+                f"expecting it to be installed by {', '.join(providers)}"
+            )
+            continue
+        errors.append(
+            f'File "generated.py", line {lineno}\n'
+            f"ModuleNotFoundError: No module named '{module}' "
+            f"(package '{package}' is missing from requirements.txt)"
+        )
+    return errors, warnings
+
+
+def preflight_report(code: str, requirements: str, local_modules=()) -> tuple:
+    """
+    Run all static checks for the generated code.
+
+    Parameters:
+    - code: Python code to check.
+    - requirements: Contents of requirements.txt.
+    - local_modules: Module names available as files next to the code (e.g. uploaded .py files).
+
+    Returns:
+    - Lists of error messages and of warnings, no errors when the code passed all checks.
+    """
+    syntax_error = check_syntax(code)
+    if syntax_error:
+        return [syntax_error], []
+
+    tree = ast.parse(code)
+    import_errors, warnings = check_imports(tree, requirements, local_modules)
+    return check_undefined_names(tree) + import_errors, warnings
+
+
+def preflight_check(code: str, requirements: str, local_modules=()) -> list:
+    # Only the errors, see preflight_report
+    return preflight_report(code, requirements, local_modules)[0]
@@ -0,0 +1,71 @@
+# utils/ui_stream.py
+# Coalesced streaming to the Chainlit UI.
+# Every stream_token call is one websocket message, so streaming each LLM chunk or log line
+# separately costs thousands of tiny messages per step. Tokens are buffered and sent
+# together once the buffer is old or large enough, at the latest `interval` after the first
+# buffered token even when no further token comes.
+import asyncio
+import os
+import time
+
+UI_STREAM_INTERVAL = float(os.getenv("UI_STREAM_INTERVAL", "0.1"))  # Seconds
+UI_STREAM_BYTES = int(os.getenv("UI_STREAM_BYTES", "2048"))
+
+
+class TokenStreamer:
+    """
+    Buffers tokens for a Chainlit step and sends them with one stream_token call
+    per time window or per full buffer. Use as an async context manager (or call flush
+    when done), so the rest is sent and the deadline timer stopped when streaming ends,
+    also on errors.
+    """
+
+    def __init__(self, step, interval=UI_STREAM_INTERVAL, max_bytes=UI_STREAM_BYTES):
+        self.step = step
+        self.interval = interval
+        self.max_bytes = max_bytes
+        self.parts = []
+        self.size = 0
+        self.last_flush = time.monotonic()
+        self.flushes = 0  # Number of UI messages sent
+        self.timer = None  # Deadline flush of the buffered tokens
+        self.lock = asyncio.Lock()  # Keeps the messages in order
+
+    async def send(self, token: str):
+        if not token:
+            return
+        self.parts.append(token)
+        self.size += len(token)
+        if (
+            self.size >= self.max_bytes
+            or time.monotonic() - self.last_flush >= self.interval
+        ):
+            await self.flush()
+        elif self.timer is None:
+            # A log line printed right before a long solve must not wait for the next one
+            self.timer = asyncio.create_task(self.flush_later())
+
+    async def flush_later(self):
+        await asyncio.sleep(self.interval - (time.monotonic() - self.last_flush))
+        self.timer = None
+        await self.flush()
+
+    async def flush(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        async with self.lock:
+            if self.parts:
+                text = "".join(self.parts)
+                self.parts = []
+                self.size = 0
+                self.flushes += 1
+                await self.step.stream_token(text)
+            self.last_flush = time.monotonic()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.flush()
+        return False
@@ -0,0 +1,107 @@
+# utils/venv_cache.py
+# Cache of virtualenvs for running generated code without Docker.
+# Virtualenvs are keyed by a hash of the Python version and requirements.txt, so rounds that
+# only change generated.py reuse an existing environment, like the dependency image cache.
+import asyncio
+import hashlib
+import os
+import shutil
+import sys
+from collections import defaultdict
+
+from .docker_templates import requirement_lines
+from .image_cache import normalize_requirements
+from .process import run_streaming
+from .wheelhouse import pip_options, wheelhouse_path
+from .workspace import Workspace, WORKSPACES_ROOT
+
+VENV_CACHE_DIR = os.getenv("VENV_CACHE_DIR", os.path.join(WORKSPACES_ROOT, ".venvs"))
+
+
+def venv_key(requirements: str) -> str:
+    digest = hashlib.sha256()
+    digest.update(sys.version.encode())
+    digest.update(b"\0")
+    digest.update(
+        normalize_requirements("\n".join(requirement_lines(requirements))).encode()
+    )
+    return digest.hexdigest()[:16]
+
+
+def venv_python(path: str) -> str:
+    if os.name == "nt":
+        return os.path.join(path, "Scripts", "python.exe")
+    return os.path.join(path, "bin", "python")
+
+
+class VenvCache:
+    def __init__(self, root=VENV_CACHE_DIR):
+        self.root = root
+        self.locks = defaultdict(asyncio.Lock)  # One install per key at a time
+
+    async def prepare(self, workspace: Workspace, on_line) -> str:
+        """
+        Make sure a virtualenv with the requirements of the workspace exists.
+
+        Parameters:
+        - workspace: Session workspace with requirements.txt.
+        - on_line: Async callback that receives the install output line by line.
+
+        Returns:
+        - Absolute path of the Python interpreter of the virtualenv.
+        """
+        requirements = ""
+        if os.path.exists(workspace.file_path("requirements.txt")):
+            with open(
+                workspace.file_path("requirements.txt"), "r", encoding="utf-8"
+            ) as f:
+                requirements = f.read()
+
+        key = venv_key(requirements)
+        path = os.path.abspath(os.path.join(self.root, key))
+        python = venv_python(path)
+
+        async with self.locks[key]:
+            if os.path.exists(python):
+                await on_line(f"Using cached virtualenv {key}\n")
+                return python
+
+            # Built next to the final path and renamed when complete, a failed
+            # install never leaves a half-installed environment in the cache
+            building = f"{path}.building"
+            shutil.rmtree(building, ignore_errors=True)
+            os.makedirs(self.root, exist_ok=True)
+            try:
+                # pip of the server installs into the virtualenv, creating it is then almost free
+                command = [sys.executable, "-m", "venv", "--without-pip", building]
+                if await run_streaming(command, self.root, on_line) != 0:
+                    raise Exception("Virtualenv creation failed")
+
+                lines = requirement_lines(requirements)
+                if lines:
+                    requirements_file = os.path.join(building, "requirements.txt")
+                    with open(requirements_file, "w", encoding="utf-8") as f:
+                        f.write("\n".join(lines) + "\n")
+                    command = [
+                        sys.executable,
+                        "-m",
+                        "pip",
+                        "--python",
+                        venv_python(building),
+                        "install",
+                        "--disable-pip-version-check",
+                        *(pip_options(wheelhouse_path()) if wheelhouse_path() else []),
+                        "-r",
+                        requirements_file,
+                    ]
+                    if await run_streaming(command, self.root, on_line) != 0:
+                        raise Exception("Installing the requirements failed")
+
+                os.replace(building, path)
+            finally:
+                shutil.rmtree(building, ignore_errors=True)
+
+        return python
+
+
+venv_cache = VenvCache()
@@ -0,0 +1,112 @@
+# utils/wheelhouse.py
+# Local wheelhouse and pip cache for dependency installs.
+# The same few packages (pandas, PuLP, OR-Tools, openpyxl) are in almost every requirements.txt,
+# so their wheels are downloaded once into a local directory that image builds mount.
+# With BuildKit the pip cache of earlier builds is reused too. WHEELHOUSE_OFFLINE=true
+# installs only from the wheelhouse, for hosts without access to the package index.
+#
+# python -m utils.wheelhouse  # populate with WHEELHOUSE_PACKAGES
+# python -m utils.wheelhouse scipy networkx  # add more packages
+import asyncio
+import os
+import sys
+
+from .process import run_streaming
+from .workspace import WORKSPACES_ROOT
+
+# "" = no wheelhouse
+WHEELHOUSE_DIR = os.getenv(
+    "WHEELHOUSE_DIR", os.path.join(WORKSPACES_ROOT, ".wheelhouse")
+)
+WHEELHOUSE_PACKAGES = os.getenv(
+    "WHEELHOUSE_PACKAGES", "pandas numpy pulp ortools openpyxl"
+).split()
+WHEELHOUSE_OFFLINE = os.getenv("WHEELHOUSE_OFFLINE", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+# RUN --mount cache for pip, needs BuildKit (default since Docker 23)
+BUILDKIT_PIP_CACHE = os.getenv("BUILDKIT_PIP_CACHE", "true").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+# Name of the build context the Dockerfile mounts the wheelhouse from
+WHEELHOUSE_CONTEXT = "wheelhouse"
+
+
+def wheelhouse_path():
+    # Absolute path for docker build, None when the wheelhouse is disabled
+    if not WHEELHOUSE_DIR:
+        return None
+    os.makedirs(WHEELHOUSE_DIR, exist_ok=True)
+    return os.path.abspath(WHEELHOUSE_DIR)
+
+
+def pip_options(find_links: str) -> list:
+    # Local wheels are used when they match, the index only when it is allowed
+    options = ["--find-links", find_links]
+    if WHEELHOUSE_OFFLINE:
+        options.append("--no-index")
+    return options
+
+
+def pip_install_line() -> str:
+    """The pip install step of the template Dockerfile."""
+    if not BUILDKIT_PIP_CACHE:
+        return "RUN pip install --no-cache-dir -r requirements.txt"
+    mounts = ["--mount=type=cache,target=/root/.cache/pip"]
+    options = []
+    if WHEELHOUSE_DIR:
+        mounts.append(f"--mount=type=bind,from={WHEELHOUSE_CONTEXT},target=/wheelhouse")
+        options = pip_options("/wheelhouse")
+    return " ".join(["RUN", *mounts, "pip install", *options, "-r requirements.txt"])
+
+
+def build_context_args(dockerfile: str) -> list:
+    # docker build arguments for a Dockerfile that mounts the wheelhouse
+    if f"from={WHEELHOUSE_CONTEXT}" not in dockerfile or not WHEELHOUSE_DIR:
+        return []
+    return ["--build-context", f"{WHEELHOUSE_CONTEXT}={wheelhouse_path()}"]
+
+
+async def populate_wheelhouse(packages=None, on_line=None) -> int:
+    """
+    Download wheels of the packages and their dependencies into the wheelhouse.
+    pip runs in the base image, so the wheels match the platform of the builds.
+
+    Returns:
+    - Exit code of pip download.
+    """
+    # Imported here, docker_templates uses this module for the pip install step
+    from .docker_templates import DOCKER_PYTHON_IMAGE
+
+    packages = packages or WHEELHOUSE_PACKAGES
+    path = wheelhouse_path()
+    if path is None:
+        raise ValueError("WHEELHOUSE_DIR is not set")
+
+    async def print_line(line):
+        print(line, end="")
+
+    command = [
+        "docker",
+        "run",
+        "--rm",
+        "-v",
+        f"{path}:/wheelhouse",
+        DOCKER_PYTHON_IMAGE,
+        "pip",
+        "download",
+        "--disable-pip-version-check",
+        "--dest",
+        "/wheelhouse",
+        *packages,
+    ]
+    return await run_streaming(command, path, on_line or print_line)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(populate_wheelhouse(sys.argv[1:])))
@@ -0,0 +1,68 @@
+# utils/workspace.py
+# Per-session working directory for generated code, requirements and Docker files.
+# Every chat session gets its own directory and compose project name, so that
+# several optimization sessions can run in the same server process in parallel.
+import os
+import re
+import shutil
+from pydantic import BaseModel, Field
+
+# All session workspaces live under this directory
+WORKSPACES_ROOT = os.getenv("WORKSPACES_ROOT", "generated")
+
+
+class Workspace(BaseModel):
+    session_id: str = Field(
+        description="Identifier of the chat session (thread) that owns this workspace."
+    )
+    root: str = Field(
+        default=WORKSPACES_ROOT,
+        description="Directory where all session workspaces are created.",
+    )
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.root, self.safe_id)
+
+    @property
+    def safe_id(self) -> str:
+        # Only characters that are valid both in a directory and in a compose project name
+        return re.sub(r"[^a-z0-9_-]", "", self.session_id.lower()) or "default"
+
+    @property
+    def project_name(self) -> str:
+        # Unique docker compose project, keeps containers and networks of sessions apart
+        return f"optimizer-{self.safe_id}"
+
+    def create(self) -> "Workspace":
+        os.makedirs(self.path, exist_ok=True)
+        return self
+
+    def file_path(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def write_file(self, name: str, content: str):
+        self.create()
+        with open(self.file_path(name), "w", encoding="utf-8") as f:
+            f.write(content)
+
+    def copy_file(self, source_path: str, name: str) -> str:
+        # Uploaded names keep only their last part, so a file can't land outside the workspace
+        name = os.path.basename(name.replace("\\", "/"))
+        if not name or name.startswith("."):
+            raise ValueError(f"Invalid file name: {name!r}")
+        self.create()
+        shutil.copyfile(source_path, self.file_path(name))
+        return name
+
+    def write_compose_file(self, content: str):
+        # Fixed container names would clash between sessions, compose generates unique ones per project
+        content = re.sub(r"(?m)^\s*container_name:.*\n?", "", content)
+        self.write_file("compose.yaml", content)
+
+    def compose_command(self, *args: str, override: str = None) -> list:
+        command = ["docker-compose", "-p", self.project_name]
+        if override:
+            # Override files are merged on top of the generated compose.yaml
+            command += ["-f", "compose.yaml", "-f", override]
+        return [*command, *args]